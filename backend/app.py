@@ -1,13 +1,34 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 import os
+import hmac
+import time
+import heapq
 import requests
 import redis
-import json
 import logging
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 from logging.handlers import RotatingFileHandler
+from upstream import UpstreamClient
+from kol_index import KolProfileIndex
+from single_flight import SingleFlight
+from response_cache import CachedBody, ResponseCache, WarmSpec, content_etag, load_ttls
+from cache_warmer import CacheWarmer
+from invalidation import InvalidationBus
+from local_cache import LocalCache
+from codec import get_codec
+from postgrest import Query
+from key_pool import KeyPool, RateLimited
+from fanout import FanOut
+from wallet_stats import WalletStats, summarize
+from webhook_ingest import BatchWriter, QueueFull, normalize
+from recent_store import RecentTransactions, block_timestamp
+from stream_hub import StreamBusy, StreamEvent, StreamHub, encode_event
+from metrics import Metrics
+from profiler import Profiler
+from redis_guard import RedisGuard
 
 load_dotenv()
 
@@ -31,8 +52,42 @@ BIRDEYE_API_KEY = os.getenv('VITE_BIRDEYE_API_KEY')
 ABLY_API_KEY = os.getenv('VITE_ABLY_API_KEY')
 SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('VITE_SUPABASE_ANON_KEY')
-
-HELIUS_API_KEY = HELIUS_API_KEY_1
+HELIUS_API_URL = os.getenv('HELIUS_API_URL', 'https://api.helius.xyz')
+BIRDEYE_API_URL = os.getenv('BIRDEYE_API_URL', 'https://public-api.birdeye.so')
+HELIUS_WEBHOOK_SECRET = os.getenv('HELIUS_WEBHOOK_SECRET')
+HELIUS_KEY_WAIT = float(os.getenv('HELIUS_KEY_WAIT', 2))
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Shared across gunicorn workers through Redis once it's connected below
+metrics = Metrics(flush_interval=float(os.getenv('METRICS_FLUSH_INTERVAL', 5)))
+metrics.histogram('http_request_duration_seconds', 'Request latency by route, method and status')
+metrics.histogram('http_request_phase_seconds', 'Time per request spent in cache lookups, upstream calls and serialization')
+
+supabase = UpstreamClient.from_env('supabase', f"{SUPABASE_URL}/rest/v1", headers={
+    'Authorization': f'Bearer {SUPABASE_KEY}',
+    'apikey': SUPABASE_KEY,
+    'Content-Type': 'application/json'
+}, metrics=metrics, hedge_percentile=95)
+helius = UpstreamClient.from_env('helius', HELIUS_API_URL, timeout=15, metrics=metrics)
+helius_keys = KeyPool(
+    [('key_1', HELIUS_API_KEY_1), ('key_2', HELIUS_API_KEY_2), ('key_3', HELIUS_API_KEY_3)],
+    rate=float(os.getenv('HELIUS_KEY_RATE', 10)),
+    burst=float(os.getenv('HELIUS_KEY_BURST', 0)) or None,
+    cooldown=float(os.getenv('HELIUS_KEY_COOLDOWN', 5))
+)
+birdeye = UpstreamClient.from_env('birdeye', BIRDEYE_API_URL, headers={'X-API-KEY': BIRDEYE_API_KEY},
+                                  metrics=metrics)
+
+fanout = FanOut(
+    max_workers=int(os.getenv('FANOUT_WORKERS', 16)),
+    timeout=float(os.getenv('FANOUT_DEADLINE', 10))
+)
+
+kol_index = KolProfileIndex(
+    supabase,
+    refresh_interval=int(os.getenv('KOL_INDEX_REFRESH_INTERVAL', 60)),
+    full_reload_interval=int(os.getenv('KOL_INDEX_FULL_RELOAD_INTERVAL', 3600))
+)
 
 print(f"API Keys loaded:")
 print(f"  Helius API Key 1: {'✓' if HELIUS_API_KEY_1 else '✗'}")
@@ -43,60 +98,324 @@ print(f"  Ably API Key: {'✓' if ABLY_API_KEY else '✗'}")
 print(f"  Supabase URL: {'✓' if SUPABASE_URL else '✗'}")
 print(f"  Supabase Key: {'✓' if SUPABASE_KEY else '✗'}")
 
-try:
-    cache = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-    cache.ping()
-    REDIS_AVAILABLE = True
+# Short socket timeouts so a hung Redis costs milliseconds, not a worker;
+# while it's down the guard fails commands at once and probes for its return
+REDIS_OPTIONS = dict(
+    host=os.getenv('REDIS_HOST', 'localhost'),
+    port=int(os.getenv('REDIS_PORT', 6379)),
+    db=int(os.getenv('REDIS_DB', 0)),
+    socket_connect_timeout=float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.5)),
+    socket_timeout=float(os.getenv('REDIS_TIMEOUT', 2))
+)
+redis_raw = redis.Redis(**REDIS_OPTIONS)
+redis_guard = RedisGuard(redis_raw, retry_interval=float(os.getenv('REDIS_RETRY_INTERVAL', 2)))
+cache = redis_guard.wrap(redis.Redis(decode_responses=True, **REDIS_OPTIONS))
+cache_raw = redis_guard.wrap(redis_raw)
+metrics.redis = cache_raw
+
+if redis_guard.ping():
     print("✓ Redis connected successfully")
     app.logger.info('Redis cache connected')
-except Exception as e:
-    REDIS_AVAILABLE = False
-    print(f"✗ Redis not available: {str(e)}")
-    print("  Caching disabled - application will work without cache")
+else:
+    print(f"✗ Redis not available: {redis_guard.last_error}")
+    print(f"  Caching disabled until Redis answers (checked every {redis_guard.retry_interval:g}s)")
     if not app.debug:
-        app.logger.warning(f'Redis connection failed: {str(e)}')
+        app.logger.warning(f'Redis connection failed: {redis_guard.last_error}')
 
-@app.route('/api/transactions', methods=['GET'])
-def get_transactions():
-    try:
-        time_range = request.args.get('timeRange', '24h')
-        tx_type = request.args.get('type', 'all')
+try:
+    print(f"✓ KOL profile index loaded: {kol_index.load()} profiles")
+except Exception as e:
+    print(f"✗ KOL profile index not loaded: {str(e)}")
+    print("  Profiles will be loaded on first request")
+
+coalescer = SingleFlight(
+    cache,
+    lock_ttl=int(os.getenv('CACHE_LOCK_TTL', 30)),
+    wait_timeout=float(os.getenv('CACHE_LOCK_WAIT', 15))
+)
+
+CACHE_TTLS = load_ttls({
+    'token_price': 60,
+    'insider_scan': 180,
+    'transactions': 900,
+    'wallet_tx': 300,
+    'wallet_tx_page': 86400,
+    'trader_profile': 1800,
+    'kol_feed': 3600
+})
+
+local_cache = LocalCache(
+    max_bytes=int(os.getenv('L1_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    max_entries=int(os.getenv('L1_CACHE_MAX_ENTRIES', 10000))
+)
+
+codec = get_codec()
+print(f"✓ JSON codec: {codec.name}")
+
+profiler = Profiler(
+    cache_raw,
+    codec,
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+    keep=int(os.getenv('PROFILE_KEEP', 20)),
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', 5)) / 1000
+)
+# Route rules (e.g. /api/trader/<wallet_address>) eligible for random sampling; empty means all
+PROFILE_ROUTES = {route.strip() for route in os.getenv('PROFILE_ROUTES', '').split(',') if route.strip()}
+
+response_cache = ResponseCache(
+    cache_raw,
+    coalescer,
+    CACHE_TTLS,
+    codec,
+    local=local_cache,
+    local_ttl=float(os.getenv('L1_CACHE_TTL', 5)),
+    refresh_workers=int(os.getenv('CACHE_REFRESH_WORKERS', 4)),
+    metrics=metrics
+)
+
+TIME_RANGES = {
+    '1h': timedelta(hours=1),
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30)
+}
+
+BUY_TYPES = ['SWAP', 'BUY']
+
+TRANSACTION_COLUMNS = (
+    'id', 'transaction_signature', 'block_time', 'from_address', 'to_address', 'amount',
+    'token_mint', 'token_symbol', 'token_name', 'token_logo', 'transaction_type', 'fee',
+    'price_usd', 'sol_amount', 'token_pnl', 'token_pnl_percentage', 'market_cap'
+)
+KOL_FEED_COLUMNS = (
+    'id', 'from_address', 'transaction_type', 'block_time', 'token_symbol', 'token_mint',
+    'amount', 'token_pnl', 'token_pnl_percentage'
+)
+INSIDER_COLUMNS = (
+    'transaction_signature', 'transaction_type', 'from_address', 'block_time', 'token_symbol',
+    'token_mint', 'amount', 'amount_usd'
+)
+TRADER_TX_COLUMNS = ('id', 'transaction_type', 'block_time', 'token_symbol', 'token_mint', 'amount')
+STATS_TX_COLUMNS = ('transaction_signature', 'transaction_type', 'block_time', 'amount', 'created_at')
+
+INSIDER_MIN_USD = 100000
+INSIDER_HIGH_USD = 500000
+INSIDER_ALERT_BOUNDS = {
+    'high': (INSIDER_HIGH_USD, None),
+    'medium': (INSIDER_MIN_USD, INSIDER_HIGH_USD),
+    'all': (INSIDER_MIN_USD, None)
+}
+POSTGREST_MAX_IN_LIST = int(os.getenv('POSTGREST_MAX_IN_LIST', 150))
+BIRDEYE_MULTI_PRICE_BATCH = int(os.getenv('BIRDEYE_MULTI_PRICE_BATCH', 100))
+MAX_PRICE_ADDRESSES = int(os.getenv('MAX_PRICE_ADDRESSES', 500))
+KOL_FEED_MAX_ROWS = int(os.getenv('KOL_FEED_MAX_ROWS', 500))
+WALLET_TX_MAX_LIMIT = 100
+STREAM_MAX_DURATION = int(os.getenv('STREAM_MAX_DURATION', 300))
+STREAM_HEARTBEAT = int(os.getenv('STREAM_HEARTBEAT', 15))
+STREAM_REPLAY_MAX = int(os.getenv('STREAM_REPLAY_MAX', 500))
+STREAM_RETRY_MS = 3000
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', 1000))
+EXPORT_RATE_LIMIT_RETRIES = int(os.getenv('EXPORT_RATE_LIMIT_RETRIES', 5))
+
+STATS_WINDOWS = {
+    '1h': 3600,
+    '24h': 86400,
+    '7d': 7 * 86400,
+    '30d': 30 * 86400
+}
+WALLET_STATS_SYNC_INTERVAL = int(os.getenv('WALLET_STATS_SYNC_INTERVAL', 60))
+MONITORED_WALLETS_TTL = 60
+
+# Rows can commit with a created_at older than the newest one already read,
+# so incremental reads by created_at go back this far
+RECENT_OVERLAP_SECONDS = float(os.getenv('RECENT_OVERLAP_SECONDS', 30))
+
+wallet_stats = WalletStats(cache, STATS_WINDOWS, BUY_TYPES, overlap=RECENT_OVERLAP_SECONDS)
+
+recent_transactions = RecentTransactions(
+    supabase,
+    TRANSACTION_COLUMNS + KOL_FEED_COLUMNS + INSIDER_COLUMNS + TRADER_TX_COLUMNS,
+    retention=int(os.getenv('RECENT_TX_RETENTION', 7 * 86400)),
+    max_rows=int(os.getenv('RECENT_TX_MAX_ROWS', 20000)),
+    poll_interval=float(os.getenv('RECENT_TX_POLL_INTERVAL', 2)),
+    overlap=RECENT_OVERLAP_SECONDS,
+    reload_interval=float(os.getenv('RECENT_TX_RELOAD_INTERVAL', 0)) or None
+)
+
+def time_window_start(time_range, now_utc, default='24h'):
+    return now_utc - TIME_RANGES.get(time_range, TIME_RANGES[default])
+
+def chunked(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def helius_get(path, params=None):
+    # Each attempt goes to the key with the most headroom; a 429 cools that
+    # key down and the call moves on to the next one
+    attempts = max(len(helius_keys), 1)
+    for attempt in range(attempts):
+        key = helius_keys.acquire(timeout=HELIUS_KEY_WAIT)
+        response = helius.get(path, params={**(params or {}), 'api-key': key.value})
+        helius_keys.report(key, response.status_code, response.headers.get('Retry-After'))
+        if response.status_code != 429:
+            response.raise_for_status()
+            return response
+
+    raise RateLimited("Helius rate limit exceeded on all API keys",
+                      retry_after=helius_keys.retry_after())
+
+def rate_limited_response(e, data):
+    response = jsonify({
+        "success": False,
+        "error": f"Rate limited: {str(e)}",
+        "data": data
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(int(e.retry_after + 0.999), 1))
+    return response
+
+def project(rows, columns):
+    # Rows from the recent transaction buffer carry every column any feed needs
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+def ndjson_response(pages):
+    # Streams an iterable of row pages as one JSON object per line. The first
+    # page is fetched before responding so early failures still get a proper
+    # error status; a later failure ends the body with an {"error": ...} line
+    pages = iter(pages)
+    first = next(pages, [])
+
+    def generate():
+        yield b''.join(codec.dumps(row) + b'\n' for row in first)
+        try:
+            for page in pages:
+                yield b''.join(codec.dumps(row) + b'\n' for row in page)
+        except Exception as e:
+            app.logger.error(f"Export failed: {str(e)}")
+            yield codec.dumps({"error": str(e)}) + b'\n'
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = metrics.begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses (SSE, NDJSON) are timed up to their first byte
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.end_request(started, route, request.method, response.status_code)
+    return response
+
+def admin_token_matches(token):
+    # compare_digest only takes ASCII str, and headers can carry anything
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+@app.before_request
+def start_request_profile():
+    # One header lookup per request while sampling is off
+    if admin_token_matches(request.headers.get('X-Profile')):
+        g.profile = profiler.begin('header')
+    elif profiler.sampled():
+        route = request.url_rule.rule if request.url_rule is not None else None
+        if not PROFILE_ROUTES or route in PROFILE_ROUTES:
+            g.profile = profiler.begin('sampled')
+
+@app.after_request
+def finish_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.finish(
+            profile,
+            method=request.method,
+            path=request.full_path.rstrip('?'),
+            route=request.url_rule.rule if request.url_rule is not None else None,
+            status=response.status_code
+        )
+        response.headers['X-Profile-Id'] = profile.id
+    return response
+
+@app.teardown_request
+def discard_request_profile(exc):
+    # Requests that failed before after_request still have to stop being sampled
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.discard(profile)
+
+def cached_response(cached):
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@response_cache.cached('transactions', 'transactions_{time_range}_{tx_type}')
+def fetch_transactions(time_range, tx_type):
+    now_utc = datetime.now(timezone.utc)
+    window_start = time_window_start(time_range, now_utc)
+
+    transactions = recent_transactions.window(
+        window_start.timestamp(), 50,
+        match=None if tx_type == 'all' else lambda tx: tx.get('transaction_type') == tx_type.upper()
+    )
+
+    if transactions is not None:
+        transactions = project(transactions, TRANSACTION_COLUMNS)
+    else:
+        query = (Query('webhook_transactions')
+                 .select(*TRANSACTION_COLUMNS)
+                 .gte('block_time', window_start.isoformat())
+                 .order('block_time')
+                 .limit(50))
 
-        cache_key = f"transactions_{time_range}_{tx_type}"
+        if tx_type != 'all':
+            query.eq('transaction_type', tx_type.upper())
 
-        if REDIS_AVAILABLE:
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                return jsonify(json.loads(cached_data))
+        transactions = query.execute(supabase)
 
-        headers = {
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'apikey': SUPABASE_KEY,
-            'Content-Type': 'application/json'
-        }
+    result = {
+        "success": True,
+        "data": transactions,
+        "timeRange": time_range,
+        "type": tx_type
+    }
 
-        url = f"{SUPABASE_URL}/rest/v1/webhook_transactions"
-        params = {'order': 'block_time.desc', 'limit': '50'}
+    return result
 
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
+def transaction_export_pages(time_range, tx_type):
+    # Every row in the window, newest first, straight from Supabase; exports
+    # bypass the response caches so they don't evict hot entries
+    window_start = time_window_start(time_range, datetime.now(timezone.utc))
+    query = (Query('webhook_transactions')
+             .select(*TRANSACTION_COLUMNS)
+             .gte('block_time', window_start.isoformat()))
 
-        transactions = response.json()
+    if tx_type != 'all':
+        query.eq('transaction_type', tx_type.upper())
 
-        if tx_type != 'all':
-            transactions = [tx for tx in transactions if tx.get('transaction_type') == tx_type]
+    return query.seek_pages(supabase, 'block_time', 'transaction_signature', EXPORT_PAGE_SIZE)
 
-        result = {
-            "success": True,
-            "data": transactions,
-            "timeRange": time_range,
-            "type": tx_type
-        }
+def transaction_filters(args):
+    # Cache keys are built from these, so they must match the keys invalidate_dependents() drops
+    time_range = args.get('timeRange', '24h')
+    return (time_range if time_range in TIME_RANGES else '24h'), args.get('type', 'all').lower()
+
+@app.route('/api/transactions', methods=['GET'])
+def get_transactions():
+    try:
+        time_range, tx_type = transaction_filters(request.args)
+
+        if request.args.get('format') == 'ndjson':
+            return ndjson_response(transaction_export_pages(time_range, tx_type))
 
-        if REDIS_AVAILABLE:
-            cache.setex(cache_key, 300, json.dumps(result))
+        cached = fetch_transactions(time_range, tx_type)
 
-        return jsonify(result)
+        return cached_response(cached)
 
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -111,115 +430,151 @@ def get_transactions():
             "data": []
         }), 500
 
+def kol_trade(tx):
+    return {
+        'id': tx['id'],
+        'wallet': tx['from_address'],
+        'side': 'buy' if tx.get('transaction_type') in BUY_TYPES else 'sell',
+        'time': datetime.fromisoformat(tx['block_time'].replace('Z', '+00:00')).timestamp(),
+        'timestamp': tx['block_time'],
+        'token': tx.get('token_symbol', 'Unknown'),
+        'tokenContract': tx.get('token_mint', ''),
+        'amount': float(tx.get('amount') or 0),
+        'pnl': float(tx.get('token_pnl') or 0),
+        'pnlPercentage': float(tx.get('token_pnl_percentage') or 0)
+    }
+
+@response_cache.cached('kol_feed', 'kol_feed_{time_range}')
+def fetch_kol_feed_dataset(time_range):
+    # One canonical dataset per time range: the newest KOL trades in the
+    # window with raw numbers and epoch timestamps. Type filters, sorting,
+    # limits and display formatting are applied per request in kol_feed_view()
+    now_utc = datetime.now(timezone.utc)
+    time_filter = time_window_start(time_range, now_utc)
+
+    kol_index.ensure_loaded()
+    kol_profiles = kol_index.snapshot()
+
+    transactions = recent_transactions.window(
+        time_filter.timestamp(), KOL_FEED_MAX_ROWS, match=lambda tx: tx.get('from_address') in kol_profiles
+    )
+
+    if transactions is None:
+        base_query = (Query('webhook_transactions')
+                      .select(*KOL_FEED_COLUMNS)
+                      .gte('block_time', time_filter.isoformat())
+                      .order('block_time')
+                      .limit(KOL_FEED_MAX_ROWS))
+
+        # Long wallet lists are split so the query string stays within URL limits;
+        # the newest rows overall are among the newest of each chunk
+        pages = fanout.map(
+            lambda wallets: base_query.copy().in_('from_address', wallets).execute(supabase),
+            chunked(sorted(kol_profiles.keys()), POSTGREST_MAX_IN_LIST)
+        )
+        transactions = [tx for page in pages for tx in page]
+        transactions.sort(key=lambda tx: tx['block_time'], reverse=True)
+        transactions = transactions[:KOL_FEED_MAX_ROWS]
+
+    return {
+        "trades": [kol_trade(tx) for tx in transactions],
+        "built_at": now_utc.isoformat()
+    }
+
+kol_feed_datasets = {}
+
+def kol_feed_dataset(time_range):
+    # Decoded once per worker per dataset version, not once per request
+    cached = fetch_kol_feed_dataset(time_range)
+    decoded = kol_feed_datasets.get(time_range)
+    if decoded is None or decoded[0] != cached.etag:
+        with metrics.phase('serialization'):
+            decoded = (cached.etag, codec.loads(cached.body))
+        kol_feed_datasets[time_range] = decoded
+    return decoded[1]
+
+KOL_FEED_SORT_KEYS = {
+    'time': lambda trade: trade['time'],
+    'pnl': lambda trade: trade['pnl'],
+    'volume': lambda trade: trade['amount']
+}
+
+def format_time_ago(seconds):
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    elif seconds < 3600:
+        return f"{int(seconds / 60)}m"
+    return f"{int(seconds / 3600)}h"
+
+def format_kol_trade(trade, profile, now):
+    wallet = trade['wallet']
+    amount = f"${trade['amount']:,.2f}"
+    token_pnl = trade['pnl']
+    token_pnl_percentage = trade['pnlPercentage']
+
+    return {
+        'id': trade['id'],
+        'lastTx': trade['side'],
+        'timeAgo': format_time_ago(now - trade['time']),
+        'kolName': profile['name'],
+        'kolAvatar': profile.get('avatar_url', 'https://images.pexels.com/photos/220453/pexels-photo-220453.jpeg'),
+        'walletAddress': wallet,
+        'twitterHandle': profile.get('twitter_handle', wallet[:8]),
+        'token': trade['token'],
+        'tokenContract': trade['tokenContract'],
+        'bought': amount,
+        'sold': '$0.00' if trade['side'] == 'buy' else amount,
+        'holding': amount if trade['side'] == 'buy' else 'sold all',
+        'pnl': f"+${abs(token_pnl):,.2f}" if token_pnl >= 0 else f"-${abs(token_pnl):,.2f}",
+        'pnlPercentage': f"+{token_pnl_percentage:.2f}%" if token_pnl_percentage >= 0 else f"{token_pnl_percentage:.2f}%",
+        'timestamp': trade['timestamp']
+    }
+
+def render_kol_feed(dataset, time_range, tx_type, sort_by, limit, now):
+    # Trades whose wallet has no profile (any more) are dropped before the
+    # top-k, so they don't take places in it
+    candidates = []
+    for trade in dataset['trades']:
+        if tx_type in ('buy', 'sell') and trade['side'] != tx_type:
+            continue
+        profile = kol_index.get(trade['wallet'])
+        if profile is not None:
+            candidates.append((trade, profile))
+    sort_key = KOL_FEED_SORT_KEYS.get(sort_by, KOL_FEED_SORT_KEYS['time'])
+    top = heapq.nlargest(limit, candidates, key=lambda candidate: sort_key(candidate[0]))
+
+    kol_trades = [format_kol_trade(trade, profile, now) for trade, profile in top]
+
+    result = {
+        "success": True,
+        "data": kol_trades,
+        "timeRange": time_range,
+        "type": tx_type,
+        "sortBy": sort_by,
+        "cached_at": dataset['built_at'],
+        "cache_expires_in": response_cache.soft_ttl('kol_feed')
+    }
+    return result
+
+def kol_feed_view(time_range, tx_type, sort_by, limit):
+    dataset = kol_feed_dataset(time_range if time_range in TIME_RANGES else '24h')
+    result = render_kol_feed(dataset, time_range, tx_type, sort_by, limit, time.time())
+
+    with metrics.phase('serialization'):
+        body = codec.dumps(result)
+    return CachedBody(body, content_etag(body))
+
 @app.route('/api/kol-feed', methods=['GET'])
 def get_kol_feed():
     try:
         time_range = request.args.get('timeRange', '24h')
         tx_type = request.args.get('type', 'all')
         sort_by = request.args.get('sortBy', 'time')
-        limit = int(request.args.get('limit', 50))
-
-        cache_key = f"kol_feed_{time_range}_{tx_type}_{sort_by}_{limit}"
+        limit = min(max(int(request.args.get('limit', 50)), 1), KOL_FEED_MAX_ROWS)
 
-        if REDIS_AVAILABLE:
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                return jsonify(json.loads(cached_data))
+        cached = kol_feed_view(time_range, tx_type, sort_by, limit)
 
-        headers = {
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'apikey': SUPABASE_KEY,
-            'Content-Type': 'application/json'
-        }
-
-        now_utc = datetime.now(timezone.utc)
-        time_filter_map = {
-            '1h': now_utc - timedelta(hours=1),
-            '24h': now_utc - timedelta(hours=24),
-            '7d': now_utc - timedelta(days=7),
-            '30d': now_utc - timedelta(days=30)
-        }
-        time_filter = time_filter_map.get(time_range, now_utc - timedelta(hours=24))
-
-        kol_profiles_url = f"{SUPABASE_URL}/rest/v1/kol_profiles"
-        kol_response = requests.get(kol_profiles_url, headers=headers, params={'select': '*'}, timeout=10)
-        kol_response.raise_for_status()
-        kol_profiles = {p['wallet_address']: p for p in kol_response.json()}
-
-        tx_url = f"{SUPABASE_URL}/rest/v1/webhook_transactions"
-        tx_params = {
-            'select': '*',
-            'block_time': f'gte.{time_filter.isoformat()}',
-            'order': 'block_time.desc',
-            'limit': str(limit * 2)
-        }
-
-        tx_response = requests.get(tx_url, headers=headers, params=tx_params, timeout=10)
-        tx_response.raise_for_status()
-        transactions = tx_response.json()
-
-        kol_trades = []
-        for tx in transactions:
-            wallet = tx.get('from_address')
-            if wallet in kol_profiles:
-                profile = kol_profiles[wallet]
-
-                tx_category = 'buy' if tx.get('transaction_type') in ['SWAP', 'BUY'] else 'sell'
-
-                if tx_type != 'all' and tx_category != tx_type:
-                    continue
-
-                time_diff = now_utc - datetime.fromisoformat(tx['block_time'].replace('Z', '+00:00'))
-                if time_diff.total_seconds() < 60:
-                    time_ago = f"{int(time_diff.total_seconds())}s"
-                elif time_diff.total_seconds() < 3600:
-                    time_ago = f"{int(time_diff.total_seconds() / 60)}m"
-                else:
-                    time_ago = f"{int(time_diff.total_seconds() / 3600)}h"
-
-                token_pnl = float(tx.get('token_pnl', 0))
-                token_pnl_percentage = float(tx.get('token_pnl_percentage', 0))
-
-                trade = {
-                    'id': tx['id'],
-                    'lastTx': tx_category,
-                    'timeAgo': time_ago,
-                    'kolName': profile['name'],
-                    'kolAvatar': profile.get('avatar_url', 'https://images.pexels.com/photos/220453/pexels-photo-220453.jpeg'),
-                    'walletAddress': wallet,
-                    'twitterHandle': profile.get('twitter_handle', wallet[:8]),
-                    'token': tx.get('token_symbol', 'Unknown'),
-                    'tokenContract': tx.get('token_mint', ''),
-                    'bought': f"${float(tx.get('amount', 0)):,.2f}",
-                    'sold': '$0.00' if tx_category == 'buy' else f"${float(tx.get('amount', 0)):,.2f}",
-                    'holding': f"${float(tx.get('amount', 0)):,.2f}" if tx_category == 'buy' else 'sold all',
-                    'pnl': f"+${abs(token_pnl):,.2f}" if token_pnl >= 0 else f"-${abs(token_pnl):,.2f}",
-                    'pnlPercentage': f"+{token_pnl_percentage:.2f}%" if token_pnl_percentage >= 0 else f"{token_pnl_percentage:.2f}%",
-                    'timestamp': tx['block_time']
-                }
-                kol_trades.append(trade)
-
-        if sort_by == 'pnl':
-            kol_trades.sort(key=lambda x: float(x['pnl'].replace('$', '').replace(',', '').replace('+', '')), reverse=True)
-        elif sort_by == 'volume':
-            kol_trades.sort(key=lambda x: float(x['bought'].replace('$', '').replace(',', '')) + float(x['sold'].replace('$', '').replace(',', '')), reverse=True)
-
-        kol_trades = kol_trades[:limit]
-
-        result = {
-            "success": True,
-            "data": kol_trades,
-            "timeRange": time_range,
-            "type": tx_type,
-            "sortBy": sort_by,
-            "cached_at": now_utc.isoformat(),
-            "cache_expires_in": 3600
-        }
-
-        if REDIS_AVAILABLE:
-            cache.setex(cache_key, 3600, json.dumps(result))
-
-        return jsonify(result)
+        return cached_response(cached)
 
     except requests.exceptions.RequestException as e:
         app.logger.error(f"KOL feed request error: {str(e)}")
@@ -236,69 +591,72 @@ def get_kol_feed():
             "data": []
         }), 500
 
-@app.route('/api/insider-scan', methods=['GET'])
-def get_insider_scan():
-    try:
-        time_range = request.args.get('timeRange', '1h')
-        alert_level = request.args.get('alertLevel', 'all')
-        cache_key = f"insider_scan_{time_range}_{alert_level}"
-
-        if REDIS_AVAILABLE:
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                return jsonify(json.loads(cached_data))
-
-        headers = {
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'apikey': SUPABASE_KEY,
-            'Content-Type': 'application/json'
-        }
-
-        url = f"{SUPABASE_URL}/rest/v1/webhook_transactions"
-        params = {
-            'select': '*',
-            'order': 'block_time.desc',
-            'limit': '100'
+@response_cache.cached('insider_scan', 'insider_scan_{time_range}_{alert_level}')
+def fetch_insider_scan(time_range, alert_level):
+    now_utc = datetime.now(timezone.utc)
+    window_start = time_window_start(time_range, now_utc, default='1h')
+    bounds = INSIDER_ALERT_BOUNDS.get(alert_level)
+
+    transactions = []
+    if bounds is not None:
+        low, high = bounds
+
+        def in_bounds(tx):
+            amount_usd = float(tx.get('amount_usd') or 0)
+            return amount_usd > low and (high is None or amount_usd <= high)
+
+        transactions = recent_transactions.window(window_start.timestamp(), 50, match=in_bounds)
+
+        if transactions is None:
+            query = (Query('webhook_transactions')
+                     .select(*INSIDER_COLUMNS)
+                     .gte('block_time', window_start.isoformat())
+                     .gt('amount_usd', low)
+                     .order('block_time')
+                     .limit(50))
+            if high is not None:
+                query.lte('amount_usd', high)
+
+            transactions = query.execute(supabase)
+
+    activities = []
+    for tx in transactions:
+        amount_usd = float(tx.get('amount_usd') or 0)
+        wallet = tx.get('from_address') or ''
+        activity = {
+            "id": tx.get('transaction_signature', ''),
+            "type": "large_buy" if tx.get('transaction_type') in BUY_TYPES else "whale_move",
+            "wallet": wallet,
+            "walletName": wallet[:8] + '...',
+            "token": tx.get('token_symbol') or 'Unknown',
+            "tokenSymbol": tx.get('token_symbol') or 'UNK',
+            "amount": f"{tx.get('amount', 0)} {tx.get('token_symbol') or ''}",
+            "value": f"${amount_usd:,.0f}",
+            "timestamp": tx.get('block_time', ''),
+            "confidence": "high" if amount_usd > INSIDER_HIGH_USD else "medium",
+            "description": "Large transaction detected",
+            "contractAddress": tx.get('token_mint', '')
         }
+        activities.append(activity)
 
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
+    result = {
+        "success": True,
+        "data": activities,
+        "timeRange": time_range,
+        "alertLevel": alert_level
+    }
 
-        transactions = response.json()
-
-        activities = []
-        for tx in transactions:
-            if tx.get('amount_usd', 0) > 100000:
-                activity = {
-                    "id": tx.get('signature', ''),
-                    "type": "large_buy" if tx.get('type') == 'SWAP' else "whale_move",
-                    "wallet": tx.get('wallet_address', ''),
-                    "walletName": tx.get('wallet_address', '')[:8] + '...',
-                    "token": tx.get('token_symbol', 'Unknown'),
-                    "tokenSymbol": tx.get('token_symbol', 'UNK'),
-                    "amount": f"{tx.get('amount', 0)} {tx.get('token_symbol', '')}",
-                    "value": f"${tx.get('amount_usd', 0):,.0f}",
-                    "timestamp": tx.get('timestamp', ''),
-                    "confidence": "high" if tx.get('amount_usd', 0) > 500000 else "medium",
-                    "description": "Large transaction detected",
-                    "contractAddress": tx.get('token_address', '')
-                }
-                activities.append(activity)
-
-        if alert_level != 'all':
-            activities = [a for a in activities if a['confidence'] == alert_level]
-
-        result = {
-            "success": True,
-            "data": activities[:50],
-            "timeRange": time_range,
-            "alertLevel": alert_level
-        }
+    return result
 
-        if REDIS_AVAILABLE:
-            cache.setex(cache_key, 180, json.dumps(result))
+@app.route('/api/insider-scan', methods=['GET'])
+def get_insider_scan():
+    try:
+        time_range = request.args.get('timeRange', '1h')
+        time_range = time_range if time_range in TIME_RANGES else '1h'
+        alert_level = request.args.get('alertLevel', 'all').lower()
+        cached = fetch_insider_scan(time_range, alert_level)
 
-        return jsonify(result)
+        return cached_response(cached)
 
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -313,38 +671,125 @@ def get_insider_scan():
             "data": []
         }), 500
 
+def helius_wallet_page(wallet_address, limit, before=None, until=None):
+    # Helius returns transactions newest first; `before` and `until` are exclusive signature cursors
+    params = {
+        'limit': limit
+    }
+    if before:
+        params['before'] = before
+    if until:
+        params['until'] = until
+
+    response = helius_get(f"v0/addresses/{wallet_address}/transactions", params=params)
+    return response.json()
+
+def wallet_tx_payload(wallet_address, transactions, limit, before=None):
+    return {
+        "success": True,
+        "wallet": wallet_address,
+        "data": transactions,
+        "pagination": {
+            "limit": limit,
+            "before": before,
+            "next_before": transactions[-1].get('signature') if transactions else None,
+            "has_more": len(transactions) >= limit
+        }
+    }
+
+@response_cache.cached('wallet_tx', 'wallet_tx_{wallet_address}_{limit}')
+def fetch_wallet_transactions(wallet_address, limit=50):
+    # The newest page is the only one that changes. On refresh only the
+    # transactions after the last known signature are downloaded and merged in
+    previous = response_cache.get_entry(f'wallet_tx_{wallet_address}_{limit}')
+    known = codec.loads(previous[0].body)['data'] if previous else []
+    newest_signature = known[0].get('signature') if known else None
+
+    if newest_signature:
+        newer = helius_wallet_page(wallet_address, limit, until=newest_signature)
+        seen = {tx.get('signature') for tx in newer}
+        transactions = (newer + [tx for tx in known if tx.get('signature') not in seen])[:limit]
+    else:
+        transactions = helius_wallet_page(wallet_address, limit)
+
+    track_wallet_tx_limit(wallet_address, limit)
+    return wallet_tx_payload(wallet_address, transactions, limit)
+
+def track_wallet_tx_limit(wallet_address, limit):
+    # The limits a wallet's newest page is cached under, so a new trade can find wallet_tx_<wallet>_<limit>
+    try:
+        pipe = cache.pipeline(transaction=False)
+        pipe.sadd(f'wallet_tx_limits_{wallet_address}', limit)
+        pipe.expire(f'wallet_tx_limits_{wallet_address}', CACHE_TTLS['wallet_tx'][1])
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        app.logger.warning(f"Wallet tx limit tracking failed for {wallet_address}: {str(e)}")
+
+def wallet_tx_keys(wallets):
+    limits = [[50]] * len(wallets)
+    if wallets:
+        try:
+            pipe = cache.pipeline(transaction=False)
+            for wallet_address in wallets:
+                pipe.smembers(f'wallet_tx_limits_{wallet_address}')
+            limits = pipe.execute()
+        except redis.exceptions.RedisError as e:
+            app.logger.warning(f"Wallet tx limits unavailable: {str(e)}")
+    return [
+        f"wallet_tx_{wallet_address}_{limit}"
+        for wallet_address, wallet_limits in zip(wallets, limits) for limit in wallet_limits
+    ]
+
+@response_cache.cached('wallet_tx_page', 'wallet_tx_{wallet_address}_{limit}_before_{before}')
+def fetch_wallet_transactions_page(wallet_address, before, limit=50):
+    # Everything older than a signature is immutable, so these pages are cached long-term
+    transactions = helius_wallet_page(wallet_address, limit, before=before)
+    return wallet_tx_payload(wallet_address, transactions, limit, before)
+
+def wallet_export_pages(wallet_address, before=None, until=None, since=None):
+    # Walks the wallet's history newest first with the before cursor, down to
+    # the until signature or the since timestamp (epoch seconds). Once rows
+    # have been sent, rate limits are waited out instead of failing part-way
+    started = False
+    while True:
+        for attempt in range(EXPORT_RATE_LIMIT_RETRIES):
+            try:
+                page = helius_wallet_page(wallet_address, WALLET_TX_MAX_LIMIT, before=before, until=until)
+                break
+            except RateLimited as e:
+                if not started or attempt == EXPORT_RATE_LIMIT_RETRIES - 1:
+                    raise
+                time.sleep(e.retry_after)
+        started = True
+
+        rows = page if since is None else [tx for tx in page if (tx.get('timestamp') or 0) >= since]
+        if rows:
+            yield rows
+        if len(page) < WALLET_TX_MAX_LIMIT or len(rows) < len(page):
+            return
+        before = page[-1].get('signature')
+
 @app.route('/api/wallet/<wallet_address>/transactions', methods=['GET'])
 def get_wallet_transactions(wallet_address):
     try:
-        cache_key = f"wallet_tx_{wallet_address}"
+        before = request.args.get('before')
 
-        if REDIS_AVAILABLE:
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                return jsonify(json.loads(cached_data))
+        if request.args.get('format') == 'ndjson':
+            time_range = request.args.get('timeRange')
+            since = time_window_start(time_range, datetime.now(timezone.utc)).timestamp() if time_range else None
+            return ndjson_response(wallet_export_pages(wallet_address, before, request.args.get('until'), since))
 
-        url = f"https://api.helius.xyz/v0/addresses/{wallet_address}/transactions"
-        params = {
-            'api-key': HELIUS_API_KEY,
-            'limit': 50
-        }
+        limit = min(max(int(request.args.get('limit', 50)), 1), WALLET_TX_MAX_LIMIT)
 
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
+        if before:
+            cached = fetch_wallet_transactions_page(wallet_address, before, limit)
+        else:
+            cached = fetch_wallet_transactions(wallet_address, limit)
 
-        transactions = response.json()
-
-        result = {
-            "success": True,
-            "wallet": wallet_address,
-            "data": transactions
-        }
-
-        if REDIS_AVAILABLE:
-            cache.setex(cache_key, 300, json.dumps(result))
-
-        return jsonify(result)
+        return cached_response(cached)
 
+    except RateLimited as e:
+        return rate_limited_response(e, [])
     except requests.exceptions.RequestException as e:
         return jsonify({
             "success": False,
@@ -358,41 +803,99 @@ def get_wallet_transactions(wallet_address):
             "data": []
         }), 500
 
-@app.route('/api/token/<token_address>/price', methods=['GET'])
-def get_token_price(token_address):
-    try:
-        cache_key = f"token_price_{token_address}"
+@response_cache.cached('token_price', 'token_price_{token_address}')
+def fetch_token_price(token_address):
+    params = {
+        'address': token_address,
+        'check_liquidity': 'true'
+    }
 
-        if REDIS_AVAILABLE:
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                return jsonify(json.loads(cached_data))
+    response = birdeye.get('defi/price', params=params)
+    response.raise_for_status()
 
-        headers = {
-            'X-API-KEY': BIRDEYE_API_KEY
-        }
+    price_data = response.json()
 
-        url = f"https://public-api.birdeye.so/defi/price"
+    return token_price_payload(token_address, price_data)
+
+def token_price_payload(token_address, price_data):
+    return {
+        "success": True,
+        "token": token_address,
+        "data": price_data
+    }
+
+def fetch_multi_price(token_addresses):
+    prices = {}
+    for batch in chunked(token_addresses, BIRDEYE_MULTI_PRICE_BATCH):
         params = {
-            'address': token_address,
+            'list_address': ','.join(batch),
             'check_liquidity': 'true'
         }
 
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = birdeye.get('defi/multi_price', params=params)
         response.raise_for_status()
 
-        price_data = response.json()
-
-        result = {
-            "success": True,
-            "token": token_address,
-            "data": price_data
-        }
+        data = response.json().get('data') or {}
+        for token_address in batch:
+            # Unknown mints are cached too, so they don't cost quota on every page view
+            prices[token_address] = token_price_payload(token_address, {
+                "success": True,
+                "data": data.get(token_address)
+            })
+    return prices
+
+def fetch_token_prices(token_addresses):
+    keys = {f"token_price_{address}": address for address in token_addresses}
+    cached = response_cache.fetch_many('token_price', keys, fetch_multi_price)
+
+    # Splice the per-mint cached bodies together instead of decoding them
+    parts = [
+        codec.dumps(address) + b':' + cached[key].body
+        for key, address in keys.items() if key in cached
+    ]
+    body = b'{"success":true,"data":{' + b','.join(parts) + b'}}'
+    return CachedBody(body, content_etag(body))
+
+response_cache.register('fetch_multi_price', fetch_multi_price, batch=True)
+
+WARM_TOP_MINTS = int(os.getenv('WARM_TOP_MINTS', 20))
+
+def top_traded_mints(limit):
+    # Most traded mints of the last hour, from the recent transaction buffer
+    rows = recent_transactions.window(time.time() - 3600, KOL_FEED_MAX_ROWS * 10)
+    counts = Counter(row.get('token_mint') for row in rows or [] if row.get('token_mint'))
+    return [mint for mint, _ in counts.most_common(limit)]
+
+def warm_seeds():
+    # Views kept warm whether or not they rank among the most requested
+    seeds = [fetch_kol_feed_dataset.spec(time_range) for time_range in TIME_RANGES]
+    seeds.append(fetch_transactions.spec('24h', 'all'))
+    seeds.append(fetch_insider_scan.spec('1h', 'all'))
+    seeds.extend(
+        WarmSpec('token_price', f"token_price_{mint}", 'fetch_multi_price', mint)
+        for mint in top_traded_mints(WARM_TOP_MINTS)
+    )
+    return seeds
+
+cache_warmer = CacheWarmer(
+    response_cache,
+    cache_raw,
+    codec,
+    interval=float(os.getenv('WARM_INTERVAL', 15)),
+    top=int(os.getenv('WARM_TOP_KEYS', 50)),
+    min_hits=int(os.getenv('WARM_MIN_HITS', 3)),
+    rate=float(os.getenv('WARM_RATE', 2)),
+    max_per_cycle=int(os.getenv('WARM_MAX_PER_CYCLE', 100)),
+    families=[family.strip() for family in os.getenv('WARM_FAMILIES', '').split(',') if family.strip()],
+    seeds=warm_seeds
+)
 
-        if REDIS_AVAILABLE:
-            cache.setex(cache_key, 60, json.dumps(result))
+@app.route('/api/token/<token_address>/price', methods=['GET'])
+def get_token_price(token_address):
+    try:
+        cached = fetch_token_price(token_address)
 
-        return jsonify(result)
+        return cached_response(cached)
 
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -407,137 +910,660 @@ def get_token_price(token_address):
             "data": {}
         }), 500
 
-@app.route('/api/trader/<wallet_address>', methods=['GET'])
-def get_trader_profile(wallet_address):
+@app.route('/api/tokens/prices', methods=['GET', 'POST'])
+def get_token_prices():
     try:
-        cache_key = f"trader_profile_{wallet_address}"
+        if request.method == 'POST':
+            payload = request.get_json(silent=True) or {}
+            addresses = payload.get('addresses') or []
+            if not isinstance(addresses, list):
+                addresses = []
+        else:
+            addresses = request.args.get('addresses', '').split(',')
 
-        if REDIS_AVAILABLE:
-            cached_data = cache.get(cache_key)
-            if cached_data:
-                return jsonify(json.loads(cached_data))
+        addresses = list(dict.fromkeys(str(a).strip() for a in addresses if str(a).strip()))
 
-        headers = {
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'apikey': SUPABASE_KEY,
-            'Content-Type': 'application/json'
-        }
+        if not addresses:
+            return jsonify({
+                "success": False,
+                "error": "No token addresses provided",
+                "data": {}
+            }), 400
+
+        if len(addresses) > MAX_PRICE_ADDRESSES:
+            return jsonify({
+                "success": False,
+                "error": f"Too many token addresses (max {MAX_PRICE_ADDRESSES})",
+                "data": {}
+            }), 400
+
+        cached = fetch_token_prices(addresses)
+
+        return cached_response(cached)
+
+    except requests.exceptions.RequestException as e:
+        return jsonify({
+            "success": False,
+            "error": f"Failed to fetch token prices: {str(e)}",
+            "data": {}
+        }), 500
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}",
+            "data": {}
+        }), 500
 
-        profile_url = f"{SUPABASE_URL}/rest/v1/kol_profiles"
-        profile_params = {
-            'select': '*',
-            'wallet_address': f'eq.{wallet_address}'
+def wallet_window_stats(wallet_address):
+    # Exact 1h/24h/7d/30d totals from the rolling store in Redis. A wallet that
+    # isn't there yet is backfilled with its last 30 days; after that only rows
+    # created since the last sync (less the overlap) are read, at most once
+    # per sync interval
+    if not wallet_stats.available:
+        return None
+
+    try:
+        stats = wallet_stats.get(wallet_address)
+        if stats is not None and time.time() - stats.checked_at < WALLET_STATS_SYNC_INTERVAL:
+            return stats.windows
+
+        query = (Query('webhook_transactions')
+                 .select(*STATS_TX_COLUMNS)
+                 .eq('from_address', wallet_address)
+                 .order('created_at', desc=False)
+                 .order('transaction_signature', desc=False))
+        if stats is None:
+            window_start = datetime.now(timezone.utc) - timedelta(seconds=max(STATS_WINDOWS.values()))
+            query.gte('block_time', window_start.isoformat())
+        else:
+            query.gte('created_at', wallet_stats.sync_from(stats.synced_at))
+
+        synced_at = datetime.now(timezone.utc).isoformat() if stats is None else stats.synced_at
+        rows = query.execute_all(supabase)
+        if rows:
+            synced_at = max(row['created_at'] for row in rows)
+
+        wallet_stats.add(wallet_address, rows, synced_at=synced_at)
+        return wallet_stats.get(wallet_address).windows
+    except redis.exceptions.RedisError as e:
+        app.logger.warning(f"Wallet stats unavailable for {wallet_address}: {str(e)}")
+        return None
+
+def trader_trade(tx, now_utc):
+    time_diff = now_utc - datetime.fromisoformat(tx['block_time'].replace('Z', '+00:00'))
+    if time_diff.total_seconds() < 60:
+        time_ago = f"{int(time_diff.total_seconds())}s"
+    elif time_diff.total_seconds() < 3600:
+        time_ago = f"{int(time_diff.total_seconds() / 60)}m"
+    elif time_diff.total_seconds() < 86400:
+        time_ago = f"{int(time_diff.total_seconds() / 3600)}h"
+    else:
+        time_ago = f"{int(time_diff.total_seconds() / 86400)}d"
+
+    return {
+        'id': tx['id'],
+        'type': 'buy' if tx.get('transaction_type') in ['SWAP', 'BUY'] else 'sell',
+        'token': tx.get('token_symbol', 'Unknown'),
+        'tokenContract': tx.get('token_mint', ''),
+        'amount': float(tx.get('amount', 0)),
+        'timestamp': tx['block_time'],
+        'timeAgo': time_ago
+    }
+
+@response_cache.cached('trader_profile', 'trader_profile_{wallet_address}')
+def fetch_trader_profile(wallet_address):
+    now_utc = datetime.now(timezone.utc)
+    time_filter = now_utc - timedelta(days=30)
+
+    transactions_query = (Query('webhook_transactions')
+                          .select(*TRADER_TX_COLUMNS)
+                          .eq('from_address', wallet_address)
+                          .gte('block_time', time_filter.isoformat())
+                          .order('block_time')
+                          .limit(100))
+
+    def trader_transactions():
+        rows = recent_transactions.window(time_filter.timestamp(), 100, wallet=wallet_address)
+        if rows is None:
+            return transactions_query.execute(supabase)
+        return project(rows, TRADER_TX_COLUMNS)
+
+    profile = kol_index.get(wallet_address)
+
+    # The profile lookup (only when it isn't indexed yet), the recent trades
+    # and the window stats are independent of each other
+    profiles, transactions, windows = fanout.run([
+        lambda: [profile] if profile is not None else (
+            Query('kol_profiles').select('*').eq('wallet_address', wallet_address).execute(supabase)
+        ),
+        trader_transactions,
+        lambda: wallet_window_stats(wallet_address)
+    ])
+
+    if not profiles:
+        return None
+
+    if profile is None:
+        profile = profiles[0]
+        kol_index.put(profile)
+
+    if windows is None:
+        # Without Redis the windows come from the recent rows, capped at 100
+        windows = summarize(transactions, STATS_WINDOWS, BUY_TYPES)
+
+    recent_trades = [trader_trade(tx, now_utc) for tx in transactions[:20]]
+
+    result = {
+        "success": True,
+        "profile": {
+            "wallet_address": profile['wallet_address'],
+            "name": profile['name'],
+            "avatar_url": profile.get('avatar_url', 'https://images.pexels.com/photos/220453/pexels-photo-220453.jpeg'),
+            "twitter_handle": profile.get('twitter_handle', ''),
+            "bio": profile.get('bio', ''),
+            "total_pnl": float(profile.get('total_pnl', 0)),
+            "total_trades": profile.get('total_trades', 0),
+            "win_rate": float(profile.get('win_rate', 0)),
+            "total_volume": float(profile.get('total_volume', 0)),
+            "followers_count": profile.get('followers_count', 0),
+            "is_verified": profile.get('is_verified', False),
+            "rank": profile.get('rank'),
+            "created_at": profile.get('created_at'),
+            "updated_at": profile.get('updated_at')
+        },
+        "recent_trades": recent_trades,
+        "stats": {
+            "total_transactions": windows['30d']['transactions'],
+            "buy_count": windows['30d']['buy_count'],
+            "sell_count": windows['30d']['sell_count'],
+            "total_volume_30d": windows['30d']['volume'],
+            "windows": windows
         }
+    }
 
-        profile_response = requests.get(profile_url, headers=headers, params=profile_params, timeout=10)
-        profile_response.raise_for_status()
-        profiles = profile_response.json()
+    return result
 
-        if not profiles:
+@app.route('/api/trader/<wallet_address>', methods=['GET'])
+def get_trader_profile(wallet_address):
+    try:
+        cached = fetch_trader_profile(wallet_address)
+
+        if cached is None:
             return jsonify({
                 "success": False,
                 "error": "Trader not found"
             }), 404
 
-        profile = profiles[0]
+        return cached_response(cached)
 
-        now_utc = datetime.now(timezone.utc)
-        time_filter = now_utc - timedelta(days=30)
+    except requests.exceptions.RequestException as e:
+        app.logger.error(f"Trader profile request error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Failed to fetch trader profile: {str(e)}"
+        }), 500
+    except Exception as e:
+        app.logger.error(f"Trader profile error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}"
+        }), 500
 
-        tx_url = f"{SUPABASE_URL}/rest/v1/webhook_transactions"
-        tx_params = {
-            'select': '*',
-            'from_address': f'eq.{wallet_address}',
-            'block_time': f'gte.{time_filter.isoformat()}',
-            'order': 'block_time.desc',
-            'limit': '100'
-        }
+monitored_wallet_state = {'wallets': frozenset(), 'loaded_at': 0}
+
+def monitored_wallets():
+    # monitored_wallets is small and rarely changes, so it is re-read at most once a minute
+    if time.time() - monitored_wallet_state['loaded_at'] >= MONITORED_WALLETS_TTL:
+        try:
+            rows = Query('monitored_wallets').select('wallet_address').execute_all(supabase)
+            monitored_wallet_state['wallets'] = frozenset(row['wallet_address'] for row in rows)
+        except requests.exceptions.RequestException as e:
+            app.logger.warning(f"Monitored wallets refresh failed: {str(e)}")
+        monitored_wallet_state['loaded_at'] = time.time()
+    return monitored_wallet_state['wallets'] | kol_index.wallets()
+
+def token_prices(token_addresses):
+    keys = {f"token_price_{address}": address for address in token_addresses}
+    cached = response_cache.fetch_many('token_price', keys, fetch_multi_price)
+    prices = {}
+    for key, address in keys.items():
+        if key in cached:
+            price_data = codec.loads(cached[key].body)['data'].get('data') or {}
+            prices[address] = price_data.get('value')
+    return prices
+
+def write_transactions(rows):
+    # Runs on the webhook writer thread: price the batch from the shared token
+    # price cache, upsert it in one request, then update the read side with
+    # the rows that were new
+    try:
+        prices = token_prices(sorted({row['token_mint'] for row in rows}))
+    except requests.exceptions.RequestException as e:
+        app.logger.warning(f"Webhook price lookup failed: {str(e)}")
+        prices = {}
+    for row in rows:
+        row['price_usd'] = row['current_token_price'] = prices.get(row['token_mint'])
+
+    # Only rows that were actually inserted come back, with their id and created_at
+    response = supabase.post(
+        'webhook_transactions',
+        params={'on_conflict': 'transaction_signature', 'select': ','.join(recent_transactions.columns)},
+        json=rows,
+        headers={'Prefer': 'resolution=ignore-duplicates,return=representation'}
+    )
+    response.raise_for_status()
+
+    inserted = response.json()
+    if inserted:
+        recent_transactions.add(inserted)
+        on_transactions_written(inserted)
+
+def on_transactions_written(rows):
+    by_wallet = {}
+    for row in rows:
+        by_wallet.setdefault(row['from_address'], []).append(row)
+
+    for wallet_address, wallet_rows in by_wallet.items():
+        if wallet_stats.available:
+            try:
+                wallet_stats.add(wallet_address, wallet_rows)
+            except redis.exceptions.RedisError as e:
+                app.logger.warning(f"Wallet stats update failed for {wallet_address}: {str(e)}")
+
+    # Other workers put the rows in their buffers at once instead of on their
+    # next poll; adding them is what drops the dependent keys (see below)
+    invalidation_bus.publish({"rows": rows})
+
+def time_bucket(timestamp):
+    # The shortest time range reaching back to timestamp; None when it's older than all of them
+    age = time.time() - timestamp
+    for time_range, span in sorted(TIME_RANGES.items(), key=lambda item: item[1]):
+        if age <= span.total_seconds():
+            return time_range
+    return None
+
+def transaction_event(rows):
+    wallets = {row['from_address'] for row in rows if row.get('from_address')}
+    return {
+        "wallets": sorted(wallets),
+        "mints": sorted({row['token_mint'] for row in rows if row.get('token_mint')}),
+        "bucket": time_bucket(max(block_timestamp(row) for row in rows)),
+        "types": sorted({row['transaction_type'].lower() for row in rows if row.get('transaction_type')}),
+        "kol": any(kol_index.get(wallet_address) is not None for wallet_address in wallets),
+        "insider": any(float(row.get('amount_usd') or 0) > INSIDER_MIN_USD for row in rows)
+    }
+
+def dependent_keys(event):
+    keys = [f"trader_profile_{wallet_address}" for wallet_address in event['wallets']]
+    keys += wallet_tx_keys(event['wallets'])
+    bucket = event['bucket']
+    if bucket is not None:
+        time_ranges = [time_range for time_range, span in TIME_RANGES.items() if span >= TIME_RANGES[bucket]]
+        keys += [
+            f"transactions_{time_range}_{tx_type}"
+            for time_range in time_ranges for tx_type in ['all'] + event['types']
+        ]
+        if event['kol']:
+            keys += [f"kol_feed_{time_range}" for time_range in time_ranges]
+        if event['insider']:
+            keys += [
+                f"insider_scan_{time_range}_{alert_level}"
+                for time_range in time_ranges for alert_level in INSIDER_ALERT_BOUNDS
+            ]
+    return keys
+
+def invalidate_dependents(rows):
+    # Runs in every worker for each batch of rows new to its buffer, whoever
+    # wrote them: this worker's webhook writer, another worker over the bus,
+    # or the edge function and sync jobs through the tailer. The rows are
+    # already in the buffer when the keys are dropped, so an entry another
+    # worker rebuilt before it had them is dropped again here and never
+    # outlives the slowest worker
+    response_cache.invalidate(*dependent_keys(transaction_event(rows)))
+
+recent_transactions.listen(invalidate_dependents)
+
+invalidation_bus = InvalidationBus(
+    cache_raw,
+    codec,
+    retry_interval=float(os.getenv('REDIS_RETRY_INTERVAL', 2))
+)
+invalidation_bus.subscribe(lambda event: recent_transactions.add(event['rows']))
+
+@app.before_request
+def start_cache_invalidation():
+    # The listener and tailer have to run in every worker, including ones that never write
+    invalidation_bus.start()
+    recent_transactions.start()
+
+webhook_writer = BatchWriter(
+    write_transactions,
+    max_queue=int(os.getenv('WEBHOOK_QUEUE_SIZE', 10000)),
+    batch_size=int(os.getenv('WEBHOOK_BATCH_SIZE', 200)),
+    flush_interval=float(os.getenv('WEBHOOK_FLUSH_INTERVAL', 0.5))
+)
+
+@app.route('/api/webhook/helius', methods=['POST'])
+def helius_webhook():
+    try:
+        if HELIUS_WEBHOOK_SECRET:
+            secret = request.headers.get('X-Webhook-Secret') or request.headers.get('Authorization')
+            if not hmac.compare_digest((secret or '').encode('utf-8'), HELIUS_WEBHOOK_SECRET.encode('utf-8')):
+                return jsonify({
+                    "success": False,
+                    "error": "Unauthorized"
+                }), 401
+
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, list):
+            return jsonify({
+                "success": False,
+                "error": "Expected a JSON array of Helius enhanced transactions"
+            }), 400
+
+        monitored = monitored_wallets()
+        rows = [row for row in (normalize(tx, monitored) for tx in payload if isinstance(tx, dict)) if row]
+        if rows:
+            webhook_writer.submit(rows)
 
-        tx_response = requests.get(tx_url, headers=headers, params=tx_params, timeout=10)
-        tx_response.raise_for_status()
-        transactions = tx_response.json()
-
-        recent_trades = []
-        for tx in transactions[:20]:
-            time_diff = now_utc - datetime.fromisoformat(tx['block_time'].replace('Z', '+00:00'))
-            if time_diff.total_seconds() < 60:
-                time_ago = f"{int(time_diff.total_seconds())}s"
-            elif time_diff.total_seconds() < 3600:
-                time_ago = f"{int(time_diff.total_seconds() / 60)}m"
-            elif time_diff.total_seconds() < 86400:
-                time_ago = f"{int(time_diff.total_seconds() / 3600)}h"
-            else:
-                time_ago = f"{int(time_diff.total_seconds() / 86400)}d"
-
-            trade = {
-                'id': tx['id'],
-                'type': 'buy' if tx.get('transaction_type') in ['SWAP', 'BUY'] else 'sell',
-                'token': tx.get('token_symbol', 'Unknown'),
-                'tokenContract': tx.get('token_mint', ''),
-                'amount': float(tx.get('amount', 0)),
-                'timestamp': tx['block_time'],
-                'timeAgo': time_ago
-            }
-            recent_trades.append(trade)
-
-        result = {
+        return jsonify({
             "success": True,
-            "profile": {
-                "wallet_address": profile['wallet_address'],
-                "name": profile['name'],
-                "avatar_url": profile.get('avatar_url', 'https://images.pexels.com/photos/220453/pexels-photo-220453.jpeg'),
-                "twitter_handle": profile.get('twitter_handle', ''),
-                "bio": profile.get('bio', ''),
-                "total_pnl": float(profile.get('total_pnl', 0)),
-                "total_trades": profile.get('total_trades', 0),
-                "win_rate": float(profile.get('win_rate', 0)),
-                "total_volume": float(profile.get('total_volume', 0)),
-                "followers_count": profile.get('followers_count', 0),
-                "is_verified": profile.get('is_verified', False),
-                "rank": profile.get('rank'),
-                "created_at": profile.get('created_at'),
-                "updated_at": profile.get('updated_at')
-            },
-            "recent_trades": recent_trades,
-            "stats": {
-                "total_transactions": len(transactions),
-                "buy_count": len([t for t in transactions if t.get('transaction_type') in ['SWAP', 'BUY']]),
-                "sell_count": len([t for t in transactions if t.get('transaction_type') not in ['SWAP', 'BUY']]),
-                "total_volume_30d": sum([float(t.get('amount', 0)) for t in transactions])
-            }
-        }
+            "received": len(payload),
+            "accepted": len(rows)
+        }), 202
 
-        if REDIS_AVAILABLE:
-            cache.setex(cache_key, 300, json.dumps(result))
+    except QueueFull as e:
+        response = jsonify({
+            "success": False,
+            "error": f"Service busy: {str(e)}"
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(int(webhook_writer.flush_interval * 2), 1))
+        return response
+    except Exception as e:
+        app.logger.error(f"Helius webhook error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}"
+        }), 500
+
+def stream_event_key(row):
+    return (int(block_timestamp(row) * 1000), row['transaction_signature'])
+
+def parse_event_id(event_id):
+    # Event ids are "<block time in ms>-<signature>", so they mean the same
+    # thing on every worker and sort in block time order
+    millis, _, signature = (event_id or '').partition('-')
+    try:
+        return (int(millis), signature)
+    except ValueError:
+        return None
+
+def build_stream_events(rows):
+    # One transactions event per new row, plus a KOL feed event when the
+    # wallet is a KOL; each is encoded once and shared by every subscriber
+    now = time.time()
+    events = []
+    for row in sorted(rows, key=stream_event_key):
+        event_id = '%d-%s' % stream_event_key(row)
+        tx_type = (row.get('transaction_type') or '').lower()
+        events.append(StreamEvent(
+            event_id,
+            encode_event('transaction', codec.dumps(project([row], TRANSACTION_COLUMNS)[0]), event_id),
+            ('transactions', f'transactions:{tx_type}')
+        ))
+
+        profile = kol_index.get(row.get('from_address'))
+        if profile is not None:
+            trade = format_kol_trade(kol_trade(row), profile, now)
+            events.append(StreamEvent(
+                event_id,
+                encode_event('trade', codec.dumps(trade), event_id),
+                ('kol', f"kol:{trade['lastTx']}")
+            ))
+    return events
+
+stream_hub = StreamHub(
+    build_stream_events,
+    max_subscribers=int(os.getenv('STREAM_MAX_SUBSCRIBERS', 500)),
+    queue_size=int(os.getenv('STREAM_QUEUE_SIZE', 100))
+)
+recent_transactions.listen(stream_hub.publish)
+
+def replay_frames(last_event_id, tag):
+    # Events after last_event_id, rebuilt from the recent transaction buffer.
+    # None when that isn't possible exactly (unknown id, buffer not current or
+    # not reaching back that far, or too much missed), and a snapshot is sent
+    key = parse_event_id(last_event_id)
+    if key is None:
+        return None
+    rows = recent_transactions.window(key[0] / 1000, STREAM_REPLAY_MAX)
+    if rows is None or len(rows) >= STREAM_REPLAY_MAX:
+        return None
+    rows = [row for row in rows if stream_event_key(row) > key]
+    return [event.frame for event in build_stream_events(rows) if tag in event.tags]
+
+def event_stream(tag, snapshot):
+    # Subscribing before the snapshot is taken means nothing falls in between;
+    # a trade in both arrives twice with the same id
+    recent_transactions.start()
+    subscription = stream_hub.subscribe(tag)
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+        frames = replay_frames(last_event_id, tag) if last_event_id else None
+        if frames is None:
+            frames = [encode_event('snapshot', snapshot().body)]
+    except Exception:
+        stream_hub.unsubscribe(subscription)
+        raise
+
+    def generate():
+        yield b'retry: %d\n\n' % STREAM_RETRY_MS + b''.join(frames)
+        # Streams end after STREAM_MAX_DURATION, or as soon as the hub drops a
+        # subscriber that fell behind; clients reconnect with Last-Event-ID
+        deadline = time.monotonic() + STREAM_MAX_DURATION
+        while time.monotonic() < deadline and not subscription.dropped:
+            pending = subscription.next_frames(STREAM_HEARTBEAT)
+            if pending is None:
+                yield b': keepalive\n\n'
+            elif pending:
+                yield b''.join(pending)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(lambda: stream_hub.unsubscribe(subscription))
+    return response
+
+def stream_busy_response(e):
+    response = jsonify({
+        "success": False,
+        "error": f"Service busy: {str(e)}"
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(STREAM_RETRY_MS // 1000)
+    return response
+
+@app.route('/api/stream/kol-feed', methods=['GET'])
+def stream_kol_feed():
+    try:
+        time_range = request.args.get('timeRange', '24h')
+        tx_type = request.args.get('type', 'all')
+        limit = min(max(int(request.args.get('limit', 50)), 1), KOL_FEED_MAX_ROWS)
+
+        tag = f'kol:{tx_type}' if tx_type in ('buy', 'sell') else 'kol'
+        return event_stream(tag, lambda: kol_feed_view(time_range, tx_type, 'time', limit))
+
+    except StreamBusy as e:
+        return stream_busy_response(e)
+    except Exception as e:
+        app.logger.error(f"KOL feed stream error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}",
+            "data": []
+        }), 500
 
-        return jsonify(result)
+@app.route('/api/stream/transactions', methods=['GET'])
+def stream_transactions():
+    try:
+        time_range, tx_type = transaction_filters(request.args)
+
+        tag = 'transactions' if tx_type == 'all' else f'transactions:{tx_type}'
+        return event_stream(tag, lambda: fetch_transactions(time_range, tx_type))
+
+    except StreamBusy as e:
+        return stream_busy_response(e)
+    except Exception as e:
+        app.logger.error(f"Transactions stream error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}",
+            "data": []
+        }), 500
+
+@app.route('/api/kol-profiles', methods=['GET'])
+def get_kol_profiles():
+    try:
+        wallets = [w for w in request.args.get('wallets', '').split(',') if w]
+
+        kol_index.ensure_loaded()
+        if wallets:
+            profiles = kol_index.get_many(wallets)
+        else:
+            profiles = kol_index.snapshot()
+
+        return jsonify({
+            "success": True,
+            "data": profiles,
+            "count": len(profiles)
+        })
 
     except requests.exceptions.RequestException as e:
-        app.logger.error(f"Trader profile request error: {str(e)}")
+        app.logger.error(f"KOL profiles request error: {str(e)}")
         return jsonify({
             "success": False,
-            "error": f"Failed to fetch trader profile: {str(e)}"
+            "error": f"Failed to fetch KOL profiles: {str(e)}",
+            "data": {}
         }), 500
     except Exception as e:
-        app.logger.error(f"Trader profile error: {str(e)}")
+        app.logger.error(f"KOL profiles error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}",
+            "data": {}
+        }), 500
+
+def admin_denied():
+    if not ADMIN_TOKEN:
+        return jsonify({
+            "success": False,
+            "error": "Admin endpoints are disabled; set ADMIN_TOKEN to enable them"
+        }), 404
+    auth = request.headers.get('Authorization', '')
+    token = auth[len('Bearer '):] if auth.startswith('Bearer ') else request.headers.get('X-Admin-Token')
+    if not admin_token_matches(token):
+        return jsonify({
+            "success": False,
+            "error": "Unauthorized"
+        }), 401
+    return None
+
+@app.route('/api/admin/profiles', methods=['GET', 'DELETE'])
+def list_profiles():
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    try:
+        if request.method == 'DELETE':
+            profiler.clear()
+            return jsonify({"success": True})
+
+        profiles = [
+            {k: v for k, v in record.items() if k != 'stacks'}
+            for record in profiler.records()
+        ]
+        return jsonify({
+            "success": True,
+            "data": profiles,
+            "count": len(profiles),
+            "profiler": profiler.stats()
+        })
+
+    except Exception as e:
+        app.logger.error(f"Profile list error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Internal server error: {str(e)}",
+            "data": []
+        }), 500
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    try:
+        record = profiler.get(profile_id)
+        if record is None:
+            return jsonify({
+                "success": False,
+                "error": "Profile not found"
+            }), 404
+
+        if request.args.get('format') == 'json':
+            return Response(codec.dumps(record), mimetype='application/json')
+
+        # Collapsed stacks, one "frame;frame;frame count" line per stack
+        body = ''.join(f'{stack} {count}\n' for stack, count in record['stacks'].items())
+        response = Response(body, mimetype='text/plain')
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{profile_id}.txt'
+        return response
+
+    except Exception as e:
+        app.logger.error(f"Profile download error: {str(e)}")
         return jsonify({
             "success": False,
             "error": f"Internal server error: {str(e)}"
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    try:
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        app.logger.error(f"Metrics error: {str(e)}")
+        return Response(f"# metrics unavailable: {str(e)}\n", status=503, mimetype='text/plain')
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         "status": "ok",
         "message": "Flask API is running",
-        "redis": "connected" if REDIS_AVAILABLE else "unavailable",
+        "redis": "connected" if redis_guard.available else "unavailable",
+        "redis_health": redis_guard.stats(),
+        "upstreams": {client.name: client.stats() for client in (supabase, helius, birdeye)},
+        "local_cache": local_cache.stats(),
+        "helius_keys": helius_keys.stats(),
+        "webhook_writer": webhook_writer.stats(),
+        "recent_transactions": recent_transactions.stats(),
+        "streams": stream_hub.stats(),
+        "cache_warmer": cache_warmer.stats(),
+        "cache_invalidation": invalidation_bus.stats(),
         "endpoints": {
             "transactions": "/api/transactions",
             "kol_feed": "/api/kol-feed",
             "trader_profile": "/api/trader/<wallet_address>",
+            "kol_profiles": "/api/kol-profiles?wallets=<a,b,c>",
             "insider_scan": "/api/insider-scan",
             "wallet_transactions": "/api/wallet/<address>/transactions",
-            "token_price": "/api/token/<address>/price"
+            "token_price": "/api/token/<address>/price",
+            "token_prices": "/api/tokens/prices?addresses=<a,b,c>",
+            "helius_webhook": "/api/webhook/helius (POST)",
+            "kol_feed_stream": "/api/stream/kol-feed",
+            "transactions_stream": "/api/stream/transactions",
+            "metrics": "/api/metrics",
+            "admin_profiles": "/api/admin/profiles"
         }
     })
 
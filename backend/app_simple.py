@@ -1,26 +1,140 @@
 #!/usr/bin/env python3
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import os
+import sys
 import json
-from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs, parse_qsl
+import requests
+from upstream_sim import FaultInjector, Recording, SyntheticUpstreams, recording_key
+
+# synthetic: generated data sets; record: proxy to the real upstreams and save
+# every response; replay: serve saved responses (misses fall back to synthetic
+# data, or 404 with UPSTREAM_REPLAY_MISS=404)
+UPSTREAM_MODE = os.getenv('UPSTREAM_MODE', 'synthetic')
+UPSTREAM_RECORDING = os.getenv('UPSTREAM_RECORDING', 'upstream_recording.jsonl')
+UPSTREAM_REPLAY_MISS = os.getenv('UPSTREAM_REPLAY_MISS', 'synthetic')
+UPSTREAM_QUIET = os.getenv('UPSTREAM_QUIET', '0') == '1'
+
+UPSTREAM_ROWS = int(os.getenv('UPSTREAM_ROWS', 200))
+UPSTREAM_KOLS = int(os.getenv('UPSTREAM_KOLS', 50))
+UPSTREAM_TOKENS = int(os.getenv('UPSTREAM_TOKENS', 100))
+UPSTREAM_SPAN_DAYS = float(os.getenv('UPSTREAM_SPAN_DAYS', 30))
+UPSTREAM_WALLET_HISTORY = int(os.getenv('UPSTREAM_WALLET_HISTORY', 1000))
+UPSTREAM_SEED = int(os.getenv('UPSTREAM_SEED', 7))
+
+RECORD_TARGETS = {
+    'supabase': os.getenv('RECORD_SUPABASE_URL'),
+    'helius': os.getenv('RECORD_HELIUS_URL', 'https://api.helius.xyz'),
+    'birdeye': os.getenv('RECORD_BIRDEYE_URL', 'https://public-api.birdeye.so')
+}
+FORWARDED_HEADERS = ('Authorization', 'apikey', 'X-API-KEY', 'Content-Type', 'Accept', 'Prefer', 'x-chain')
+
+FAULT_KNOBS = ('latency', 'latency_jitter', 'error_rate', 'rate_limit_rate', 'retry_after', 'key_rps')
+
+
+def fault_settings(environ):
+    # UPSTREAM_<KNOB> applies to every upstream, UPSTREAM_<KNOB>_<UPSTREAM> to one
+    settings = {}
+    for knob in FAULT_KNOBS:
+        for suffix in ('', '_supabase', '_helius', '_birdeye'):
+            value = environ.get(f'UPSTREAM_{knob}{suffix}'.upper())
+            if value:
+                settings[f'{knob}{suffix}'] = float(value)
+    return settings
+
+
+KOL_WALLETS = [
+    ("BCagckXeMChUKrHEd6fKFA1uiWDtcmCXMsqaheLiUPJd", "CryptoWhale"),
+    ("FxN3VZ4BosL5urG2yoeQ156JSdmavm9K5fdLxjkPmaMR", "SmartMoney"),
+    ("DfMxre4cKmvogbLrPigxmibVTTQDuzjdXojWzjCXXhzj", "Whale Trader"),
+    ("GhP4YA5DqQs6vnN3rpeT267KTenbwq0L6geMzlRsXyNu", "DeFi Whale"),
+]
+
+TOKENS = [
+    ("So11111111111111111111111111111111111111112", "SOL"),
+    ("DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263", "BONK"),
+    ("JUPyiwrYJFskUPiHa7hkeR8VUtAeFoSYbKedZNsDvCN", "JUP"),
+]
+
+
+def build_simulator():
+    return SyntheticUpstreams(
+        UPSTREAM_ROWS, max(UPSTREAM_KOLS, len(KOL_WALLETS)), max(UPSTREAM_TOKENS, len(TOKENS)),
+        span_days=UPSTREAM_SPAN_DAYS, wallet_history=UPSTREAM_WALLET_HISTORY,
+        named_wallets=KOL_WALLETS, named_tokens=TOKENS, seed=UPSTREAM_SEED
+    )
+
+
+def build_upstream_data(count=200):
+    # Materialized rows for callers that want plain lists (bench/microbench.py)
+    sim = SyntheticUpstreams(count, len(KOL_WALLETS), len(TOKENS),
+                             named_wallets=KOL_WALLETS, named_tokens=TOKENS)
+    table = sim.tables['webhook_transactions']
+    return {"kol_profiles": sim.profiles, "webhook_transactions": [table.row(i) for i in range(count)]}
+
+
+# Set up by run()
+SIMULATOR = None
+FAULTS = FaultInjector({})
+RECORDING = None
+
+
+def upstream_for(path):
+    if path.startswith('/rest/v1/'):
+        return 'supabase'
+    if path.startswith('/v0/'):
+        return 'helius'
+    if path.startswith('/defi/'):
+        return 'birdeye'
+    return None
+
 
 class APIHandler(BaseHTTPRequestHandler):
-    def _set_headers(self, status=200):
+    # Keep-alive, so the app's pooled upstream sessions reuse connections
+    protocol_version = 'HTTP/1.1'
+
+    def _send_body(self, body, status=200, headers=None):
         self.send_response(status)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        for name, value in (headers or {}).items():
+            if name.lower() not in ('content-type', 'content-length'):
+                self.send_header(name, value)
         self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, obj, status=200, headers=None):
+        self._send_body(json.dumps(obj).encode(), status, headers)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
 
     def do_OPTIONS(self):
-        self._set_headers()
+        self._send_body(b'')
+
+    def do_POST(self):
+        parsed_url = urlparse(self.path)
+        upstream = upstream_for(parsed_url.path)
+        if upstream:
+            self.handle_upstream('POST', upstream, parsed_url)
+        else:
+            self._read_body()
+            self._send_json({"error": "Not found"}, 404)
 
     def do_GET(self):
         parsed_url = urlparse(self.path)
         path = parsed_url.path
         params = parse_qs(parsed_url.query)
 
-        if path == '/api/transactions':
+        upstream = upstream_for(path)
+        if upstream:
+            self.handle_upstream('GET', upstream, parsed_url)
+        elif path == '/api/transactions':
             self.handle_transactions(params)
         elif path == '/api/kol-feed':
             self.handle_kol_feed(params)
@@ -29,8 +143,56 @@ class APIHandler(BaseHTTPRequestHandler):
         elif path == '/api/health':
             self.handle_health()
         else:
-            self._set_headers(404)
-            self.wfile.write(json.dumps({"error": "Not found"}).encode())
+            self._send_json({"error": "Not found"}, 404)
+
+    def handle_upstream(self, method, upstream, parsed_url):
+        body = self._read_body() if method == 'POST' else b''
+        key = recording_key(method, parsed_url.path, parsed_url.query)
+
+        # Writes are never forwarded, so recording against production is read-only
+        if UPSTREAM_MODE == 'record' and method == 'GET':
+            return self.proxy_and_record(upstream, parsed_url, key)
+
+        api_key = (parse_qs(parsed_url.query).get('api-key', [None])[0]
+                   or self.headers.get('apikey') or self.headers.get('X-API-KEY'))
+        fault = FAULTS.apply(upstream, api_key)
+        if fault:
+            status, headers, payload = fault
+            return self._send_json(payload, status, headers)
+
+        if UPSTREAM_MODE == 'replay' and method == 'GET':
+            entry = RECORDING.get(key)
+            if entry is not None:
+                return self._send_body(entry['body'].encode('utf-8'), entry['status'], entry['headers'])
+            if UPSTREAM_REPLAY_MISS == '404':
+                return self._send_json({"message": f"Not recorded: {key}"}, 404)
+
+        if upstream == 'supabase':
+            self.handle_supabase(method, parsed_url.path[len('/rest/v1/'):], parsed_url.query, body)
+        elif upstream == 'helius' and parsed_url.path.startswith('/v0/addresses/'):
+            self.handle_helius_transactions(parsed_url.path.split('/')[3], parse_qs(parsed_url.query))
+        elif parsed_url.path == '/defi/price':
+            self.handle_birdeye_price(parse_qs(parsed_url.query))
+        elif parsed_url.path == '/defi/multi_price':
+            self.handle_birdeye_multi_price(parse_qs(parsed_url.query))
+        else:
+            self._send_json({"error": "Not found"}, 404)
+
+    def proxy_and_record(self, upstream, parsed_url, key):
+        target = RECORD_TARGETS[upstream]
+        if not target:
+            return self._send_json({"message": f"RECORD_{upstream.upper()}_URL is not set"}, 502)
+        try:
+            response = requests.get(
+                target.rstrip('/') + parsed_url.path + (f'?{parsed_url.query}' if parsed_url.query else ''),
+                headers={name: self.headers[name] for name in FORWARDED_HEADERS if self.headers.get(name)},
+                timeout=30
+            )
+        except requests.exceptions.RequestException as e:
+            return self._send_json({"message": f"Upstream unreachable: {str(e)}"}, 502)
+
+        entry = RECORDING.add(key, response.status_code, response.headers, response.content)
+        self._send_body(response.content, response.status_code, entry['headers'])
 
     def handle_transactions(self, params):
         time_range = params.get('timeRange', ['24h'])[0]
@@ -105,8 +267,7 @@ class APIHandler(BaseHTTPRequestHandler):
             "type": tx_type
         }
 
-        self._set_headers()
-        self.wfile.write(json.dumps(response).encode())
+        self._send_json(response)
 
     def handle_kol_feed(self, params):
         time_range = params.get('timeRange', ['24h'])[0]
@@ -150,8 +311,7 @@ class APIHandler(BaseHTTPRequestHandler):
             "timeRange": time_range
         }
 
-        self._set_headers()
-        self.wfile.write(json.dumps(response).encode())
+        self._send_json(response)
 
     def handle_insider_scan(self, params):
         time_range = params.get('timeRange', ['1h'])[0]
@@ -198,30 +358,74 @@ class APIHandler(BaseHTTPRequestHandler):
             "alertLevel": alert_level
         }
 
-        self._set_headers()
-        self.wfile.write(json.dumps(response).encode())
+        self._send_json(response)
+
+    def handle_supabase(self, method, table, query, body):
+        if method == 'POST':
+            # Upserts are accepted and echoed like return=representation, but not stored
+            rows = json.loads(body or b'[]')
+            rows = rows if isinstance(rows, list) else [rows]
+            if 'return=representation' not in (self.headers.get('Prefer') or ''):
+                return self._send_body(b'', 201)
+            now = datetime.now(timezone.utc).isoformat()
+            return self._send_json(
+                [dict(row, id=row.get('id') or row.get('transaction_signature'), created_at=now) for row in rows], 201
+            )
+
+        status, payload = SIMULATOR.supabase(table, parse_qsl(query, keep_blank_values=True))
+        self._send_json(payload, status)
+
+    def handle_helius_transactions(self, address, params):
+        self._send_json(SIMULATOR.helius_transactions(address, {k: v[0] for k, v in params.items()}))
+
+    def handle_birdeye_price(self, params):
+        address = params.get('address', [''])[0]
+        self._send_json({"success": True, "data": SIMULATOR.price(address)})
+
+    def handle_birdeye_multi_price(self, params):
+        addresses = [a for a in params.get('list_address', [''])[0].split(',') if a]
+        self._send_json({"success": True, "data": {address: SIMULATOR.price(address) for address in addresses}})
 
     def handle_health(self):
         response = {
             "status": "ok",
             "message": "Python HTTP Server is running"
         }
-        self._set_headers()
-        self.wfile.write(json.dumps(response).encode())
+        self._send_json(response)
 
     def log_message(self, format, *args):
-        print(f"[{self.log_date_time_string()}] {format % args}")
+        if not UPSTREAM_QUIET:
+            print(f"[{self.log_date_time_string()}] {format % args}")
+
+class SimulatorServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+
 
 def run(port=5000):
+    global SIMULATOR, FAULTS, RECORDING
+    SIMULATOR = build_simulator()
+    FAULTS = FaultInjector(fault_settings(os.environ))
+    if UPSTREAM_MODE in ('record', 'replay'):
+        RECORDING = Recording(UPSTREAM_RECORDING)
+        if UPSTREAM_MODE == 'replay':
+            RECORDING.load()
+
     server_address = ('', port)
-    httpd = HTTPServer(server_address, APIHandler)
+    httpd = SimulatorServer(server_address, APIHandler)
     print(f'🚀 Server running on http://localhost:{port}')
     print(f'📡 API endpoints available:')
     print(f'   GET http://localhost:{port}/api/transactions')
     print(f'   GET http://localhost:{port}/api/kol-feed')
     print(f'   GET http://localhost:{port}/api/insider-scan')
     print(f'   GET http://localhost:{port}/api/health')
+    print(f'🔌 Upstream stand-ins ({UPSTREAM_MODE}; {UPSTREAM_ROWS} transactions, '
+          f'{len(SIMULATOR.profiles)} KOLs, faults {FAULTS.settings or "off"}):')
+    if RECORDING is not None:
+        print(f'   recording: {UPSTREAM_RECORDING} ({len(RECORDING)} responses)')
+    print(f'   VITE_SUPABASE_URL=http://localhost:{port}')
+    print(f'   HELIUS_API_URL=http://localhost:{port}')
+    print(f'   BIRDEYE_API_URL=http://localhost:{port}')
     httpd.serve_forever()
 
 if __name__ == '__main__':
-    run()
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv('PORT', 5000)))
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Offline load test for app.py.
+
+Starts app_simple.py as the Supabase/Helius/Birdeye stand-in and app.py under
+gunicorn, then drives each endpoint at a fixed concurrency, first against a
+freshly started server (cold cache) and then again (warm cache). Reports
+latency percentiles, throughput, errors and peak server RSS per run.
+
+    python3 bench/loadtest.py --latency 0.2 --rows 5000 --concurrency 32
+    python3 bench/loadtest.py --json results.json --baseline baseline.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app_simple import KOL_WALLETS, TOKENS
+
+WALLETS = [wallet for wallet, _ in KOL_WALLETS]
+MINTS = [mint for mint, _ in TOKENS]
+
+ENDPOINTS = {
+    'health': ['/api/health'],
+    'transactions': [f'/api/transactions?timeRange={r}&type={t}' for r in ('24h', '7d') for t in ('all', 'buy')],
+    'kol_feed': [f'/api/kol-feed?timeRange={r}&sortBy={s}' for r in ('24h', '7d') for s in ('time', 'pnl')],
+    'insider_scan': ['/api/insider-scan?timeRange=24h', '/api/insider-scan?timeRange=7d&alertLevel=high'],
+    'trader_profile': [f'/api/trader/{wallet}' for wallet in WALLETS],
+    'wallet_transactions': [f'/api/wallet/{wallet}/transactions?limit=50' for wallet in WALLETS],
+    'token_price': [f'/api/token/{mint}/price' for mint in MINTS],
+    'token_prices': [f"/api/tokens/prices?addresses={','.join(MINTS)}"]
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def process_tree_rss(pid):
+    # Resident memory of a process and all of its descendants, in bytes (Linux only)
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+class RssSampler:
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            if self._stop.wait(self.interval):
+                return
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def drive(base_url, paths, total, concurrency, timeout):
+    # total requests spread round-robin over paths, concurrency at a time
+    local = threading.local()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            status = session.get(base_url + paths[i % len(paths)], timeout=timeout).status_code
+        except requests.exceptions.RequestException:
+            status = 0
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status == 0 or status >= 500)
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+
+class Servers:
+    # The upstream stand-in lives for the whole run; the app is restarted
+    # before each endpoint so its cold run starts with empty in-process caches
+    def __init__(self, args):
+        self.args = args
+        self.upstream_port = free_port()
+        self.app_port = free_port()
+        self.upstream = None
+        self.app = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.app_port}'
+
+    def start_upstream(self):
+        env = dict(os.environ,
+                   UPSTREAM_QUIET='1',
+                   UPSTREAM_LATENCY=str(self.args.latency),
+                   UPSTREAM_ERROR_RATE=str(self.args.error_rate),
+                   UPSTREAM_ROWS=str(self.args.rows))
+        self.upstream = subprocess.Popen(
+            [sys.executable, os.path.join(BACKEND_DIR, 'app_simple.py'), str(self.upstream_port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        wait_until_up(f'http://127.0.0.1:{self.upstream_port}/api/health')
+
+    def start_app(self):
+        upstream_url = f'http://127.0.0.1:{self.upstream_port}'
+        env = dict(os.environ,
+                   VITE_SUPABASE_URL=upstream_url,
+                   HELIUS_API_URL=upstream_url,
+                   BIRDEYE_API_URL=upstream_url,
+                   GUNICORN_WORKER_CLASS=self.args.worker_class,
+                   GUNICORN_WORKERS=str(self.args.workers),
+                   REDIS_DB=str(self.args.redis_db))
+        env.setdefault('VITE_HELIUS_API_KEY_1', 'bench')
+        self.app = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py',
+             '--bind', f'127.0.0.1:{self.app_port}',
+             '--pid', f'/tmp/bench_gunicorn_{self.app_port}.pid',
+             '--access-logfile', '/dev/null',
+             '--error-logfile', '/tmp/bench_gunicorn_error.log',
+             'app:app'],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        wait_until_up(f'{self.base_url}/api/health')
+
+    def stop_app(self):
+        if self.app is not None:
+            self.app.terminate()
+            self.app.wait(timeout=30)
+            self.app = None
+
+    def flush_redis(self):
+        # Entries left in the app's database would make the cold run warm.
+        # Only that database is ever flushed, and only when asked to; skipped
+        # when Redis isn't running
+        try:
+            import redis
+            client = redis.Redis(host=os.getenv('REDIS_HOST', 'localhost'), port=int(os.getenv('REDIS_PORT', 6379)),
+                                 db=self.args.redis_db, socket_connect_timeout=1)
+            if self.args.flush_redis:
+                client.flushdb()
+            elif client.dbsize():
+                print(f"note: Redis db {self.args.redis_db} holds {client.dbsize()} keys; "
+                      f"cold runs may hit them (--flush-redis empties it)")
+        except Exception:
+            pass
+
+    def stop(self):
+        self.stop_app()
+        if self.upstream is not None:
+            self.upstream.terminate()
+            self.upstream.wait(timeout=10)
+
+
+def compare(results, baseline, tolerance):
+    # Regressions are runs whose p95 or throughput is worse than the baseline by more than tolerance
+    regressions = []
+    for name, phases in results.items():
+        for phase, current in phases.items():
+            previous = baseline.get(name, {}).get(phase)
+            if not previous:
+                continue
+            if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}/{phase}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+            if current['throughput'] < previous['throughput'] * (1 - tolerance):
+                regressions.append(f"{name}/{phase}: throughput {previous['throughput']} -> {current['throughput']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma separated, from: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint per phase')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--timeout', type=float, default=30, help='client timeout per request in seconds')
+    parser.add_argument('--latency', type=float, default=0.05, help='upstream latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of upstream calls answered with 503')
+    parser.add_argument('--rows', type=int, default=2000, help='webhook_transactions rows in the stand-in')
+    parser.add_argument('--worker-class', default='gevent', choices=('sync', 'gevent'))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--redis-db', type=int, default=15, help='database on the local Redis for the app under test')
+    parser.add_argument('--flush-redis', action='store_true', help='FLUSHDB --redis-db before each cold run')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='earlier --json output to compare against; exits 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown against --baseline')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+
+    print(f"upstream latency {args.latency}s, error rate {args.error_rate}, {args.rows} rows; "
+          f"{args.workers} {args.worker_class} workers; {args.requests} requests at concurrency {args.concurrency}")
+    print(f"{'endpoint':<22}{'phase':<6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}{'RSS MB':>9}")
+
+    servers = Servers(args)
+    results = {}
+    try:
+        servers.start_upstream()
+        for name in names:
+            servers.stop_app()
+            servers.flush_redis()
+            servers.start_app()
+            results[name] = {}
+            for phase in ('cold', 'warm'):
+                with RssSampler(servers.app.pid) as rss:
+                    run = drive(servers.base_url, ENDPOINTS[name], args.requests, args.concurrency, args.timeout)
+                run['rss_mb'] = round(rss.peak / 1024 / 1024, 1)
+                results[name][phase] = run
+                print(f"{name:<22}{phase:<6}{run['throughput']:>9}{run['p50_ms']:>10}{run['p95_ms']:>10}"
+                      f"{run['p99_ms']:>10}{run['max_ms']:>10}{run['errors']:>8}{run['rss_mb']:>9}")
+    finally:
+        servers.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
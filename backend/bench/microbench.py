@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the per-row transforms behind /api/kol-feed and /api/trader.
+
+Imports app.py with its upstreams pointed at a closed port, so nothing leaves
+the machine, and times the pure functions on synthetic rows from app_simple.
+
+    python3 bench/microbench.py --rows 5000
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+for name in ('VITE_SUPABASE_URL', 'HELIUS_API_URL', 'BIRDEYE_API_URL'):
+    os.environ.setdefault(name, 'http://127.0.0.1:9')
+
+from app_simple import build_upstream_data
+
+
+def load_app():
+    # app.py prints its startup checks; keep the report readable
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        import app
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return app
+
+
+def bench(func, rows, repeat):
+    # Best of repeat runs, reported per row
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return {
+        "total_ms": round(best * 1000, 3),
+        "per_row_us": round(best / max(rows, 1) * 1e6, 3),
+        "rows_per_s": round(rows / best) if best else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    app = load_app()
+    data = build_upstream_data(args.rows)
+    transactions = data['webhook_transactions']
+    for profile in data['kol_profiles']:
+        app.kol_index.put(profile)
+
+    now = time.time()
+    now_utc = datetime.now(timezone.utc)
+    trades = [app.kol_trade(tx) for tx in transactions]
+    dataset = {"trades": trades, "built_at": now_utc.isoformat()}
+    profiles = {profile['wallet_address']: profile for profile in data['kol_profiles']}
+    feed = app.render_kol_feed(dataset, '24h', 'all', 'time', 50, now)
+    trader_rows = app.project(transactions, app.TRADER_TX_COLUMNS)
+
+    cases = {
+        # kol_feed: dataset build (per row), then per-request render and encode
+        'kol_feed.kol_trade': (lambda: [app.kol_trade(tx) for tx in transactions], len(transactions)),
+        'kol_feed.encode_dataset': (lambda: app.codec.dumps(dataset), len(trades)),
+        'kol_feed.decode_dataset': (lambda: app.codec.loads(app.codec.dumps(dataset)), len(trades)),
+        'kol_feed.format_kol_trade': (
+            lambda: [app.format_kol_trade(t, profiles[t['wallet']], now) for t in trades], len(trades)
+        ),
+        'kol_feed.render_50': (lambda: app.render_kol_feed(dataset, '24h', 'all', 'time', 50, now), len(trades)),
+        'kol_feed.render_50_by_pnl': (lambda: app.render_kol_feed(dataset, '24h', 'buy', 'pnl', 50, now), len(trades)),
+        'kol_feed.encode_page': (lambda: app.codec.dumps(feed), len(feed['data'])),
+        # trader_profile: recent trade formatting and the window stats fallback
+        'trader.trader_trade': (lambda: [app.trader_trade(tx, now_utc) for tx in trader_rows], len(trader_rows)),
+        'trader.summarize': (
+            lambda: app.summarize(transactions, app.STATS_WINDOWS, app.BUY_TYPES, now), len(transactions)
+        ),
+        'trader.project': (lambda: app.project(transactions, app.TRADER_TX_COLUMNS), len(transactions))
+    }
+
+    print(f"{args.rows} rows, best of {args.repeat}, codec {app.codec.name}")
+    print(f"{'case':<30}{'total ms':>12}{'us/row':>10}{'rows/s':>12}")
+    results = {}
+    for name, (func, rows) in cases.items():
+        result = results[name] = bench(func, rows, args.repeat)
+        print(f"{name:<30}{result['total_ms']:>12}{result['per_row_us']:>10}{result['rows_per_s']:>12}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
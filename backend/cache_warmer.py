@@ -0,0 +1,219 @@
+import time
+import uuid
+import logging
+import threading
+from collections import Counter
+from redis.exceptions import RedisError
+from response_cache import WarmSpec
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+BATCH_SIZE = 100
+
+
+class CacheWarmer:
+    def __init__(self, cache, redis_client, codec, interval=15, top=50, min_hits=3, rate=2,
+                 max_per_cycle=100, lead_time=None, decay_interval=600, max_keys=1000,
+                 families=None, seeds=None, prefix='warm:'):
+        # Every worker counts which cache entries requests ask for and adds
+        # the counts to a Redis sorted set every interval seconds. One worker,
+        # holding a leader lock in Redis, recomputes the top entries (plus
+        # seeds(), a list of WarmSpec for the default views) that are missing
+        # or whose soft TTL ends within lead_time, at most rate recomputes
+        # per second and max_per_cycle per cycle
+        self.cache = cache
+        self.redis = redis_client
+        self.codec = codec
+        self.interval = interval
+        self.top = top
+        self.min_hits = min_hits
+        self.rate = rate
+        self.max_per_cycle = max_per_cycle
+        self.lead_time = lead_time if lead_time is not None else interval * 2
+        self.decay_interval = decay_interval
+        self.max_keys = max_keys
+        self.families = set(families) if families else None
+        self.seeds = seeds
+        self.hits_key = f'{prefix}hits'
+        self.specs_key = f'{prefix}specs'
+        self.leader_key = f'{prefix}leader'
+        self._renew = redis_client.register_script(RENEW_SCRIPT) if redis_client is not None else None
+        self._token = uuid.uuid4().hex
+        self._counts = Counter()
+        self._specs = {}
+        self._flushed = set()
+        self._lock = threading.Lock()
+        self._started = PerProcess(self._start)
+        self._decayed_at = time.monotonic()
+        self.leader = False
+        self.warmed = 0
+        self.failed = 0
+        self.last_cycle = None
+        cache.access_log = self.record
+
+    def record(self, spec):
+        if self.redis is None or (self.families is not None and spec.family not in self.families):
+            return
+        self.start()
+        with self._lock:
+            self._counts[spec.key] += 1
+            if spec.key not in self._flushed:
+                self._specs[spec.key] = spec
+
+    def start(self):
+        self._started.get()
+
+    def _start(self):
+        # Each worker gets its own warmer thread and leader token; counts
+        # inherited from the master belong to the master
+        with self._lock:
+            self._token = uuid.uuid4().hex
+            self._counts = Counter()
+            self._specs = {}
+            self._flushed = set()
+            self.leader = False
+        threading.Thread(target=self._run, name='cache-warmer', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+                if self._lead():
+                    self.warm()
+            except RedisError as e:
+                logger.warning(f"Cache warmer cycle failed: {str(e)}")
+            except Exception as e:
+                logger.error(f"Cache warmer error: {str(e)}")
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            specs, self._specs = self._specs, {}
+        if not counts and not specs:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, count in counts.items():
+                pipe.zincrby(self.hits_key, count, key)
+            for key, spec in specs.items():
+                pipe.hset(self.specs_key, key, self.codec.dumps(spec._asdict()))
+            pipe.execute()
+        except RedisError:
+            with self._lock:
+                self._counts.update(counts)
+                self._specs.update(specs)
+            raise
+        with self._lock:
+            if len(self._flushed) > self.max_keys * 10:
+                self._flushed = set()
+            self._flushed.update(specs)
+
+    def _lead(self):
+        ttl_ms = int(self.interval * 3 * 1000)
+        if self.leader and self._renew(keys=[self.leader_key], args=[self._token, ttl_ms]):
+            return True
+        self.leader = bool(self.redis.set(self.leader_key, self._token, nx=True, px=ttl_ms))
+        return self.leader
+
+    def _decay(self):
+        # Halves every count now and then, so the ranking follows current traffic,
+        # and forgets entries outside the max_keys most requested
+        if time.monotonic() - self._decayed_at < self.decay_interval:
+            return
+        self._decayed_at = time.monotonic()
+        self.redis.zunionstore(self.hits_key, {self.hits_key: 0.5})
+        dropped = self.redis.zrange(self.hits_key, 0, -self.max_keys - 1)
+        dropped += self.redis.zrangebyscore(self.hits_key, '-inf', '(0.5')
+        if dropped:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrem(self.hits_key, *dropped)
+            pipe.hdel(self.specs_key, *dropped)
+            pipe.execute()
+
+    def candidates(self):
+        specs = {spec.key: spec for spec in (self.seeds() if self.seeds else [])}
+        hot = [
+            key.decode() if isinstance(key, bytes) else key
+            for key in self.redis.zrevrangebyscore(self.hits_key, '+inf', self.min_hits, start=0, num=self.top)
+        ]
+        hot = [key for key in hot if key not in specs]
+        if hot:
+            for key, raw in zip(hot, self.redis.hmget(self.specs_key, hot)):
+                if raw:
+                    specs[key] = WarmSpec(**self.codec.loads(raw))
+        return [
+            spec for spec in specs.values()
+            if spec.compute in self.cache.computes and (self.families is None or spec.family in self.families)
+        ]
+
+    def warm(self):
+        started = time.monotonic()
+        self._decay()
+        candidates = self.candidates()
+        expiries = self.cache.soft_expires([spec.key for spec in candidates])
+        due_by = time.time() + self.lead_time
+        due = [spec for spec in candidates if expiries.get(spec.key) is None or expiries[spec.key] < due_by]
+
+        # Batch computes (e.g. multi-mint price lookups) cost one call per BATCH_SIZE entries
+        jobs = []
+        batches = {}
+        for spec in due:
+            if self.cache.computes[spec.compute][1]:
+                batches.setdefault((spec.family, spec.compute), {})[spec.key] = spec.ident
+            else:
+                jobs.append((spec.family, spec.compute, {spec.key: spec.ident}))
+        for (family, name), keys in batches.items():
+            items = list(keys.items())
+            for i in range(0, len(items), BATCH_SIZE):
+                jobs.append((family, name, dict(items[i:i + BATCH_SIZE])))
+
+        # Stops well before the leader lock (interval * 3) could expire; the rest waits for the next cycle
+        warmed = failed = done = 0
+        for family, name, keys in jobs[:self.max_per_cycle]:
+            if time.monotonic() - started > self.interval * 2:
+                break
+            done += 1
+            try:
+                self._recompute(family, name, keys)
+                warmed += len(keys)
+            except Exception as e:
+                failed += len(keys)
+                logger.warning(f"Cache warm failed for {next(iter(keys))}: {str(e)}")
+            time.sleep(1 / self.rate)
+
+        self.warmed += warmed
+        self.failed += failed
+        self.last_cycle = {
+            "at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "candidates": len(candidates),
+            "due": len(due),
+            "warmed": warmed,
+            "failed": failed,
+            "skipped": len(jobs) - done,
+            "seconds": round(time.monotonic() - started, 3)
+        }
+
+    def _recompute(self, family, name, keys):
+        compute, batch = self.cache.computes[name]
+        if batch:
+            self.cache.refresh_many(family, keys, compute)
+            return
+        for key, ident in keys.items():
+            self.cache.refresh(family, key, lambda: compute(**ident))
+
+    def stats(self):
+        return {
+            "leader": self.leader,
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "last_cycle": self.last_cycle
+        }
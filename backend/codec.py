@@ -0,0 +1,46 @@
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = 'orjson'
+
+    def __init__(self):
+        self._fallback = JsonCodec()
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson rejects integers wider than 64 bits and a few other edge cases
+            return self._fallback.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def get_codec(name=None):
+    name = (name or os.getenv('JSON_CODEC') or ('orjson' if orjson else 'json')).lower()
+    if name == 'orjson':
+        if orjson is None:
+            print("✗ orjson not installed, falling back to json codec")
+            return JsonCodec()
+        return OrjsonCodec()
+    if name == 'json':
+        return JsonCodec()
+    raise ValueError(f"Unknown JSON codec: {name}")
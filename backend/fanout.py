@@ -0,0 +1,48 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+import requests
+from per_process import PerProcess
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    pass
+
+
+class FanOut:
+    def __init__(self, max_workers=16, timeout=10):
+        # One bounded executor per worker process, shared by all requests;
+        # timeout is the default deadline for a whole fan-out
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = PerProcess(
+            lambda: ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fanout')
+        )
+
+    def run(self, calls, timeout=None):
+        # Runs independent zero-argument calls concurrently and returns their
+        # results in order. The first failure is raised as soon as it happens;
+        # calls that have not started by then (or by the deadline) are cancelled.
+        # Calls already in flight can't be interrupted and finish in the background.
+        calls = list(calls)
+        if len(calls) <= 1:
+            return [call() for call in calls]
+
+        timeout = self.timeout if timeout is None else timeout
+        # Each call runs in a copy of the caller's context, so per-request
+        # state such as metrics phase timings follows it onto the pool thread
+        pool = self._executor.get()
+        futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+        done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+
+        if pending:
+            for future in pending:
+                future.cancel()
+            for future in futures:
+                if future in done and future.exception() is not None:
+                    raise future.exception()
+            raise DeadlineExceeded(f"{len(pending)} of {len(calls)} upstream calls unfinished after {timeout}s")
+
+        return [future.result() for future in futures]
+
+    def map(self, func, items, timeout=None):
+        return self.run([lambda item=item: func(item) for item in items], timeout=timeout)
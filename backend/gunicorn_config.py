@@ -1,9 +1,28 @@
+import os
 import multiprocessing
 
 bind = "0.0.0.0:5000"
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+
+if worker_class == 'gevent':
+    # Patch before preload_app imports the app so requests, redis and the
+    # background threads all cooperate with the event loop
+    from gevent import monkey
+    monkey.patch_all()
+
+    workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+    os.environ.setdefault('UPSTREAM_POOL_SIZE', os.getenv('GEVENT_UPSTREAM_POOL_SIZE', '200'))
+else:
+    workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+    worker_connections = 1000
+    # A sync worker is tied up for the whole of a stream, so keep streams
+    # well inside the worker timeout
+    os.environ.setdefault('STREAM_MAX_DURATION', '60')
+    # ...and by default refuse streams with a 503 rather than let open
+    # EventSource clients take every worker away from the REST endpoints
+    os.environ.setdefault('STREAM_MAX_SUBSCRIBERS', '0')
+
 timeout = 120
 keepalive = 5
 
@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+from redis.exceptions import RedisError
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    def __init__(self, redis_client, codec, channel='cache:invalidate', retry_interval=2):
+        # Carries change events between workers over Redis pub/sub. Every
+        # worker, the publisher included, hands each event to the handlers
+        # registered with subscribe() on its own listener thread. Delivery is
+        # at most once: events sent while a worker is disconnected are lost,
+        # so cache TTLs stay the fallback
+        self.redis = redis_client
+        self.codec = codec
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self._handlers = []
+        self._started = PerProcess(self._start)
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.failed = 0
+
+    def subscribe(self, handler):
+        # handler(event) runs on the listener thread and must not block for long
+        self._handlers.append(handler)
+
+    def start(self):
+        # One listener thread per worker
+        if self.redis is not None:
+            self._started.get()
+
+    def _start(self):
+        threading.Thread(target=self._run, name='cache-invalidation', daemon=True).start()
+
+    def publish(self, event):
+        # False when the event couldn't be sent (no Redis, or no listener of
+        # this worker connected yet)
+        self.start()
+        if self.redis is None:
+            return False
+        try:
+            receivers = self.redis.publish(self.channel, self.codec.dumps(event))
+        except RedisError as e:
+            logger.warning(f"Invalidation publish failed: {str(e)}")
+            return False
+        self.published += 1
+        return self.connected and receivers > 0
+
+    def _run(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.connected = True
+                while True:
+                    # Shorter than the client's socket timeout, so an idle channel isn't an error
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._dispatch(message['data'])
+            except RedisError as e:
+                logger.warning(f"Invalidation listener disconnected: {str(e)}")
+            finally:
+                self.connected = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except RedisError:
+                        pass
+            time.sleep(self.retry_interval)
+
+    def _dispatch(self, data):
+        self.received += 1
+        try:
+            event = self.codec.loads(data)
+        except ValueError as e:
+            self.failed += 1
+            logger.warning(f"Invalid invalidation event: {str(e)}")
+            return
+        self.apply(event)
+
+    def apply(self, event):
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Invalidation handler error: {str(e)}")
+
+    def stats(self):
+        return {
+            "channel": self.channel,
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "failed": self.failed
+        }
@@ -0,0 +1,115 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class RateLimited(Exception):
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value, default):
+    if not value:
+        return default
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+class ApiKey:
+    def __init__(self, name, value, rate, burst):
+        self.name = name
+        self.value = value
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.cooldown_until = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available_in(self, now):
+        wait = max(self.cooldown_until - now, 0)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+
+class KeyPool:
+    def __init__(self, keys, rate=10, burst=None, cooldown=5):
+        # keys: iterable of (name, value); empty values are skipped.
+        # rate and burst are per key, per worker process.
+        self.cooldown = cooldown
+        self.keys = [ApiKey(name, value, rate, burst or rate) for name, value in keys if value]
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=2):
+        if not self.keys:
+            raise RateLimited("No API keys configured", retry_after=60)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                best = None
+                for key in self.keys:
+                    key.refill(now)
+                    if key.cooldown_until > now or key.tokens < 1:
+                        continue
+                    if best is None or key.tokens > best.tokens:
+                        best = key
+                if best is not None:
+                    best.tokens -= 1
+                    best.requests += 1
+                    return best
+                wait = min(key.available_in(now) for key in self.keys)
+
+            if now + wait > deadline:
+                raise RateLimited("All API keys are rate limited", retry_after=max(wait, 1))
+            time.sleep(wait)
+
+    def report(self, key, status_code, retry_after=None):
+        with self._lock:
+            if status_code == 429:
+                key.throttled += 1
+                key.tokens = 0
+                key.cooldown_until = time.monotonic() + parse_retry_after(retry_after, self.cooldown)
+            elif status_code >= 500:
+                key.errors += 1
+
+    def retry_after(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in self.keys:
+                key.refill(now)
+            waits = [key.available_in(now) for key in self.keys]
+        return max(min(waits, default=1), 1)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for key in self.keys:
+                key.refill(now)
+                stats[key.name] = {
+                    "requests": key.requests,
+                    "throttled": key.throttled,
+                    "errors": key.errors,
+                    "tokens": round(key.tokens, 2),
+                    "cooldown_remaining": round(max(key.cooldown_until - now, 0), 2)
+                }
+            return stats
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,119 @@
+import threading
+import time
+import logging
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+
+class KolProfileIndex:
+    def __init__(self, client, refresh_interval=60, full_reload_interval=3600, page_size=1000):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.page_size = page_size
+        self._profiles = {}
+        self._last_seen = None
+        self._loaded_at = 0
+        self._refreshed_at = 0
+        self._lock = threading.Lock()
+        self._started = PerProcess(self._start)
+
+    def _fetch_pages(self, params):
+        offset = 0
+        while True:
+            page_params = {**params, 'limit': str(self.page_size), 'offset': str(offset)}
+            rows = self.client.get_json('kol_profiles', params=page_params)
+            yield from rows
+            if len(rows) < self.page_size:
+                break
+            offset += self.page_size
+
+    def _max_updated_at(self, rows, current):
+        for row in rows:
+            updated_at = row.get('updated_at')
+            if updated_at and (current is None or updated_at > current):
+                current = updated_at
+        return current
+
+    def load(self):
+        rows = list(self._fetch_pages({'select': '*', 'order': 'wallet_address.asc'}))
+        profiles = {p['wallet_address']: p for p in rows}
+        with self._lock:
+            self._profiles = profiles
+            self._last_seen = self._max_updated_at(rows, None)
+            self._loaded_at = self._refreshed_at = time.time()
+        return len(profiles)
+
+    def refresh(self):
+        if not self._loaded_at or time.time() - self._loaded_at >= self.full_reload_interval:
+            return self.load()
+
+        params = {'select': '*', 'order': 'updated_at.asc'}
+        if self._last_seen:
+            params['updated_at'] = f'gte.{self._last_seen}'
+        rows = list(self._fetch_pages(params))
+        if rows:
+            with self._lock:
+                profiles = dict(self._profiles)
+                profiles.update((p['wallet_address'], p) for p in rows)
+                self._profiles = profiles
+                self._last_seen = self._max_updated_at(rows, self._last_seen)
+        self._refreshed_at = time.time()
+        return len(rows)
+
+    def start(self):
+        # One refresher thread per worker
+        self._started.get()
+
+    def _start(self):
+        threading.Thread(target=self._run, name='kol-index-refresh', daemon=True).start()
+
+    def _run(self):
+        while True:
+            delay = self.refresh_interval - (time.time() - self._refreshed_at)
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.refresh()
+            except Exception as e:
+                self._refreshed_at = time.time()
+                logger.warning(f"KOL profile index refresh failed: {str(e)}")
+
+    @property
+    def loaded(self):
+        return bool(self._loaded_at)
+
+    def ensure_loaded(self):
+        self.start()
+        if not self._loaded_at:
+            self.load()
+
+    def get(self, wallet_address):
+        self.start()
+        return self._profiles.get(wallet_address)
+
+    def get_many(self, wallet_addresses):
+        self.start()
+        profiles = self._profiles
+        return {w: profiles[w] for w in wallet_addresses if w in profiles}
+
+    def put(self, profile):
+        with self._lock:
+            profiles = dict(self._profiles)
+            profiles[profile['wallet_address']] = profile
+            self._profiles = profiles
+
+    def wallets(self):
+        self.start()
+        return self._profiles.keys()
+
+    def snapshot(self):
+        self.start()
+        return self._profiles
+
+    def __contains__(self, wallet_address):
+        return wallet_address in self._profiles
+
+    def __len__(self):
+        return len(self._profiles)
@@ -0,0 +1,169 @@
+import time
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from redis.exceptions import RedisError
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Seconds spent per phase by the current request. The dict is shared by
+# reference with calls the request fans out to other threads (see fanout.py)
+_phases = contextvars.ContextVar('request_phases', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def bucket_order(item):
+    # Bucket series in increasing le order per label set, with le="+Inf" last;
+    # le is always the last label (see Metrics.observe)
+    labels, _, le = item[0].rpartition('le="')
+    return labels, float(le[:-2])
+
+
+def series(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Metrics:
+    def __init__(self, redis_client=None, key='metrics', flush_interval=5):
+        # Each worker accumulates deltas and adds them into one Redis hash
+        # (field = Prometheus series, value = running total) every
+        # flush_interval seconds, so every worker's samples add up exactly.
+        # Without Redis the totals are this process's own
+        self.redis = redis_client
+        self.key = key
+        self.flush_interval = flush_interval
+        self._declared = {}
+        self._pending = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._started = PerProcess(self._start)
+
+    def counter(self, name, help_text):
+        self._declared[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._declared[name] = ('histogram', help_text, tuple(buckets))
+
+    def _add(self, field, value):
+        with self._lock:
+            self._pending[field] = self._pending.get(field, 0) + value
+
+    def inc(self, name, value=1, **labels):
+        self.start()
+        self._add(series(name, labels), value)
+
+    def observe(self, name, value, **labels):
+        self.start()
+        buckets = self._declared[name][2]
+        with self._lock:
+            pending = self._pending
+            for le in buckets:
+                if value <= le:
+                    field = series(f'{name}_bucket', {**labels, 'le': repr(float(le))})
+                    pending[field] = pending.get(field, 0) + 1
+            for field, amount in ((series(f'{name}_bucket', {**labels, 'le': '+Inf'}), 1),
+                                  (series(f'{name}_sum', labels), value),
+                                  (series(f'{name}_count', labels), 1)):
+                pending[field] = pending.get(field, 0) + amount
+
+    @contextmanager
+    def phase(self, name):
+        # Adds the elapsed time to the current request's phase totals, if any
+        phases = _phases.get()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if phases is not None:
+                phases[name] = phases.get(name, 0) + time.perf_counter() - started
+
+    def begin_request(self):
+        return time.perf_counter(), _phases.set({})
+
+    def end_request(self, started, route, method, status):
+        begun, token = started
+        phases = _phases.get() or {}
+        _phases.reset(token)
+        self.observe('http_request_duration_seconds', time.perf_counter() - begun,
+                     route=route, method=method, status=status)
+        for name, seconds in phases.items():
+            self.observe('http_request_phase_seconds', seconds, route=route, phase=name)
+
+    def start(self):
+        self._started.get()
+
+    def _start(self):
+        # Each worker gets its own flusher; deltas inherited from the master
+        # belong to the master
+        with self._lock:
+            self._pending = {}
+        threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        if self.redis is None:
+            with self._lock:
+                for field, value in pending.items():
+                    self._totals[field] = self._totals.get(field, 0) + value
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for field, value in pending.items():
+                pipe.hincrbyfloat(self.key, field, value)
+            pipe.execute()
+        except RedisError as e:
+            # Kept for the next flush rather than lost
+            logger.warning(f"Metrics flush failed: {str(e)}")
+            with self._lock:
+                for field, value in pending.items():
+                    self._pending[field] = self._pending.get(field, 0) + value
+
+    def totals(self):
+        self.flush()
+        if self.redis is None:
+            with self._lock:
+                return dict(self._totals)
+        values = self.redis.hgetall(self.key)
+        return {
+            (field.decode() if isinstance(field, bytes) else field): float(value)
+            for field, value in values.items()
+        }
+
+    def render(self):
+        # Prometheus text exposition format, version 0.0.4
+        totals = self.totals()
+        by_name = {}
+        for field, value in totals.items():
+            by_name.setdefault(field.split('{', 1)[0], []).append((field, value))
+
+        lines = []
+        for name, (kind, help_text, _) in sorted(self._declared.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            names = (f'{name}_bucket', f'{name}_sum', f'{name}_count') if kind == 'histogram' else (name,)
+            for sample_name in names:
+                order = bucket_order if sample_name == f'{name}_bucket' and kind == 'histogram' else None
+                for field, value in sorted(by_name.get(sample_name, ()), key=order):
+                    lines.append(f'{field} {value:.17g}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,33 @@
+import os
+import threading
+
+
+class PerProcess:
+    # Holds one value per process, made by factory() on first use. Threads
+    # and executors don't survive gunicorn's fork, so anything that owns one
+    # is created lazily in each worker instead of once in the master
+    def __init__(self, factory):
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._value = None
+
+    def get(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._value = self.factory()
+                    self._pid = pid
+        return self._value
+
+    @property
+    def current(self):
+        # This process's value, or None when it hasn't been made yet
+        return self._value if self._pid == os.getpid() else None
+
+    def reset(self):
+        # The next get() makes a new value, as after a fork
+        with self._lock:
+            self._pid = None
+            self._value = None
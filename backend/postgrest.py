@@ -0,0 +1,125 @@
+RESERVED_CHARS = set(',.:()"\\ ')
+
+
+def quote_value(value):
+    value = str(value)
+    if any(c in RESERVED_CHARS for c in value):
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}"'
+    return value
+
+
+class Query:
+    def __init__(self, table):
+        self.table = table
+        self._select = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    def select(self, *columns):
+        self._select = ','.join(columns)
+        return self
+
+    def filter(self, column, operator, value):
+        self._filters.append((column, f'{operator}.{value}'))
+        return self
+
+    def eq(self, column, value):
+        return self.filter(column, 'eq', quote_value(value))
+
+    def neq(self, column, value):
+        return self.filter(column, 'neq', quote_value(value))
+
+    def gt(self, column, value):
+        return self.filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self.filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self.filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self.filter(column, 'lte', value)
+
+    def in_(self, column, values):
+        return self.filter(column, 'in', f"({','.join(quote_value(v) for v in values)})")
+
+    def not_in(self, column, values):
+        return self.filter(column, 'not.in', f"({','.join(quote_value(v) for v in values)})")
+
+    def or_(self, *conditions):
+        # conditions are PostgREST logic terms, e.g. 'amount.gt.5' or 'and(a.eq.1,b.lt.2)'
+        self._filters.append(('or', f"({','.join(conditions)})"))
+        return self
+
+    def order(self, column, desc=True):
+        self._order.append(f"{column}.{'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, count):
+        self._limit = int(count)
+        return self
+
+    def offset(self, count):
+        self._offset = int(count)
+        return self
+
+    def copy(self):
+        query = Query(self.table)
+        query._select = self._select
+        query._filters = list(self._filters)
+        query._order = list(self._order)
+        query._limit = self._limit
+        query._offset = self._offset
+        return query
+
+    def params(self):
+        # A list of pairs, since the same column can carry several filters
+        params = []
+        if self._select:
+            params.append(('select', self._select))
+        params.extend(self._filters)
+        if self._order:
+            params.append(('order', ','.join(self._order)))
+        if self._limit is not None:
+            params.append(('limit', str(self._limit)))
+        if self._offset:
+            params.append(('offset', str(self._offset)))
+        return params
+
+    def execute(self, client):
+        return client.get_json(self.table, params=self.params())
+
+    def pages(self, client, page_size=1000):
+        # Yields pages with limit/offset until a short page; needs a stable order
+        offset = 0
+        while True:
+            page = self.copy().limit(page_size).offset(offset).execute(client)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+
+    def execute_all(self, client, page_size=1000):
+        return [row for page in self.pages(client, page_size) for row in page]
+
+    def seek_pages(self, client, column, tiebreak, page_size=1000, desc=True):
+        # Like pages(), but each page starts after the last row's (column,
+        # tiebreak) values instead of at an offset, so deep pages cost the
+        # same as the first. tiebreak must be unique and both must be selected;
+        # the query must not have its own order
+        op = 'lt' if desc else 'gt'
+        base = self.copy().order(column, desc).order(tiebreak, desc).limit(page_size)
+        query = base
+        while True:
+            page = query.execute(client)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            value, key = quote_value(page[-1][column]), quote_value(page[-1][tiebreak])
+            query = base.copy().or_(f'{column}.{op}.{value}', f'and({column}.eq.{value},{tiebreak}.{op}.{key})')
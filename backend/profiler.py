@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import uuid
+import random
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from redis.exceptions import RedisError
+
+try:
+    # Under gevent's monkey patching, threads and sleeps become greenlets,
+    # which would only get to sample when the profiled request yields
+    from gevent.monkey import get_original
+    _start_thread, _allocate_lock, _get_ident = get_original(
+        '_thread', ['start_new_thread', 'allocate_lock', 'get_ident']
+    )
+    _sleep = get_original('time', 'sleep')
+except ImportError:
+    import _thread
+    _start_thread, _allocate_lock, _get_ident = _thread.start_new_thread, _thread.allocate_lock, _thread.get_ident
+    _sleep = time.sleep
+
+try:
+    from greenlet import getcurrent
+except ImportError:
+    getcurrent = None
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 128
+
+
+def frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    # Root first, in the collapsed-stack format read by flamegraph.pl and speedscope
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Profile:
+    def __init__(self, reason):
+        self.id = uuid.uuid4().hex[:12]
+        self.reason = reason
+        self.thread_id = _get_ident()
+        self.greenlet = getcurrent() if getcurrent is not None else None
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.stacks = Counter()
+
+    def frame(self, frames):
+        # A suspended greenlet (e.g. a gevent request waiting on a socket) keeps
+        # its own frame; a running one is whatever its thread is executing
+        frame = self.greenlet.gr_frame if self.greenlet is not None else None
+        return frame if frame is not None else frames.get(self.thread_id)
+
+
+class Profiler:
+    def __init__(self, redis_client, codec, sample_rate=0.0, keep=20, interval=0.005, key='profiles'):
+        # Samples the stacks of profiled requests every interval seconds from
+        # one native thread per worker, which only runs while a profile is open.
+        # The keep slowest profiles across all workers are kept in a Redis
+        # sorted set scored by duration (per worker without Redis)
+        self.redis = redis_client
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.interval = interval
+        self.key = key
+        self._active = {}
+        self._local = []
+        self._sampling = False
+        self._lock = _allocate_lock()
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def begin(self, reason):
+        profile = Profile(reason)
+        with self._lock:
+            self._active[profile.id] = profile
+            start = not self._sampling
+            self._sampling = True
+        if start:
+            _start_thread(self._run, ())
+        return profile
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._sampling = False
+                    return
+            frames = sys._current_frames()
+            for profile in active:
+                frame = profile.frame(frames)
+                if frame is not None:
+                    profile.stacks[collapse(frame)] += 1
+            del frames
+            _sleep(self.interval)
+
+    def discard(self, profile):
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def finish(self, profile, **info):
+        duration = time.perf_counter() - profile.started
+        self.discard(profile)
+        record = {
+            "id": profile.id,
+            "reason": profile.reason,
+            **info,
+            "duration_ms": round(duration * 1000, 2),
+            "started_at": profile.started_at,
+            "pid": os.getpid(),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(profile.stacks.values()),
+            "stacks": dict(profile.stacks.most_common())
+        }
+        self._store(record, duration)
+        return record
+
+    def _store(self, record, duration):
+        if self.redis is None:
+            with self._lock:
+                self._local.append((duration, record))
+                self._local.sort(key=lambda item: item[0], reverse=True)
+                del self._local[self.keep:]
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zadd(self.key, {self.codec.dumps(record): duration})
+            pipe.zremrangebyrank(self.key, 0, -self.keep - 1)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Profile store failed: {str(e)}")
+
+    def records(self):
+        # Slowest first
+        if self.redis is None:
+            with self._lock:
+                return [record for _, record in self._local]
+        return [self.codec.loads(raw) for raw in self.redis.zrevrange(self.key, 0, -1)]
+
+    def get(self, profile_id):
+        for record in self.records():
+            if record['id'] == profile_id:
+                return record
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._local = []
+        if self.redis is not None:
+            self.redis.delete(self.key)
+
+    def stats(self):
+        return {
+            "sample_rate": self.sample_rate,
+            "active": len(self._active),
+            "keep": self.keep
+        }
@@ -0,0 +1,236 @@
+import math
+import time
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from postgrest import Query
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+
+def block_timestamp(row):
+    return datetime.fromisoformat(row['block_time'].replace('Z', '+00:00')).timestamp()
+
+
+class _Series:
+    # Rows kept sorted by block time, oldest first, with a parallel list of
+    # timestamps to bisect on
+    __slots__ = ('times', 'rows')
+
+    def __init__(self):
+        self.times = []
+        self.rows = []
+
+    def insert(self, ts, row):
+        # New rows almost always land at the end, so this is an append in practice
+        i = bisect.bisect_right(self.times, ts)
+        self.times.insert(i, ts)
+        self.rows.insert(i, row)
+
+    def trim(self, cutoff):
+        count = bisect.bisect_left(self.times, cutoff)
+        removed = self.rows[:count]
+        if count:
+            del self.times[:count]
+            del self.rows[:count]
+        return removed
+
+
+class RecentTransactions:
+    def __init__(self, client, columns, retention=7 * 86400, max_rows=20000,
+                 poll_interval=2, page_size=1000, overlap=30, reload_interval=None):
+        # Per-worker copy of the newest webhook_transactions rows, bounded by
+        # age and by row count, kept current by a background tailer. Each poll
+        # re-reads the last overlap seconds before the newest created_at seen,
+        # so rows that commit late with an older created_at are still picked
+        # up. With reload_interval set, everything is also reloaded that often
+        self.client = client
+        self.columns = tuple(dict.fromkeys(tuple(columns) + ('transaction_signature', 'block_time', 'created_at')))
+        self.retention = retention
+        self.max_rows = max_rows
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.overlap = overlap
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._started = PerProcess(self._start)
+        self._listeners = []
+        self._reset()
+
+    def _reset(self):
+        self._all = _Series()
+        self._by_wallet = defaultdict(_Series)
+        self._by_mint = defaultdict(_Series)
+        self._signatures = set()
+        self._complete_from = float('inf')
+        self._watermark = None
+        self._refreshed_at = 0
+        self._loaded_at = 0
+
+    def _insert(self, rows):
+        added = []
+        for row in rows:
+            signature = row.get('transaction_signature')
+            if not signature or signature in self._signatures or not row.get('block_time'):
+                continue
+            ts = block_timestamp(row)
+            self._signatures.add(signature)
+            self._all.insert(ts, row)
+            self._by_wallet[row.get('from_address')].insert(ts, row)
+            self._by_mint[row.get('token_mint')].insert(ts, row)
+            created_at = row.get('created_at')
+            if created_at and (self._watermark is None or created_at > self._watermark):
+                self._watermark = created_at
+            added.append(row)
+        return added
+
+    def _trim(self):
+        # Everything older than the retention window, and the oldest rows past
+        # max_rows, are dropped; the buffer is complete from the cutoff onwards
+        cutoff = time.time() - self.retention
+        excess = len(self._all.rows) - self.max_rows
+        if excess > 0:
+            cutoff = max(cutoff, self._all.times[excess])
+        self._complete_from = max(self._complete_from, cutoff)
+
+        removed = self._all.trim(cutoff)
+        if not removed:
+            return
+        self._signatures.difference_update(row['transaction_signature'] for row in removed)
+        for index, column in ((self._by_wallet, 'from_address'), (self._by_mint, 'token_mint')):
+            for key in {row.get(column) for row in removed}:
+                series = index.get(key)
+                if series is not None:
+                    series.trim(cutoff)
+                    if not series.rows:
+                        del index[key]
+
+    def load(self):
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        query = (Query('webhook_transactions')
+                 .select(*self.columns)
+                 .gte('block_time', since.isoformat())
+                 .order('block_time')
+                 .order('transaction_signature'))
+
+        rows = []
+        while len(rows) < self.max_rows:
+            page = query.copy().limit(min(self.page_size, self.max_rows - len(rows))).offset(len(rows)).execute(self.client)
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+
+        with self._lock:
+            self._reset()
+            self._insert(reversed(rows))
+            # A full buffer is only complete just after its oldest row (ties at
+            # that instant may have been cut off)
+            if len(rows) < self.max_rows:
+                self._complete_from = since.timestamp()
+            else:
+                self._complete_from = math.nextafter(self._all.times[0], math.inf)
+            if self._watermark is None:
+                self._watermark = datetime.now(timezone.utc).isoformat()
+            self._trim()
+            self._refreshed_at = self._loaded_at = time.time()
+        return len(rows)
+
+    def refresh(self):
+        if not self._refreshed_at or (self.reload_interval and time.time() - self._loaded_at >= self.reload_interval):
+            return self.load()
+
+        query = (Query('webhook_transactions')
+                 .select(*self.columns)
+                 .order('created_at', desc=False)
+                 .order('transaction_signature', desc=False))
+        if self._watermark:
+            # Signatures already buffered are skipped, so the overlap is only re-read, never duplicated
+            since = datetime.fromisoformat(self._watermark.replace('Z', '+00:00')) - timedelta(seconds=self.overlap)
+            query.gte('created_at', since.isoformat())
+        added = self.add(query.execute_all(self.client, self.page_size))
+        self._refreshed_at = time.time()
+        return added
+
+    def add(self, rows):
+        # Also used by the write path, so a worker sees its own inserts at once
+        with self._lock:
+            added = self._insert(rows)
+            if added:
+                self._trim()
+        if added:
+            for listener in self._listeners:
+                try:
+                    listener(added)
+                except Exception as e:
+                    logger.error(f"Recent transactions listener error: {str(e)}")
+        return len(added)
+
+    def listen(self, callback):
+        # callback(rows) gets each batch of rows new to this buffer, after the
+        # initial load; it runs on the thread that added them (tailer, webhook
+        # writer or invalidation listener) and must not block
+        self._listeners.append(callback)
+
+    def start(self):
+        # One tailer per worker; rows loaded before the fork stay valid and are tailed on from
+        self._started.get()
+
+    def _start(self):
+        threading.Thread(target=self._run, name='recent-tx-tailer', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Recent transactions refresh failed: {str(e)}")
+            time.sleep(self.poll_interval)
+
+    @property
+    def fresh(self):
+        return time.time() - self._refreshed_at < max(30, self.poll_interval * 10)
+
+    def window(self, start, limit, wallet=None, mint=None, match=None):
+        # Newest-first rows with block time >= start (epoch seconds), up to
+        # limit, optionally from one wallet or mint and filtered by match().
+        # Returns None when the buffer can't answer exactly, i.e. it isn't
+        # loaded or current, or the window reaches past what it holds and
+        # fewer than limit rows matched inside it
+        self.start()
+        if not self.fresh:
+            return None
+
+        with self._lock:
+            if wallet is not None:
+                series = self._by_wallet.get(wallet)
+            elif mint is not None:
+                series = self._by_mint.get(mint)
+            else:
+                series = self._all
+
+            rows = []
+            if series is not None:
+                first = bisect.bisect_left(series.times, max(start, self._complete_from))
+                for i in range(len(series.rows) - 1, first - 1, -1):
+                    row = series.rows[i]
+                    if match is None or match(row):
+                        rows.append(row)
+                        if len(rows) >= limit:
+                            return rows
+
+            if start < self._complete_from:
+                return None
+            return rows
+
+    def stats(self):
+        return {
+            "rows": len(self._all.rows),
+            "wallets": len(self._by_wallet),
+            "mints": len(self._by_mint),
+            "max_rows": self.max_rows,
+            "complete_from": self._complete_from if self._all.rows else None,
+            "fresh": self.fresh
+        }
@@ -0,0 +1,123 @@
+import time
+import logging
+import threading
+from redis.commands.core import Script
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class RedisUnavailable(ConnectionError):
+    pass
+
+
+class RedisGuard:
+    def __init__(self, probe_client, retry_interval=2.0):
+        # Health of one Redis server, shared by every client wrapped with it.
+        # A connection error or timeout marks the server down; from then on
+        # commands fail at once with RedisUnavailable (a RedisError, which
+        # every caller already handles) instead of each waiting out a connect
+        # timeout. One caller per retry_interval pings the server instead,
+        # and the first successful ping brings it back
+        self.probe_client = probe_client
+        self.retry_interval = retry_interval
+        self.available = True
+        self.down_since = None
+        self.last_error = None
+        self.outages = 0
+        self._next_probe = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, client):
+        return GuardedRedis(client, self)
+
+    def ping(self):
+        try:
+            self.probe_client.ping()
+        except RedisError as e:
+            self.mark_down(e)
+            return False
+        self.mark_up()
+        return True
+
+    def check(self):
+        if self.available:
+            return
+        now = time.monotonic()
+        with self._lock:
+            probe = now >= self._next_probe
+            if probe:
+                self._next_probe = now + self.retry_interval
+        if not (probe and self.ping()):
+            raise RedisUnavailable(f"Redis unavailable since {self.down_since}: {self.last_error}")
+
+    def mark_down(self, error):
+        with self._lock:
+            self.last_error = str(error)
+            if self.available:
+                self.available = False
+                self.down_since = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+                self.outages += 1
+                self._next_probe = time.monotonic() + self.retry_interval
+                logger.warning(f"Redis marked unavailable: {str(error)}")
+
+    def mark_up(self):
+        with self._lock:
+            if not self.available:
+                logger.warning(f"Redis available again after outage since {self.down_since}")
+            self.available = True
+            self.down_since = None
+
+    def call(self, func, *args, **kwargs):
+        self.check()
+        try:
+            return func(*args, **kwargs)
+        except (ConnectionError, TimeoutError) as e:
+            self.mark_down(e)
+            raise
+
+    def stats(self):
+        return {
+            "available": self.available,
+            "down_since": self.down_since,
+            "last_error": self.last_error,
+            "outages": self.outages
+        }
+
+
+class GuardedRedis:
+    # Drop-in for a redis.Redis client: commands, pipelines and scripts all go through the guard
+    def __init__(self, client, guard):
+        self.client = client
+        self.guard = guard
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def guarded(*args, **kwargs):
+            return self.guard.call(attr, *args, **kwargs)
+        return guarded
+
+    def pipeline(self, *args, **kwargs):
+        return GuardedPipeline(self.client.pipeline(*args, **kwargs), self.guard)
+
+    def get_encoder(self):
+        # Local, and needed by register_script even while Redis is down
+        return self.client.get_encoder()
+
+    def register_script(self, script):
+        return Script(self, script)
+
+
+class GuardedPipeline:
+    def __init__(self, pipe, guard):
+        self.pipe = pipe
+        self.guard = guard
+
+    def __getattr__(self, name):
+        return getattr(self.pipe, name)
+
+    def execute(self, *args, **kwargs):
+        return self.guard.call(self.pipe.execute, *args, **kwargs)
@@ -0,0 +1,163 @@
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from per_process import PerProcess
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        # Opens after failure_threshold consecutive failures (connection
+        # errors, timeouts, 5xx after retries); calls then fail at once with
+        # CircuitOpen until reset_timeout has passed, when one trial call is
+        # let through: success closes the circuit, failure reopens it.
+        # State is per worker process
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open':
+                wait_for = self.opened_at + self.reset_timeout - time.monotonic()
+                if wait_for <= 0:
+                    self.state = 'half_open'
+                    return
+            else:
+                # half_open: the trial call is still in flight
+                wait_for = self.reset_timeout
+            self.rejected += 1
+        raise CircuitOpen(f"{self.name} circuit open after {self.failures} failures; retrying in {wait_for:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self.opened += 1
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+class Hedger:
+    def __init__(self, percentile=95, window=200, min_samples=50, max_ratio=0.1, min_delay=0.05, max_workers=8):
+        # Sends a second copy of a request when the first hasn't answered
+        # within the percentile of recent latencies, and returns whichever
+        # answers first. Hedges are capped at max_ratio of the last window
+        # requests, so a slow upstream sees at most that much extra load
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self._latencies = deque(maxlen=window)
+        self._recent = deque(maxlen=window)
+        self._recent_hedged = 0
+        self._delay = None
+        self._since_update = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor = PerProcess(
+            lambda: ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hedge')
+        )
+
+    def delay(self):
+        # None until there are enough samples to trust the percentile
+        return self._delay
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+            self._since_update += 1
+            if len(self._latencies) >= self.min_samples and self._since_update >= 10:
+                ordered = sorted(self._latencies)
+                index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+                self._delay = max(ordered[index], self.min_delay)
+                self._since_update = 0
+
+    def _admit(self, hedge):
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen and self._recent[0]:
+                self._recent_hedged -= 1
+            self._recent.append(hedge)
+            if hedge:
+                self._recent_hedged += 1
+                self.hedged += 1
+
+    def _budget_left(self):
+        return self._recent_hedged + 1 <= self.max_ratio * max(len(self._recent), self.min_samples)
+
+    def _timed(self, send):
+        started = time.perf_counter()
+        response = send()
+        self.record(time.perf_counter() - started)
+        return response
+
+    def run(self, send, on_hedge=None):
+        # send() must be idempotent; it runs in a copy of the caller's context.
+        # on_hedge(winner) is called for hedged requests with 'primary', 'hedge' or 'failed'
+        delay = self._delay
+        if delay is None:
+            self._admit(False)
+            return self._timed(send)
+
+        pool = self._executor.get()
+        primary = pool.submit(contextvars.copy_context().run, self._timed, send)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._budget_left():
+            self._admit(False)
+            return primary.result()
+
+        self._admit(True)
+        hedge = pool.submit(contextvars.copy_context().run, self._timed, send)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = 'hedge' if future is hedge else 'primary'
+                    if future is hedge:
+                        self.hedge_wins += 1
+                    if on_hedge is not None:
+                        on_hedge(winner)
+                    return future.result()
+            if not pending:
+                # Both failed; report the original request's error
+                if on_hedge is not None:
+                    on_hedge('failed')
+                return primary.result()
+
+    def stats(self):
+        return {
+            "percentile": self.percentile,
+            "delay_ms": round(self._delay * 1000, 1) if self._delay is not None else None,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins
+        }
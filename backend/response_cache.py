@@ -0,0 +1,338 @@
+import os
+import time
+import hashlib
+import inspect
+import logging
+import threading
+from contextlib import nullcontext
+from collections import namedtuple
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from redis.exceptions import RedisError
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+CachedBody = namedtuple('CachedBody', ['body', 'etag'])
+# A cache entry and how to rebuild it: compute names a function registered
+# with ResponseCache.register, ident its arguments (see cache_warmer.py)
+WarmSpec = namedtuple('WarmSpec', ['family', 'key', 'compute', 'ident'])
+
+
+def content_etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def load_ttls(defaults, hard_factor=4):
+    # CACHE_TTL_<FAMILY>=<soft>[,<hard>] overrides the per-family defaults
+    hard_factor = float(os.getenv('CACHE_HARD_TTL_FACTOR', hard_factor))
+    ttls = {}
+    for family, soft in defaults.items():
+        hard = None
+        value = os.getenv(f'CACHE_TTL_{family.upper()}')
+        if value:
+            parts = [p.strip() for p in value.split(',')]
+            soft = int(parts[0])
+            if len(parts) > 1 and parts[1]:
+                hard = int(parts[1])
+        ttls[family] = (soft, max(hard or int(soft * hard_factor), soft))
+    return ttls
+
+
+class ResponseCache:
+    def __init__(self, redis_client, coalescer, ttls, codec, local=None, local_ttl=5, refresh_workers=4,
+                 metrics=None):
+        # redis_client must be a binary client (decode_responses=False)
+        self.redis = redis_client
+        self.coalescer = coalescer
+        self.codec = codec
+        self.ttls = ttls
+        self.local = local
+        self.local_ttl = local_ttl
+        self.refresh_workers = refresh_workers
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.counter('cache_requests_total', 'Response cache lookups by key family and result (hit, stale, miss)')
+        # name -> (function, batch); access_log(spec) is called on every lookup when set
+        self.computes = {}
+        self.access_log = None
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = PerProcess(self._new_pool)
+
+    def soft_ttl(self, family):
+        return self.ttls[family][0]
+
+    def _phase(self, name):
+        return self.metrics.phase(name) if self.metrics is not None else nullcontext()
+
+    def _count(self, family, result, count=1):
+        if self.metrics is not None and count:
+            self.metrics.inc('cache_requests_total', count, family=family, result=result)
+
+    def encode(self, payload):
+        with self._phase('serialization'):
+            body = self.codec.dumps(payload)
+        return CachedBody(body, content_etag(body))
+
+    def _store_local(self, key, cached, soft_expires):
+        # L1 never outlives the L2 soft TTL, and is capped so other workers' writes show up quickly
+        if self.local is None:
+            return
+        ttl = min(self.local_ttl, soft_expires - time.time())
+        if ttl > 0:
+            self.local.set(key, (cached, soft_expires), ttl, size=len(cached.body))
+        else:
+            self.local.delete(key)
+
+    def _pack(self, cached, soft_expires):
+        # <soft_expires>\n<etag>\n<body>: the body is stored exactly as it is sent
+        return b'%.3f\n%s\n' % (soft_expires, cached.etag.encode('ascii')) + cached.body
+
+    def _unpack(self, raw):
+        soft_expires, etag, body = raw.split(b'\n', 2)
+        return CachedBody(body, etag.decode('ascii')), float(soft_expires)
+
+    def soft_expires(self, keys):
+        # {key: soft expiry timestamp, or None when absent}, reading only each entry's header
+        if self.redis is None or not keys:
+            return {key: None for key in keys}
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.getrange(key, 0, 31)
+        expiries = {}
+        for key, head in zip(keys, pipe.execute()):
+            try:
+                expiries[key] = float(head.split(b'\n', 1)[0]) if head else None
+            except ValueError:
+                expiries[key] = None
+        return expiries
+
+    def get_entry(self, key):
+        if self.local is not None:
+            entry = self.local.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0], True
+
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(key)
+        except RedisError:
+            return None
+        return self._decode(key, raw)
+
+    def _decode(self, key, raw):
+        if not raw:
+            return None
+        try:
+            cached, soft_expires = self._unpack(raw)
+        except ValueError:
+            return None
+        fresh = soft_expires > time.time()
+        if fresh:
+            self._store_local(key, cached, soft_expires)
+        return cached, fresh
+
+    def get_many(self, keys):
+        entries = {}
+        remaining = []
+        now = time.time()
+        for key in keys:
+            entry = self.local.get(key) if self.local is not None else None
+            if entry is not None and entry[1] > now:
+                entries[key] = (entry[0], True)
+            else:
+                remaining.append(key)
+
+        if remaining and self.redis is not None:
+            try:
+                raws = self.redis.mget(remaining)
+            except RedisError:
+                raws = []
+            for key, raw in zip(remaining, raws):
+                entry = self._decode(key, raw)
+                if entry is not None:
+                    entries[key] = entry
+        return entries
+
+    def set(self, family, key, payload):
+        soft, hard = self.ttls[family]
+        soft_expires = time.time() + soft
+        cached = self.encode(payload)
+        if self.redis is not None:
+            try:
+                self.redis.setex(key, hard, self._pack(cached, soft_expires))
+            except RedisError as e:
+                logger.warning(f"Cache write failed for {key}: {str(e)}")
+        self._store_local(key, cached, soft_expires)
+        return cached
+
+    def set_many(self, family, payloads):
+        soft, hard = self.ttls[family]
+        soft_expires = time.time() + soft
+        encoded = {key: self.encode(payload) for key, payload in payloads.items()}
+        if self.redis is not None and encoded:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, cached in encoded.items():
+                    pipe.setex(key, hard, self._pack(cached, soft_expires))
+                pipe.execute()
+            except RedisError as e:
+                logger.warning(f"Cache batch write failed for {len(encoded)} keys: {str(e)}")
+        for key, cached in encoded.items():
+            self._store_local(key, cached, soft_expires)
+        return encoded
+
+    def invalidate(self, *keys):
+        if self.local is not None:
+            for key in keys:
+                self.local.delete(key)
+        if self.redis is not None and keys:
+            try:
+                self.redis.delete(*keys)
+            except RedisError as e:
+                logger.warning(f"Cache invalidation failed for {keys[0]}: {str(e)}")
+
+    def _fresh(self, key):
+        entry = self.get_entry(key)
+        if entry is not None and entry[1]:
+            return entry[0]
+        return None
+
+    def register(self, name, compute, batch=False):
+        # batch computes take a list of identifiers and return {identifier: payload}
+        self.computes[name] = (compute, batch)
+
+    def refresh(self, family, key, compute):
+        # Recomputes now, unless another worker is already doing it
+        return self.coalescer.do(key, lambda: self._fill(family, key, compute), lookup=lambda: self._fresh(key))
+
+    def refresh_many(self, family, keys, compute_many):
+        return self._fill_many(family, keys, compute_many)
+
+    def _fill(self, family, key, compute):
+        payload = compute()
+        if payload is None:
+            return None
+        return self.set(family, key, payload)
+
+    def _new_pool(self):
+        self._refreshing = set()
+        return ThreadPoolExecutor(max_workers=self.refresh_workers, thread_name_prefix='cache-refresh')
+
+    def refresh_async(self, family, key, compute):
+        pool = self._executor.get()
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.coalescer.do(key, lambda: self._fill(family, key, compute), lookup=lambda: self._fresh(key))
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        try:
+            pool.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _fill_many(self, family, keys, compute_many):
+        payloads = compute_many([keys[key] for key in keys])
+        return self.set_many(family, {
+            key: payloads[ident] for key, ident in keys.items() if payloads.get(ident) is not None
+        })
+
+    def refresh_many_async(self, family, keys, compute_many):
+        pool = self._executor.get()
+        with self._lock:
+            keys = {key: ident for key, ident in keys.items() if key not in self._refreshing}
+            self._refreshing.update(keys)
+        if not keys:
+            return
+
+        def run():
+            try:
+                self._fill_many(family, keys, compute_many)
+            except Exception as e:
+                logger.warning(f"Background batch refresh failed for {len(keys)} keys: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(keys)
+
+        try:
+            pool.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def fetch_many(self, family, keys, compute_many):
+        # keys maps cache key -> identifier; compute_many takes a list of
+        # identifiers and returns {identifier: payload} for the ones it found
+        if self.access_log is not None and compute_many.__name__ in self.computes:
+            for key, ident in keys.items():
+                self.access_log(WarmSpec(family, key, compute_many.__name__, ident))
+
+        with self._phase('cache'):
+            entries = self.get_many(list(keys))
+        stale = {key: keys[key] for key, (_, fresh) in entries.items() if not fresh}
+        self._count(family, 'hit', len(entries) - len(stale))
+        self._count(family, 'stale', len(stale))
+        self._count(family, 'miss', len(keys) - len(entries))
+        if stale:
+            self.refresh_many_async(family, stale, compute_many)
+
+        results = {key: cached for key, (cached, _) in entries.items()}
+        missing = {key: ident for key, ident in keys.items() if key not in entries}
+        if missing:
+            results.update(self._fill_many(family, missing, compute_many))
+        return results
+
+    def fetch(self, family, key, compute):
+        with self._phase('cache'):
+            entry = self.get_entry(key)
+        if entry is not None:
+            cached, fresh = entry
+            self._count(family, 'hit' if fresh else 'stale')
+            if not fresh:
+                self.refresh_async(family, key, compute)
+            return cached
+
+        self._count(family, 'miss')
+        return self.coalescer.do(
+            key,
+            lambda: self._fill(family, key, compute),
+            lookup=lambda: self._fresh(key),
+            stale=lambda: (self.get_entry(key) or (None,))[0]
+        )
+
+    def cached(self, family, key):
+        # key is a format string over the decorated function's arguments,
+        # e.g. 'transactions_{time_range}_{tx_type}'; the wrapper returns a
+        # CachedBody with the encoded response and its ETag
+        def decorator(func):
+            signature = inspect.signature(func)
+            self.register(func.__name__, func)
+
+            def spec(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                return WarmSpec(family, key.format(**bound.arguments), func.__name__, dict(bound.arguments))
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                warm_spec = spec(*args, **kwargs)
+                if self.access_log is not None:
+                    self.access_log(warm_spec)
+                return self.fetch(family, warm_spec.key, lambda: func(*args, **kwargs))
+
+            wrapper.uncached = func
+            wrapper.spec = spec
+            return wrapper
+        return decorator
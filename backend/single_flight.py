@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from redis.exceptions import RedisError
+
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    def __init__(self, redis_client=None, lock_ttl=30, wait_timeout=15, poll_interval=0.05, prefix='lock:'):
+        self.redis = redis_client
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, compute, lookup=None, stale=None):
+        # One computation per key per process; other threads share its future
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._flights[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout=self.wait_timeout)
+            except FutureTimeoutError:
+                return compute()
+
+        try:
+            result = self._do_shared(key, compute, lookup, stale)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def _do_shared(self, key, compute, lookup, stale):
+        # One computation per key across processes; others poll the cache until it's filled
+        if self.redis is None or lookup is None:
+            return compute()
+
+        lock_key = f"{self.prefix}{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        interval = self.poll_interval
+        checked_stale = stale is None
+        waited = False
+
+        while True:
+            try:
+                acquired = self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+            except RedisError:
+                return compute()
+
+            if acquired:
+                try:
+                    # The previous holder has usually just filled the cache
+                    # and released the lock; only compute if it didn't
+                    value = lookup() if waited else None
+                    return value if value is not None else compute()
+                finally:
+                    self._release(lock_key, token)
+            waited = True
+
+            if not checked_stale:
+                checked_stale = True
+                value = stale()
+                if value is not None:
+                    return value
+
+            value = lookup()
+            if value is not None:
+                return value
+
+            if time.monotonic() >= deadline:
+                return compute()
+
+            time.sleep(interval)
+            interval = min(interval * 2, 0.25)
+
+    def _release(self, lock_key, token):
+        try:
+            self.redis.eval(RELEASE_SCRIPT, 1, lock_key, token)
+        except RedisError:
+            pass
+
+    def in_flight(self, key):
+        return key in self._flights
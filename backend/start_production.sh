@@ -15,7 +15,7 @@ if [ $? -ne 0 ]; then
     sleep 2
 fi
 
-echo "Starting Gunicorn with $(python3 -c 'import multiprocessing; print(multiprocessing.cpu_count() * 2 + 1)') workers..."
+echo "Starting Gunicorn with ${GUNICORN_WORKER_CLASS:-sync} workers..."
 gunicorn -c gunicorn_config.py app:app
 
 echo "Production server started!"
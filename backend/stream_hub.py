@@ -0,0 +1,111 @@
+import queue
+import logging
+import threading
+from collections import namedtuple
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+# frame is the encoded SSE message; tags say which streams it belongs to
+StreamEvent = namedtuple('StreamEvent', ['id', 'frame', 'tags'])
+
+
+class StreamBusy(Exception):
+    pass
+
+
+def encode_event(name, data, event_id=None):
+    # data is already-encoded compact JSON, which never contains a raw newline
+    head = f'id: {event_id}\nevent: {name}\n' if event_id else f'event: {name}\n'
+    return head.encode('utf-8') + b'data: ' + data + b'\n\n'
+
+
+class Subscription:
+    def __init__(self, tag, queue_size):
+        self.tag = tag
+        self.queue = queue.Queue(maxsize=queue_size)
+        # Set by the hub when this subscriber fell too far behind; the
+        # stream then ends and the client resumes with Last-Event-ID
+        self.dropped = False
+
+    def next_frames(self, timeout):
+        # None when nothing was published within timeout
+        try:
+            events = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return [event.frame for event in events if self.tag in event.tags]
+
+
+class StreamHub:
+    def __init__(self, build_events, max_subscribers=500, queue_size=100):
+        # build_events(rows) -> [StreamEvent] runs once per batch on the hub
+        # thread, so encoding is shared by every subscriber
+        self.build_events = build_events
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._inbound = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = PerProcess(self._start)
+        self.published = 0
+        self.dropped = 0
+
+    def start(self):
+        # One fan-out loop per worker
+        self._started.get()
+
+    def _start(self):
+        with self._lock:
+            self._subscribers = set()
+            self._inbound = queue.Queue()
+        threading.Thread(target=self._run, name='stream-hub', daemon=True).start()
+
+    def publish(self, rows):
+        if self._subscribers:
+            self._inbound.put(rows)
+
+    def subscribe(self, tag):
+        if self.max_subscribers <= 0:
+            raise StreamBusy("streams are disabled on this worker")
+        self.start()
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise StreamBusy(f"{len(self._subscribers)} streams open")
+            subscription = Subscription(tag, self.queue_size)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _run(self):
+        while True:
+            rows = self._inbound.get()
+            try:
+                events = self.build_events(rows)
+            except Exception as e:
+                logger.warning(f"Stream event build failed: {str(e)}")
+                continue
+            if not events:
+                continue
+
+            self.published += len(events)
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscription in subscribers:
+                try:
+                    subscription.queue.put_nowait(events)
+                except queue.Full:
+                    subscription.dropped = True
+                    self.dropped += 1
+                    self.unsubscribe(subscription)
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "published": self.published,
+            "dropped": self.dropped
+        }
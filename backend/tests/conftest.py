@@ -0,0 +1,46 @@
+import os
+import sys
+
+import fakeredis
+import pytest
+import redis
+
+# The backend modules import each other as top-level modules, like app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def redis_server():
+    # Set redis_server.connected = False to simulate an outage
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_raw(redis_server):
+    return fakeredis.FakeStrictRedis(server=redis_server)
+
+
+@pytest.fixture
+def redis_text(redis_server):
+    return fakeredis.FakeStrictRedis(server=redis_server, decode_responses=True)
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    # app.py with its upstreams pointed at a closed port and Redis replaced by
+    # one in-memory server, so nothing leaves the process
+    for name in ('VITE_SUPABASE_URL', 'HELIUS_API_URL', 'BIRDEYE_API_URL'):
+        os.environ.setdefault(name, 'http://127.0.0.1:9')
+    server = fakeredis.FakeServer()
+    patcher = pytest.MonkeyPatch()
+    patcher.setattr(redis, 'Redis', lambda **options: fakeredis.FakeStrictRedis(server=server, **options))
+    try:
+        import app
+    finally:
+        patcher.undo()
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
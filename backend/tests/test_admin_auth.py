@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.fixture
+def token(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'sëcret-token')
+    return 'sëcret-token'
+
+
+def header(value):
+    # Werkzeug hands header values over as latin-1 decoded str
+    return value.encode('utf-8').decode('latin-1')
+
+
+@pytest.mark.parametrize('value', ['café', 'wrong', '☃'])
+def test_non_ascii_profile_header_is_not_an_error(client, token, value):
+    response = client.get('/api/health', headers={'X-Profile': header(value)})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('value', ['café', 'sëcret-token-', 'secret-token'])
+def test_wrong_admin_token_is_unauthorized(client, token, value):
+    response = client.get('/api/admin/profiles', headers={'Authorization': f'Bearer {header(value)}'})
+    assert response.status_code == 401
+
+
+def test_admin_token_matches(app_module, token):
+    assert app_module.admin_token_matches(token)
+    assert not app_module.admin_token_matches('café')
+    assert not app_module.admin_token_matches(None)
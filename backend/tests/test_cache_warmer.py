@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from cache_warmer import CacheWarmer
+
+
+class Cache:
+    computes = {}
+
+
+def warmer(redis_client):
+    return CacheWarmer(Cache(), redis_client, json, interval=10)
+
+
+@pytest.fixture
+def workers(redis_text):
+    return warmer(redis_text), warmer(redis_text)
+
+
+def test_one_worker_takes_the_leader_lock(redis_text, workers):
+    first, second = workers
+
+    assert first._lead() is True
+    assert second._lead() is False
+    assert redis_text.get('warm:leader') == first._token
+    # Held for three cycles, so one slow cycle doesn't hand it over
+    assert 29000 < redis_text.pttl('warm:leader') <= 30000
+
+
+def test_leader_renews_its_lock_each_cycle(redis_text, workers):
+    first, second = workers
+    first._lead()
+    redis_text.pexpire('warm:leader', 1000)
+
+    assert first._lead() is True
+    assert redis_text.pttl('warm:leader') > 29000
+    assert second._lead() is False
+
+
+def test_lock_moves_on_when_the_leader_stops_renewing(redis_text, workers):
+    first, second = workers
+    first._lead()
+    redis_text.delete('warm:leader')
+
+    assert second._lead() is True
+    # The old leader finds someone else's token and steps down
+    assert first._lead() is False
+    assert first.leader is False
+    assert redis_text.get('warm:leader') == second._token
@@ -0,0 +1,122 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from recent_store import RecentTransactions
+
+WALLET = 'KoLwa11et1111111111111111111111111111111111'
+MINT = 'MemeMint111111111111111111111111111111111111'
+
+
+class Table:
+    # webhook_transactions as the tailer sees it: every query returns rows
+    def __init__(self):
+        self.rows = []
+
+    def get_json(self, table, params):
+        return list(self.rows)
+
+
+def isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def trade(signature, tx_type='BUY', amount_usd=50, age=60):
+    now = time.time()
+    return {
+        'transaction_signature': signature,
+        'block_time': isoformat(now - age),
+        'created_at': isoformat(now),
+        'from_address': WALLET,
+        'token_mint': MINT,
+        'transaction_type': tx_type,
+        'amount_usd': amount_usd
+    }
+
+
+@pytest.fixture
+def table():
+    return Table()
+
+
+@pytest.fixture
+def buffer(app_module, monkeypatch, table):
+    # A fresh, fully loaded buffer wired up like app.recent_transactions
+    buffer = RecentTransactions(table, app_module.recent_transactions.columns, poll_interval=3600)
+    buffer.listen(app_module.invalidate_dependents)
+    buffer.load()
+    monkeypatch.setattr(app_module, 'recent_transactions', buffer)
+    return buffer
+
+
+@pytest.fixture
+def kol(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.kol_index, 'get', lambda wallet: {'name': 'kol'} if wallet == WALLET else None)
+
+
+def test_row_maps_to_every_key_that_shows_it(app_module, kol):
+    app_module.track_wallet_tx_limit(WALLET, 100)
+    event = app_module.transaction_event([trade('sig1', amount_usd=200_000, age=2 * 3600)])
+
+    keys = app_module.dependent_keys(event)
+
+    # Two hours old: every range from 24h up, but not 1h
+    ranges = ['24h', '7d', '30d']
+    assert sorted(keys) == sorted(
+        [f'trader_profile_{WALLET}', f'wallet_tx_{WALLET}_100']
+        + [f'transactions_{r}_{t}' for r in ranges for t in ('all', 'buy')]
+        + [f'kol_feed_{r}' for r in ranges]
+        + [f'insider_scan_{r}_{level}' for r in ranges for level in ('high', 'medium', 'all')]
+    )
+
+
+def test_small_non_kol_trade_leaves_kol_and_insider_views(app_module):
+    keys = app_module.dependent_keys(app_module.transaction_event([trade('sig1', tx_type='SELL', age=10)]))
+
+    assert 'transactions_1h_sell' in keys
+    assert not [key for key in keys if key.startswith(('kol_feed_', 'insider_scan_'))]
+
+
+def test_rows_from_other_writers_invalidate_through_the_tailer(app_module, buffer, table, kol):
+    dependent = ['kol_feed_1h', 'transactions_1h_all', f'trader_profile_{WALLET}']
+    for key in dependent + ['transactions_1h_sell']:
+        app_module.cache_raw.set(key, b'cached')
+
+    # Written by the edge function or the sync job, not this app's webhook writer
+    table.rows = [trade('sig-edge')]
+    buffer.refresh()
+
+    assert app_module.cache_raw.exists(*dependent) == 0
+    assert app_module.cache_raw.exists('transactions_1h_sell') == 1
+
+    # The overlap re-reads the same row on the next poll without dropping anything again
+    app_module.cache_raw.set('kol_feed_1h', b'cached')
+    buffer.refresh()
+    assert app_module.cache_raw.exists('kol_feed_1h') == 1
+
+
+def test_rows_from_the_bus_invalidate_once(app_module, buffer):
+    app_module.cache_raw.set('transactions_1h_all', b'cached')
+    event = {"rows": [trade('sig-bus')]}
+
+    app_module.invalidation_bus.apply(event)
+    assert app_module.cache_raw.exists('transactions_1h_all') == 0
+
+    app_module.cache_raw.set('transactions_1h_all', b'cached')
+    app_module.invalidation_bus.apply(event)
+    assert app_module.cache_raw.exists('transactions_1h_all') == 1
+
+
+@pytest.mark.parametrize('args', [{'type': 'BUY'}, {'type': 'Buy', 'timeRange': '2h'}])
+def test_transactions_are_cached_under_the_key_a_new_trade_drops(app_module, client, buffer, args):
+    # Regression: filters are normalized before the cache key is built, so
+    # odd casing or an unknown range can't cache a view nothing invalidates
+    app_module.response_cache.invalidate('transactions_24h_buy')
+    assert app_module.transaction_filters(args) == ('24h', 'buy')
+
+    assert client.get('/api/transactions', query_string=args).status_code == 200
+    assert app_module.cache_raw.exists('transactions_24h_buy') == 1
+
+    buffer.add([trade(f"sig-{args['type']}")])
+    assert app_module.cache_raw.exists('transactions_24h_buy') == 0
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+import key_pool
+from key_pool import KeyPool, RateLimited
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(key_pool.time, 'monotonic', clock)
+    return clock
+
+
+def pool(*names, rate=1, burst=2, cooldown=5):
+    return KeyPool([(name, f'{name}-secret') for name in names], rate=rate, burst=burst, cooldown=cooldown)
+
+
+def test_tokens_refill_at_the_key_rate(clock):
+    keys = pool('key_1')
+    keys.acquire(timeout=0)
+    keys.acquire(timeout=0)
+    with pytest.raises(RateLimited) as e:
+        keys.acquire(timeout=0)
+    assert e.value.retry_after == 1
+
+    clock.now += 0.5
+    with pytest.raises(RateLimited):
+        keys.acquire(timeout=0)
+    clock.now += 0.5
+    assert keys.acquire(timeout=0).name == 'key_1'
+
+
+def test_tokens_stop_at_the_burst(clock):
+    keys = pool('key_1')
+    clock.now += 60
+    assert keys.stats()['key_1']['tokens'] == 2
+
+
+def test_acquire_waits_for_the_next_token():
+    keys = pool('key_1', rate=20, burst=1)
+    keys.acquire(timeout=0)
+
+    started = time.monotonic()
+    assert keys.acquire(timeout=2).name == 'key_1'
+    assert 0.04 <= time.monotonic() - started < 1
+
+
+def test_rotates_to_the_key_with_the_most_tokens(clock):
+    keys = pool('key_1', 'key_2', burst=3)
+
+    names = [keys.acquire(timeout=0).name for _ in range(6)]
+
+    assert sorted(names) == ['key_1'] * 3 + ['key_2'] * 3
+    assert names[:2] in (['key_1', 'key_2'], ['key_2', 'key_1'])
+    with pytest.raises(RateLimited):
+        keys.acquire(timeout=0)
+
+
+def test_throttled_key_sits_out_its_cooldown(clock):
+    keys = pool('key_1', 'key_2', rate=10, burst=10)
+    throttled = keys.acquire(timeout=0)
+    keys.report(throttled, 429, retry_after='3')
+
+    others = {keys.acquire(timeout=0).name for _ in range(5)}
+    assert throttled.name not in others
+
+    clock.now += 3
+    assert keys.stats()[throttled.name]['cooldown_remaining'] == 0
+    assert throttled.name in {keys.acquire(timeout=0).name for _ in range(10)}
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {'Retry-After': '30'} if status_code == 429 else {}
+
+    def raise_for_status(self):
+        pass
+
+
+def test_helius_get_moves_to_the_next_key_on_429(app_module, monkeypatch):
+    keys = pool('key_1', 'key_2', 'key_3', rate=10, burst=10)
+    sent = []
+
+    def get(path, params):
+        sent.append(params['api-key'])
+        return Response(429 if len(sent) == 1 else 200)
+
+    monkeypatch.setattr(app_module, 'helius_keys', keys)
+    monkeypatch.setattr(app_module.helius, 'get', get)
+
+    assert app_module.helius_get('/v0/addresses/wallet/transactions').status_code == 200
+    assert len(set(sent)) == 2
+    assert keys.stats()[sent[0].split('-')[0]]['throttled'] == 1
+
+
+def test_helius_get_gives_up_once_every_key_is_throttled(app_module, monkeypatch):
+    keys = pool('key_1', 'key_2', 'key_3', rate=10, burst=10)
+    sent = []
+
+    def get(path, params):
+        sent.append(params['api-key'])
+        return Response(429)
+
+    monkeypatch.setattr(app_module, 'helius_keys', keys)
+    monkeypatch.setattr(app_module.helius, 'get', get)
+
+    with pytest.raises(RateLimited) as e:
+        app_module.helius_get('/v0/addresses/wallet/transactions')
+    assert sorted(sent) == ['key_1-secret', 'key_2-secret', 'key_3-secret']
+    assert e.value.retry_after == pytest.approx(30, abs=1)
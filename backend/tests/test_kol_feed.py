@@ -0,0 +1,50 @@
+import pytest
+
+NOW = 1_790_000_000
+KOL = 'KoLwa11et1111111111111111111111111111111111'
+UNKNOWN = 'Unknownwa11et111111111111111111111111111111'
+
+
+def trade(i, wallet, side='buy'):
+    return {
+        'id': i,
+        'wallet': wallet,
+        'side': side,
+        'time': NOW - 1000 + i,
+        'timestamp': '2026-09-21T14:13:20+00:00',
+        'token': 'MEME',
+        'tokenContract': 'MemeMint',
+        'amount': float(i),
+        'pnl': 0.0,
+        'pnlPercentage': 0.0
+    }
+
+
+@pytest.fixture(autouse=True)
+def profiles(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.kol_index, 'get', lambda wallet: {'name': 'KOL'} if wallet == KOL else None)
+
+
+def render(app_module, trades, tx_type='all', sort_by='time', limit=5):
+    dataset = {'trades': trades, 'built_at': '2026-09-21T14:13:20+00:00'}
+    return app_module.render_kol_feed(dataset, '24h', tx_type, sort_by, limit, NOW)['data']
+
+
+@pytest.mark.parametrize('sort_by', ['time', 'volume'])
+def test_trades_without_a_profile_do_not_take_places(app_module, sort_by):
+    # The newest and largest trades come from a wallet with no profile
+    trades = [trade(i, KOL) for i in range(10)] + [trade(i, UNKNOWN) for i in range(10, 20)]
+
+    data = render(app_module, trades, sort_by=sort_by)
+
+    assert [item['id'] for item in data] == [9, 8, 7, 6, 5]
+    assert {item['walletAddress'] for item in data} == {KOL}
+
+
+def test_type_filter_applies_before_the_limit(app_module):
+    trades = [trade(i, KOL, side='sell' if i % 2 else 'buy') for i in range(10)]
+
+    data = render(app_module, trades, tx_type='sell', limit=3)
+
+    assert [item['id'] for item in data] == [9, 7, 5]
+    assert {item['lastTx'] for item in data} == {'sell'}
@@ -0,0 +1,82 @@
+import fakeredis
+import pytest
+
+from metrics import Metrics
+
+BUCKETS = (0.1, 0.5, 2.5, 10)
+
+
+def registry(redis_client=None):
+    metrics = Metrics(redis_client, flush_interval=60)
+    metrics.counter('requests_total', 'Requests')
+    metrics.histogram('latency_seconds', 'Latency', buckets=BUCKETS)
+    return metrics
+
+
+def samples(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def le(line):
+    return line.split('le="', 1)[1].split('"', 1)[0]
+
+
+@pytest.mark.parametrize('redis_client', [None, fakeredis.FakeStrictRedis()], ids=['local', 'redis'])
+def test_buckets_render_in_increasing_le_order_with_inf_last(redis_client):
+    metrics = registry(redis_client)
+    for value in (0.05, 3, 20):
+        metrics.observe('latency_seconds', value, route='/a')
+        metrics.observe('latency_seconds', value, route='/b')
+
+    text = metrics.render()
+
+    for route in ('/a', '/b'):
+        lines = samples(text, f'latency_seconds_bucket{{route="{route}"')
+        # Lexically "10.0" < "2.5"; the order must be numeric
+        assert [le(line) for line in lines] == ['0.1', '0.5', '2.5', '10.0', '+Inf']
+        assert [float(line.rsplit(' ', 1)[1]) for line in lines] == [1, 1, 1, 2, 3]
+
+
+def test_histogram_sum_and_count_follow_the_buckets():
+    metrics = registry()
+    metrics.observe('latency_seconds', 0.25)
+    metrics.observe('latency_seconds', 4)
+
+    text = metrics.render()
+    names = [line.split('{', 1)[0].split(' ', 1)[0] for line in text.splitlines() if not line.startswith('#')]
+
+    assert names == ['latency_seconds_bucket'] * 4 + ['latency_seconds_sum', 'latency_seconds_count']
+    assert [le(line) for line in samples(text, 'latency_seconds_bucket')] == ['0.5', '2.5', '10.0', '+Inf']
+    assert samples(text, 'latency_seconds_sum') == ['latency_seconds_sum 4.25']
+    assert samples(text, 'latency_seconds_count') == ['latency_seconds_count 2']
+
+
+def test_registries_sharing_redis_add_up(redis_raw):
+    first, second = registry(redis_raw), registry(redis_raw)
+    first.inc('requests_total', route='/a')
+    second.inc('requests_total', 2, route='/a')
+    second.inc('requests_total', route='/b')
+    first.observe('latency_seconds', 0.3, route='/a')
+    second.observe('latency_seconds', 7, route='/a')
+    # Each worker flushes its own deltas on its own schedule
+    first.flush()
+    second.flush()
+
+    for metrics in (first, second):
+        text = metrics.render()
+        assert samples(text, 'requests_total') == ['requests_total{route="/a"} 3', 'requests_total{route="/b"} 1']
+        assert [float(line.rsplit(' ', 1)[1]) for line in samples(text, 'latency_seconds_sum')] == [pytest.approx(7.3)]
+        assert samples(text, 'latency_seconds_count') == ['latency_seconds_count{route="/a"} 2']
+        buckets = samples(text, 'latency_seconds_bucket')
+        assert [(le(line), line.rsplit(' ', 1)[1]) for line in buckets] == [('0.5', '1'), ('2.5', '1'), ('10.0', '2'), ('+Inf', '2')]
+
+
+def test_failed_flush_keeps_the_deltas(redis_server, redis_raw):
+    metrics = registry(redis_raw)
+    metrics.inc('requests_total')
+
+    redis_server.connected = False
+    metrics.flush()
+    redis_server.connected = True
+
+    assert metrics.totals() == {'requests_total': 1.0}
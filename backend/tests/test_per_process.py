@@ -0,0 +1,53 @@
+import os
+
+from per_process import PerProcess
+
+
+class Factory:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+
+def test_value_is_made_once_per_process():
+    factory = Factory()
+    holder = PerProcess(factory)
+
+    assert holder.current is None
+    first = holder.get()
+
+    assert holder.get() is first
+    assert holder.current is first
+    assert factory.calls == 1
+
+
+def test_a_forked_child_makes_its_own_value():
+    holder = PerProcess(Factory())
+    parent = holder.get()
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Child: the parent's value is not reused, and a new one is made once
+        ok = holder.current is None and holder.get() is not parent and holder.get() is holder.get()
+        os.write(write, b'1' if ok else b'0')
+        os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+
+    assert os.read(read, 1) == b'1'
+    assert holder.get() is parent
+
+
+def test_reset_makes_a_new_value():
+    factory = Factory()
+    holder = PerProcess(factory)
+    first = holder.get()
+
+    holder.reset()
+
+    assert holder.get() is not first
+    assert factory.calls == 2
@@ -0,0 +1,86 @@
+import re
+
+import pytest
+
+from postgrest import Query, quote_value
+
+VALUE = r'("(?:[^"\\]|\\.)*"|[^,()]*)'
+SEEK = re.compile(rf'^\((\w+)\.(lt|gt)\.{VALUE},and\((\w+)\.eq\.{VALUE},(\w+)\.(lt|gt)\.{VALUE}\)\)$')
+
+
+def unquote(value):
+    if value.startswith('"'):
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+
+class TableClient:
+    # Answers the subset of PostgREST that seek_pages sends: order, limit and the keyset or=()
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def get_json(self, table, params):
+        self.requests.append(params)
+        params = dict(params)
+        rows = list(self.rows)
+
+        if 'or' in params:
+            column, op, value, _, _, tiebreak, _, key = SEEK.match(params['or']).groups()
+            value, key = unquote(value), unquote(key)
+            after = (lambda a, b: a < b) if op == 'lt' else (lambda a, b: a > b)
+            rows = [
+                row for row in rows
+                if after(row[column], value) or (row[column] == value and after(row[tiebreak], key))
+            ]
+
+        for term in reversed(params['order'].split(',')):
+            column, direction = term.rsplit('.', 1)
+            rows.sort(key=lambda row: row[column], reverse=direction == 'desc')
+        return rows[:int(params['limit'])]
+
+
+def make_rows(count):
+    # Many rows share a block_time, and the timestamps need quoting
+    return [
+        {'block_time': f'2026-01-01T00:00:{i // 3:02d}+00:00', 'transaction_signature': f'sig{i:03d}'}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('desc', [True, False])
+@pytest.mark.parametrize('count', [0, 4, 12, 25])
+def test_seek_pages_returns_every_row_once_in_order(desc, count):
+    rows = make_rows(count)
+    client = TableClient(rows)
+
+    pages = list(Query('webhook_transactions').seek_pages(
+        client, 'block_time', 'transaction_signature', page_size=4, desc=desc
+    ))
+
+    expected = sorted(rows, key=lambda row: (row['block_time'], row['transaction_signature']), reverse=desc)
+    assert [row for page in pages for row in page] == expected
+    assert all(len(page) == 4 for page in pages[:-1])
+    # A final short (or empty) page ends the walk without an extra request
+    assert len(client.requests) == count // 4 + 1
+
+
+def test_seek_pages_uses_cursors_not_offsets():
+    client = TableClient(make_rows(9))
+
+    list(Query('webhook_transactions').seek_pages(client, 'block_time', 'transaction_signature', page_size=4))
+
+    first, second = (dict(params) for params in client.requests[:2])
+    assert 'offset' not in first and 'offset' not in second
+    assert first['order'] == 'block_time.desc,transaction_signature.desc'
+    assert second['or'] == (
+        '(block_time.lt."2026-01-01T00:00:01+00:00",'
+        'and(block_time.eq."2026-01-01T00:00:01+00:00",transaction_signature.lt.sig005))'
+    )
+
+
+def test_quote_value_escapes_reserved_characters():
+    assert quote_value('plain') == 'plain'
+    assert quote_value('a,b') == '"a,b"'
+    assert quote_value('say "hi"') == '"say \\"hi\\""'
+    assert quote_value(5) == '5'
@@ -0,0 +1,102 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from recent_store import RecentTransactions
+
+COLUMNS = ['transaction_signature', 'block_time', 'created_at', 'from_address', 'token_mint']
+
+
+class Table:
+    # Answers the subset of PostgREST the buffer sends: gte filters, order, limit and offset
+    def __init__(self):
+        self.rows = []
+        self.requests = []
+
+    def get_json(self, table, params):
+        self.requests.append(params)
+        rows = list(self.rows)
+        options = {}
+        for name, value in params:
+            if value.startswith('gte.'):
+                rows = [row for row in rows if row[name] >= value[4:]]
+            else:
+                options[name] = value
+        for term in reversed(options['order'].split(',')):
+            column, direction = term.rsplit('.', 1)
+            rows.sort(key=lambda row: row[column], reverse=direction == 'desc')
+        offset = int(options.get('offset', 0))
+        return rows[offset:offset + int(options['limit'])]
+
+
+def isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def row(signature, created_at, age=60):
+    return {
+        'transaction_signature': signature,
+        'block_time': isoformat(time.time() - age),
+        'created_at': isoformat(created_at),
+        'from_address': 'W1',
+        'token_mint': 'M1'
+    }
+
+
+@pytest.fixture
+def table():
+    return Table()
+
+
+def signatures(buffer):
+    # Also starts the buffer's tailer, so check requests before calling this
+    return {tx['transaction_signature'] for tx in buffer.window(time.time() - 3600, 1000)}
+
+
+def test_late_row_inside_the_overlap_is_picked_up(table):
+    # Regression: polls used to read created_at >= the newest one seen, so a
+    # row committing late with an earlier created_at was never buffered
+    now = time.time()
+    table.rows = [row('a', now - 100), row('b', now - 50)]
+    buffer = RecentTransactions(table, COLUMNS, overlap=30)
+    buffer.load()
+
+    table.rows += [row('late', now - 70), row('too-late', now - 90), row('c', now - 10)]
+    added = buffer.refresh()
+
+    assert added == 2
+    assert dict(table.requests[-1])['created_at'] == f'gte.{isoformat(now - 80)}'
+    assert signatures(buffer) == {'a', 'b', 'late', 'c'}
+
+
+def test_overlap_is_re_read_without_duplicates(table):
+    now = time.time()
+    table.rows = [row('a', now - 20), row('b', now - 10)]
+    buffer = RecentTransactions(table, COLUMNS, overlap=30)
+    buffer.load()
+
+    assert buffer.refresh() == 0
+    assert buffer.refresh() == 0
+    assert signatures(buffer) == {'a', 'b'}
+
+
+def test_no_periodic_reload_by_default(table):
+    table.rows = [row('a', time.time() - 10)]
+    buffer = RecentTransactions(table, COLUMNS)
+    buffer.load()
+    for _ in range(3):
+        buffer.refresh()
+
+    # One load query, then only tail queries by created_at
+    assert [dict(params).get('block_time', '')[:4] for params in table.requests] == ['gte.', '', '', '']
+
+
+def test_reload_when_an_interval_is_set(table):
+    table.rows = [row('a', time.time() - 10)]
+    buffer = RecentTransactions(table, COLUMNS, reload_interval=0.01)
+    buffer.load()
+    time.sleep(0.02)
+    buffer.refresh()
+
+    assert 'block_time' in dict(table.requests[-1])
@@ -0,0 +1,90 @@
+import pytest
+from redis.exceptions import ResponseError
+
+import redis_guard
+from redis_guard import RedisGuard, RedisUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(redis_guard.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def guard(redis_raw, clock):
+    return RedisGuard(redis_raw, retry_interval=2)
+
+
+@pytest.fixture
+def client(guard, redis_raw):
+    return guard.wrap(redis_raw)
+
+
+def go_down(redis_server, client):
+    redis_server.connected = False
+    with pytest.raises(redis_guard.ConnectionError):
+        client.get('key')
+
+
+def test_connection_error_marks_redis_down(redis_server, guard, client):
+    go_down(redis_server, client)
+
+    assert guard.available is False
+    assert guard.stats()["outages"] == 1
+    # Later calls fail at once, even once the server answers again, until a probe
+    redis_server.connected = True
+    with pytest.raises(RedisUnavailable):
+        client.get('key')
+    with pytest.raises(RedisUnavailable):
+        pipe = client.pipeline(transaction=False)
+        pipe.set('key', 1)
+        pipe.execute()
+
+
+def test_probe_after_retry_interval_brings_redis_back(redis_server, guard, client, clock):
+    go_down(redis_server, client)
+
+    clock.now += 2
+    with pytest.raises(RedisUnavailable):
+        client.get('key')
+    assert guard.available is False
+
+    redis_server.connected = True
+    clock.now += 1
+    # The next probe isn't due yet
+    with pytest.raises(RedisUnavailable):
+        client.get('key')
+    clock.now += 1
+    client.set('key', 'value')
+    assert guard.available is True
+    assert client.get('key') == b'value'
+    assert guard.stats() == {"available": True, "down_since": None, "last_error": guard.last_error, "outages": 1}
+
+
+def test_command_errors_do_not_mark_redis_down(guard, client):
+    client.set('key', 'text')
+    with pytest.raises(ResponseError):
+        client.incr('key')
+    assert guard.available is True
+
+
+def test_scripts_register_while_down_and_run_once_back(redis_server, guard, client, clock):
+    go_down(redis_server, client)
+    script = client.register_script("return redis.call('INCR', KEYS[1])")
+
+    with pytest.raises(RedisUnavailable):
+        script(keys=['counter'])
+
+    redis_server.connected = True
+    clock.now += 2
+    assert script(keys=['counter']) == 1
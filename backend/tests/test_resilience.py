@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpen, Hedger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('supabase', failure_threshold=3, reset_timeout=30)
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(breaker):
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == 'closed'
+
+    fail(breaker, 1)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    assert breaker.stats() == {"state": "open", "failures": 3, "opened": 1, "rejected": 1}
+
+
+def test_half_open_trial_success_closes(breaker, clock):
+    fail(breaker, 3)
+
+    clock.now += 30
+    breaker.allow()
+    assert breaker.state == 'half_open'
+    # Only the one trial call goes through
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+    breaker.allow()
+
+
+def test_half_open_trial_failure_reopens(breaker, clock):
+    fail(breaker, 3)
+
+    clock.now += 29
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    clock.now += 1
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == 'open'
+    assert breaker.opened == 2
+    clock.now += 29
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+
+
+def warmed_hedger(**options):
+    # Enough fast samples that the hedge delay is min_delay
+    hedger = Hedger(percentile=95, window=20, min_samples=10, min_delay=0.05, **options)
+    for _ in range(10):
+        hedger.record(0.001)
+    assert hedger.delay() == 0.05
+    return hedger
+
+
+class Upstream:
+    # The first request is slow; every later one answers at once
+    def __init__(self, slow=1.0):
+        self.slow = slow
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.slow)
+        return call
+
+
+def test_no_hedge_until_enough_samples():
+    hedger = Hedger(min_samples=10)
+    upstream = Upstream(slow=0.1)
+
+    assert hedger.run(upstream) == 1
+    assert upstream.calls == 1
+    assert hedger.hedged == 0
+
+
+def test_hedges_a_request_slower_than_the_percentile():
+    hedger = warmed_hedger(max_ratio=0.5)
+    upstream = Upstream()
+    winners = []
+
+    started = time.perf_counter()
+    assert hedger.run(upstream, on_hedge=winners.append) == 2
+    elapsed = time.perf_counter() - started
+
+    assert winners == ['hedge']
+    assert 0.05 <= elapsed < 0.5
+    assert hedger.stats()["hedged"] == hedger.stats()["hedge_wins"] == 1
+
+
+def test_fast_request_is_not_hedged():
+    hedger = warmed_hedger(max_ratio=0.5)
+    winners = []
+
+    assert hedger.run(lambda: 'fast', on_hedge=winners.append) == 'fast'
+    assert winners == []
+    assert hedger.hedged == 0
+
+
+def test_hedges_are_capped_by_max_ratio():
+    # 0.1 of min_samples allows one hedge until the window fills
+    hedger = warmed_hedger(max_ratio=0.1)
+
+    hedger.run(Upstream(slow=0.2))
+    hedger.run(Upstream(slow=0.2))
+
+    assert hedger.hedged == 1
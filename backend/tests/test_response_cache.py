@@ -0,0 +1,142 @@
+import time
+
+import pytest
+
+import response_cache as response_cache_module
+from codec import JsonCodec
+from local_cache import LocalCache
+from response_cache import ResponseCache, content_etag
+from single_flight import SingleFlight
+
+TTLS = {'feed': (60, 240)}
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+class Compute:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"version": self.calls}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(redis_raw):
+    cache = ResponseCache(redis_raw, SingleFlight(redis_raw, wait_timeout=2), TTLS, JsonCodec())
+    yield cache
+    if cache._executor.current is not None:
+        cache._executor.current.shutdown(wait=True)
+
+
+def wait_for_refresh(cache):
+    cache._executor.get().shutdown(wait=True)
+    cache._executor.reset()
+
+
+def test_miss_computes_once_and_stores_with_hard_ttl(cache, redis_raw, clock):
+    compute = Compute()
+    first = cache.fetch('feed', 'feed_1h', compute)
+    second = cache.fetch('feed', 'feed_1h', compute)
+
+    assert compute.calls == 1
+    assert first == second
+    assert first.body == b'{"version":1}'
+    assert 0 < redis_raw.ttl('feed_1h') <= 240
+    assert cache.soft_expires(['feed_1h', 'absent']) == {'feed_1h': pytest.approx(clock.now + 60, abs=0.01), 'absent': None}
+
+
+def test_etag_is_the_content_hash_of_the_body(cache, clock):
+    cached = cache.fetch('feed', 'feed_1h', Compute())
+
+    assert cached.etag == content_etag(cached.body)
+    assert cache.encode({"version": 1}).etag == cached.etag
+    assert cache.encode({"version": 2}).etag != cached.etag
+
+
+def test_fresh_until_soft_ttl(cache, clock):
+    cache.fetch('feed', 'feed_1h', Compute())
+
+    clock.now += 59
+    assert cache.get_entry('feed_1h')[1] is True
+    clock.now += 2
+    assert cache.get_entry('feed_1h')[1] is False
+
+
+def test_stale_entry_is_served_while_refreshed_in_background(cache, clock):
+    compute = Compute()
+    original = cache.fetch('feed', 'feed_1h', compute)
+
+    clock.now += 61
+    served = cache.fetch('feed', 'feed_1h', compute)
+    wait_for_refresh(cache)
+
+    assert served == original
+    assert compute.calls == 2
+    refreshed, fresh = cache.get_entry('feed_1h')
+    assert fresh
+    assert refreshed.body == b'{"version":2}'
+    assert refreshed.etag != original.etag
+
+
+def test_entry_past_hard_ttl_is_a_miss(cache, redis_raw, clock):
+    compute = Compute()
+    cache.fetch('feed', 'feed_1h', compute)
+
+    # Redis drops the entry at the hard TTL
+    redis_raw.delete('feed_1h')
+    cached = cache.fetch('feed', 'feed_1h', compute)
+
+    assert compute.calls == 2
+    assert cached.body == b'{"version":2}'
+
+
+def test_local_copy_never_outlives_soft_ttl(redis_raw, clock):
+    local = LocalCache()
+    cache = ResponseCache(redis_raw, SingleFlight(redis_raw), TTLS, JsonCodec(), local=local, local_ttl=300)
+    cache.fetch('feed', 'feed_1h', Compute())
+
+    clock.now += 61
+    redis_raw.delete('feed_1h')
+    assert cache.get_entry('feed_1h') is None
+
+
+def test_invalidate_drops_local_and_redis_copies(redis_raw, clock):
+    local = LocalCache()
+    cache = ResponseCache(redis_raw, SingleFlight(redis_raw), TTLS, JsonCodec(), local=local)
+    cache.fetch('feed', 'feed_1h', Compute())
+    cache.fetch('feed', 'feed_24h', Compute())
+
+    cache.invalidate('feed_1h', 'feed_24h')
+
+    assert local.keys() == []
+    assert redis_raw.exists('feed_1h', 'feed_24h') == 0
+
+
+def test_fetch_many_fills_only_missing_keys(cache, clock):
+    requested = []
+
+    def compute_many(idents):
+        requested.append(sorted(idents))
+        return {ident: {"mint": ident} for ident in idents if ident != 'unknown'}
+
+    cache.fetch_many('feed', {'price_a': 'a'}, compute_many)
+    results = cache.fetch_many('feed', {'price_a': 'a', 'price_b': 'b', 'price_c': 'unknown'}, compute_many)
+
+    assert requested == [['a'], ['b', 'unknown']]
+    assert set(results) == {'price_a', 'price_b'}
+    assert results['price_b'].body == b'{"mint":"b"}'
@@ -0,0 +1,87 @@
+import threading
+
+from single_flight import SingleFlight
+
+
+def test_threads_in_one_process_share_one_compute():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('key', compute)))
+    leader.start()
+    started.wait(5)
+    assert flights.in_flight('key')
+
+    waiter = threading.Thread(target=lambda: results.append(flights.do('key', compute)))
+    waiter.start()
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert results == ['value', 'value']
+    assert len(calls) == 1
+    assert not flights.in_flight('key')
+
+
+def test_waiter_polls_the_cache_the_lock_holder_fills(redis_text):
+    # Two workers: the first takes the Redis lock and computes, the second
+    # reads what it wrote instead of computing again
+    holder, waiter = (SingleFlight(redis_text, poll_interval=0.01) for _ in range(2))
+    cache = {}
+    started, release = threading.Event(), threading.Event()
+    computed = []
+
+    def slow_compute():
+        computed.append('holder')
+        started.set()
+        release.wait(5)
+        cache['key'] = 'fresh'
+        return 'fresh'
+
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(
+        holder=holder.do('key', slow_compute, lookup=lambda: cache.get('key'))))
+    thread.start()
+    started.wait(5)
+    assert redis_text.get('lock:key') is not None
+
+    threading.Timer(0.05, release.set).start()
+    results['waiter'] = waiter.do('key', lambda: computed.append('waiter'), lookup=lambda: cache.get('key'))
+    thread.join(5)
+
+    assert results == {'holder': 'fresh', 'waiter': 'fresh'}
+    assert computed == ['holder']
+    assert redis_text.get('lock:key') is None
+
+
+def test_waiter_serves_stale_while_the_lock_is_held(redis_text):
+    redis_text.set('lock:key', 'other-worker')
+    flights = SingleFlight(redis_text)
+
+    value = flights.do('key', lambda: 'computed', lookup=lambda: None, stale=lambda: 'stale')
+
+    assert value == 'stale'
+    # Someone else's lock is left alone
+    assert redis_text.get('lock:key') == 'other-worker'
+
+
+def test_waiter_computes_itself_after_wait_timeout(redis_text):
+    redis_text.set('lock:key', 'other-worker')
+    flights = SingleFlight(redis_text, wait_timeout=0.05, poll_interval=0.01)
+
+    assert flights.do('key', lambda: 'computed', lookup=lambda: None) == 'computed'
+
+
+def test_computes_without_the_lock_when_redis_is_down(redis_server, redis_text):
+    redis_server.connected = False
+    flights = SingleFlight(redis_text)
+
+    assert flights.do('key', lambda: 'computed', lookup=lambda: None) == 'computed'
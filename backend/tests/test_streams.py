@@ -0,0 +1,50 @@
+import os
+import runpy
+
+import pytest
+
+from stream_hub import StreamBusy, StreamHub
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_subscribers_are_capped_per_worker():
+    hub = StreamHub(lambda rows: [], max_subscribers=2)
+    first = hub.subscribe('transactions')
+    hub.subscribe('kol')
+
+    with pytest.raises(StreamBusy):
+        hub.subscribe('transactions')
+
+    hub.unsubscribe(first)
+    hub.subscribe('transactions')
+
+
+def test_zero_subscribers_refuses_every_stream():
+    hub = StreamHub(lambda rows: [], max_subscribers=0)
+    with pytest.raises(StreamBusy):
+        hub.subscribe('transactions')
+    assert hub.stats()['subscribers'] == 0
+
+
+@pytest.mark.parametrize('worker_class, expected', [('sync', '0'), ('gevent', None)])
+def test_sync_workers_refuse_streams_by_default(monkeypatch, worker_class, expected):
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', worker_class)
+    monkeypatch.delenv('STREAM_MAX_SUBSCRIBERS', raising=False)
+    if worker_class == 'gevent':
+        monkeypatch.setattr('gevent.monkey.patch_all', lambda: None)
+
+    runpy.run_path(os.path.join(BACKEND_DIR, 'gunicorn_config.py'))
+
+    assert os.environ.get('STREAM_MAX_SUBSCRIBERS') == expected
+
+
+@pytest.mark.parametrize('path', ['/api/stream/transactions', '/api/stream/kol-feed'])
+def test_refused_stream_is_a_503(app_module, client, monkeypatch, path):
+    monkeypatch.setattr(app_module.stream_hub, 'max_subscribers', 0)
+
+    response = client.get(path)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert response.get_json()['success'] is False
@@ -0,0 +1,102 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from wallet_stats import WalletStats, summarize
+
+WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+BUY_TYPES = ['SWAP', 'BUY']
+NOW = 1_790_000_000
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        ts = NOW - rng.uniform(0, 8 * 86400)
+        rows.append({
+            'transaction_signature': f'sig{i}',
+            'block_time': datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+            'transaction_type': rng.choice(['BUY', 'SELL', 'SWAP']),
+            'amount': round(rng.uniform(0.1, 1000), 3)
+        })
+    return rows
+
+
+def rounded(windows):
+    return {
+        name: {**window, 'volume': pytest.approx(round(window['volume'], 6), abs=1e-6)}
+        for name, window in windows.items()
+    }
+
+
+@pytest.fixture
+def stats(redis_text):
+    return WalletStats(redis_text, WINDOWS, BUY_TYPES)
+
+
+def test_unsynced_wallet_has_no_stats(stats):
+    stats.add('W1', make_rows(5))
+    assert stats.get('W1', now=NOW) is None
+
+
+def test_matches_summarize(stats):
+    rows = make_rows(300)
+    stats.add('W1', rows, synced_at='2026-01-01T00:00:00+00:00')
+
+    result = stats.get('W1', now=NOW)
+
+    assert result.synced_at == '2026-01-01T00:00:00+00:00'
+    assert result.windows == rounded(summarize(rows, WINDOWS, BUY_TYPES, now=NOW))
+
+
+def test_matches_summarize_as_windows_roll_forward(stats):
+    rows = make_rows(300)
+    stats.add('W1', rows[:200], synced_at='s')
+    stats.get('W1', now=NOW)
+
+    # Later rows arrive while earlier ones age out of every window
+    stats.add('W1', rows[200:])
+    for later in (NOW + 1800, NOW + 3 * 3600, NOW + 2 * 86400):
+        assert stats.get('W1', now=later).windows == rounded(summarize(rows, WINDOWS, BUY_TYPES, now=later))
+
+
+def test_rows_are_counted_once(stats):
+    rows = make_rows(50)
+    stats.add('W1', rows, synced_at='s')
+    added = stats.add('W1', rows[:20] + rows[:20])
+
+    assert added == 0
+    assert stats.get('W1', now=NOW).windows == rounded(summarize(rows, WINDOWS, BUY_TYPES, now=NOW))
+
+
+def test_wallets_are_independent(stats):
+    stats.add('W1', make_rows(40, seed=1), synced_at='s')
+    stats.add('W2', make_rows(10, seed=2), synced_at='s')
+
+    assert stats.get('W2', now=NOW).windows == rounded(summarize(make_rows(10, seed=2), WINDOWS, BUY_TYPES, now=NOW))
+
+
+def test_sync_from_reaches_back_by_the_overlap(stats):
+    assert stats.sync_from('2026-01-01T00:00:30+00:00') == '2026-01-01T00:00:00+00:00'
+    assert stats.sync_from('2026-01-01T00:00:30Z') == '2026-01-01T00:00:00+00:00'
+
+
+def test_late_committed_row_is_counted_once(stats):
+    rows = make_rows(30)
+    for i, row in enumerate(rows):
+        row['created_at'] = f'2026-01-01T00:01:{i:02d}+00:00'
+    # Commits after the sync below, with a created_at 10s before its watermark
+    late = rows.pop(20)
+
+    stats.add('W1', rows, synced_at=rows[-1]['created_at'])
+
+    # The next sync, as wallet_window_stats runs it
+    since = stats.sync_from(stats.get('W1', now=NOW).synced_at)
+    reread = [row for row in rows + [late] if row['created_at'] >= since]
+    added = stats.add('W1', reread, synced_at=max(row['created_at'] for row in reread))
+
+    assert late in reread
+    assert added == 1
+    assert stats.get('W1', now=NOW).windows == rounded(summarize(rows + [late], WINDOWS, BUY_TYPES, now=NOW))
@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from webhook_ingest import SOL_MINT, BatchWriter, QueueFull, normalize
+
+WALLET = 'KoLwa11et1111111111111111111111111111111111'
+POOL = 'Poo1111111111111111111111111111111111111111'
+MINT = 'MemeMint111111111111111111111111111111111111'
+MONITORED = {WALLET}
+
+
+def swap(signature='sig1', token_to=WALLET, token_from=POOL, sol_change=-2_000_000_000, **extra):
+    return {
+        'signature': signature,
+        'timestamp': 1_790_000_000,
+        'type': 'SWAP',
+        'fee': 5000,
+        'feePayer': WALLET,
+        'tokenTransfers': [
+            {'fromUserAccount': token_from, 'toUserAccount': token_to, 'mint': MINT, 'tokenAmount': 1500}
+        ],
+        'accountData': [{'account': WALLET, 'nativeBalanceChange': sol_change}],
+        **extra
+    }
+
+
+def test_buy():
+    row = normalize(swap(), MONITORED)
+
+    assert row['transaction_signature'] == 'sig1'
+    assert row['transaction_type'] == 'BUY'
+    assert row['from_address'] == WALLET
+    assert row['to_address'] == POOL
+    assert row['token_mint'] == MINT
+    assert row['amount'] == row['token_amount'] == 1500
+    assert row['token_symbol'] == MINT[:6].upper()
+    assert row['sol_amount'] == pytest.approx(-2)
+    assert row['fee'] == pytest.approx(0.000005)
+    assert row['block_time'] == '2026-09-21T14:13:20+00:00'
+
+
+def test_sell():
+    row = normalize(swap(token_to=POOL, token_from=WALLET, sol_change=3_000_000_000), MONITORED)
+
+    assert row['transaction_type'] == 'SELL'
+    assert row['to_address'] == POOL
+    assert row['sol_amount'] == pytest.approx(3)
+
+
+def test_wallet_found_through_transfers():
+    tx = swap(feePayer='SomeRelayer')
+    assert normalize(tx, MONITORED)['from_address'] == WALLET
+
+
+def test_unmonitored_wallet_is_skipped():
+    assert normalize(swap(), {'OtherWallet'}) is None
+
+
+def test_plain_transfer_is_skipped():
+    tx = {
+        'signature': 'sig2',
+        'type': 'TRANSFER',
+        'feePayer': WALLET,
+        'nativeTransfers': [{'fromUserAccount': WALLET, 'toUserAccount': POOL, 'amount': 1_000_000_000}],
+        'accountData': [{'account': WALLET, 'nativeBalanceChange': -1_000_000_000}]
+    }
+    assert normalize(tx, MONITORED) is None
+
+
+def test_sol_only_transfers_have_no_token():
+    tx = swap()
+    tx['tokenTransfers'][0]['mint'] = SOL_MINT
+    assert normalize(tx, MONITORED) is None
+
+
+def test_missing_signature_is_skipped():
+    assert normalize(swap(signature=None), MONITORED) is None
+
+
+def test_token_from_balance_changes_without_transfers():
+    tx = swap(tokenTransfers=[])
+    tx['accountData'][0]['tokenBalanceChanges'] = [
+        {'mint': MINT, 'rawTokenAmount': {'tokenAmount': '2500000', 'decimals': 6}}
+    ]
+    row = normalize(tx, MONITORED)
+
+    assert row['transaction_type'] == 'BUY'
+    assert row['token_mint'] == MINT
+    assert row['amount'] == pytest.approx(2.5)
+
+
+@pytest.mark.parametrize('malform', [
+    lambda tx: tx.update(tokenTransfers=[], accountData=[{'account': WALLET, 'tokenBalanceChanges': [{'mint': MINT, 'rawTokenAmount': {'tokenAmount': 'n/a'}}]}]),
+    lambda tx: tx.update(timestamp='yesterday'),
+    lambda tx: tx['tokenTransfers'].append('not a transfer'),
+])
+def test_malformed_transaction_is_skipped_next_to_a_valid_one(malform):
+    bad = swap(signature='bad')
+    malform(bad)
+
+    rows = [normalize(tx, MONITORED) for tx in (bad, swap(signature='good'))]
+
+    assert rows[0] is None
+    assert rows[1]['transaction_signature'] == 'good'
+
+
+def test_balance_change_without_raw_amount_is_ignored():
+    tx = swap()
+    tx['accountData'][0]['tokenBalanceChanges'] = [{'mint': MINT}]
+    assert normalize(tx, MONITORED)['transaction_type'] == 'BUY'
+
+
+def test_drain_waits_for_a_batch_being_written():
+    written = []
+    started = threading.Event()
+
+    def write_batch(rows):
+        started.set()
+        time.sleep(0.2)
+        written.extend(rows)
+
+    writer = BatchWriter(write_batch, flush_interval=0.01)
+    writer.submit([1, 2, 3])
+    started.wait(1)
+    writer.drain(timeout=2)
+
+    assert written == [1, 2, 3]
+
+
+def test_submit_is_all_or_nothing():
+    writer = BatchWriter(lambda rows: time.sleep(1), max_queue=2, flush_interval=5)
+    writer.submit([1, 2])
+    with pytest.raises(QueueFull):
+        writer.submit([3, 4, 5])
+    assert writer.stats()['queued'] <= 2
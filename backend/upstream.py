@@ -0,0 +1,196 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from resilience import CircuitBreaker, CircuitOpen, Hedger
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def _env(name, key, default, cast):
+    value = os.getenv(f'{name.upper()}_{key}', os.getenv(f'UPSTREAM_{key}'))
+    if value is None or value == '':
+        return default
+    return cast(value)
+
+
+def _optional_float(value):
+    # 'off' or 0 disables a feature that is on by default
+    return None if value.lower() == 'off' or float(value) == 0 else float(value)
+
+
+class UpstreamClient:
+    def __init__(self, name, base_url, headers=None, params=None, timeout=10,
+                 connect_timeout=3.05, pool_size=20, retries=2, backoff=0.3, metrics=None,
+                 breaker=None, hedger=None):
+        self.name = name
+        self.base_url = (base_url or '').rstrip('/')
+        self.headers = {k: v for k, v in (headers or {}).items() if v is not None}
+        self.params = {k: v for k, v in (params or {}).items() if v is not None}
+        self.timeout = (connect_timeout, timeout)
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = metrics
+        self.breaker = breaker
+        self.hedger = hedger
+        if metrics is not None:
+            metrics.histogram('upstream_request_duration_seconds', 'Upstream call latency, retries included, by upstream and method')
+            metrics.counter('upstream_responses_total', 'Upstream responses by upstream and status code; status="error" when no response arrived, "circuit_open" when not sent')
+            metrics.counter('upstream_hedges_total', 'Hedged upstream GETs by upstream and which copy answered first')
+        self._local = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name, base_url, headers=None, params=None, timeout=10, metrics=None, hedge_percentile=None):
+        failures = _env(name, 'CIRCUIT_FAILURES', 5, int)
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=failures,
+            reset_timeout=_env(name, 'CIRCUIT_RESET', 30, float)
+        ) if failures > 0 else None
+
+        pool_size = _env(name, 'POOL_SIZE', 20, int)
+        hedge_percentile = _env(name, 'HEDGE_PERCENTILE', hedge_percentile, _optional_float)
+        hedger = Hedger(
+            percentile=hedge_percentile,
+            max_ratio=_env(name, 'HEDGE_MAX_RATIO', 0.1, float),
+            min_delay=_env(name, 'HEDGE_MIN_DELAY', 0.05, float),
+            max_workers=pool_size * 2
+        ) if hedge_percentile else None
+
+        return cls(
+            name,
+            base_url,
+            headers=headers,
+            params=params,
+            timeout=_env(name, 'TIMEOUT', timeout, float),
+            connect_timeout=_env(name, 'CONNECT_TIMEOUT', 3.05, float),
+            pool_size=pool_size,
+            retries=_env(name, 'RETRIES', 2, int),
+            backoff=_env(name, 'BACKOFF', 0.3, float),
+            metrics=metrics,
+            breaker=breaker,
+            hedger=hedger,
+        )
+
+    @property
+    def session(self):
+        # Sessions hold sockets, so each forked gunicorn worker builds its own
+        pid = os.getpid()
+        session = self._local.get(pid)
+        if session is None:
+            with self._lock:
+                session = self._local.get(pid)
+                if session is None:
+                    session = self._build_session()
+                    self._local = {pid: session}
+        return session
+
+    def _build_session(self):
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            # Honouring Retry-After would also make urllib3 sleep on and retry 429s;
+            # rate limits are handled by the caller (see key_pool.py)
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+            pool_block=False,
+        )
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, params=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.params:
+            if params is None or isinstance(params, dict):
+                params = {**self.params, **(params or {})}
+            else:
+                params = list(self.params.items()) + list(params)
+        if self.metrics is None:
+            return self._guarded(method, path, params, kwargs)
+
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            with self.metrics.phase('upstream'):
+                response = self._guarded(method, path, params, kwargs)
+            status = response.status_code
+            return response
+        except CircuitOpen:
+            status = 'circuit_open'
+            raise
+        finally:
+            self.metrics.observe('upstream_request_duration_seconds', time.perf_counter() - started,
+                                 upstream=self.name, method=method)
+            self.metrics.inc('upstream_responses_total', upstream=self.name, status=status)
+
+    def _guarded(self, method, path, params, kwargs):
+        if self.breaker is None:
+            return self._send(method, path, params, kwargs)
+
+        self.breaker.allow()
+        try:
+            response = self._send(method, path, params, kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _send(self, method, path, params, kwargs):
+        def send():
+            return self.session.request(method, self.url(path), params=params, **kwargs)
+
+        # Only GETs are repeated, and never streamed ones, whose body would be read twice
+        if self.hedger is None or method != 'GET' or kwargs.get('stream'):
+            return send()
+        return self.hedger.run(send, on_hedge=self._count_hedge)
+
+    def _count_hedge(self, winner):
+        if self.metrics is not None:
+            self.metrics.inc('upstream_hedges_total', upstream=self.name, winner=winner)
+
+    def stats(self):
+        return {
+            "circuit": self.breaker.stats() if self.breaker is not None else None,
+            "hedging": self.hedger.stats() if self.hedger is not None else None
+        }
+
+    def get(self, path, params=None, **kwargs):
+        return self.request('GET', path, params=params, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def get_json(self, path, params=None, **kwargs):
+        response = self.get(path, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        with self._lock:
+            for session in self._local.values():
+                session.close()
+            self._local = {}
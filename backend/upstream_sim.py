@@ -0,0 +1,523 @@
+import re
+import json
+import time
+import random
+import bisect
+import hashlib
+import threading
+from array import array
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl
+
+BASE58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+TX_TYPES = ('BUY', 'SELL', 'SWAP')
+AVATAR_URL = 'https://images.pexels.com/photos/220453/pexels-photo-220453.jpeg'
+# Supabase answers at most this many rows per request unless told otherwise
+DEFAULT_MAX_ROWS = 1000
+
+# An unescaped '+' in a UTC offset arrives as a space
+ISO_TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+\- ]\d{2}:\d{2})?')
+
+
+def synthetic_address(seed):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(BASE58) for _ in range(44))
+
+
+def mix(i):
+    # Cheap deterministic per-row noise, so rows need not be stored
+    return (i * 2654435761 + 0x9E3779B9) & 0xFFFFFFFF
+
+
+def isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+# PostgREST filters
+
+def split_top_level(text):
+    # Splits on commas outside parentheses and double quotes
+    parts, depth, quoted, current = [], 0, False, []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if quoted:
+            if c == '\\' and i + 1 < len(text):
+                current.append(text[i + 1])
+                i += 2
+                continue
+            if c == '"':
+                quoted = False
+            current.append(c)
+        elif c == '"':
+            quoted = True
+            current.append(c)
+        elif c == '(':
+            depth += 1
+            current.append(c)
+        elif c == ')':
+            depth -= 1
+            current.append(c)
+        elif c == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(c)
+        i += 1
+    parts.append(''.join(current))
+    return parts
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def compare_value(row_value, literal):
+    # Numbers compare as numbers, everything else as text, like the columns do
+    if isinstance(row_value, bool) or row_value is None:
+        return str(row_value).lower(), literal.lower()
+    if isinstance(row_value, (int, float)):
+        try:
+            return row_value, float(literal)
+        except ValueError:
+            return str(row_value), literal
+    return str(row_value), literal
+
+
+OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b
+}
+
+
+def column_predicate(column, expression):
+    # expression is the PostgREST right-hand side, e.g. 'gte.2024-01-01' or 'not.in.(a,b)'
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition('.')
+
+    if op in OPERATORS:
+        literal = unquote(value)
+        compare = OPERATORS[op]
+
+        def predicate(row):
+            row_value = row.get(column)
+            if row_value is None:
+                return False
+            return compare(*compare_value(row_value, literal))
+    elif op == 'in':
+        members = [unquote(v) for v in split_top_level(value.strip()[1:-1])] if value.strip('()') else []
+
+        def predicate(row):
+            row_value = row.get(column)
+            return row_value is not None and any(
+                a == b for a, b in (compare_value(row_value, m) for m in members)
+            )
+    elif op == 'is':
+        expected = {'null': None, 'true': True, 'false': False}.get(value.lower(), value)
+
+        def predicate(row):
+            return row.get(column) is expected
+    else:
+        raise ValueError(f"unsupported operator: {op}")
+
+    if negate:
+        return lambda row: not predicate(row)
+    return predicate
+
+
+def logic_predicate(kind, body):
+    # kind is 'and' or 'or'; body is '(term,term,...)' where a term is
+    # 'column.op.value' or a nested and(...)/or(...), optionally not.-prefixed
+    terms = [logic_term(term) for term in split_top_level(body.strip()[1:-1])]
+    if kind == 'or':
+        return lambda row: any(term(row) for term in terms)
+    return lambda row: all(term(row) for term in terms)
+
+
+def logic_term(term):
+    negate = term.startswith('not.')
+    if negate:
+        term = term[4:]
+    for kind in ('and', 'or'):
+        if term.startswith(kind + '('):
+            predicate = logic_predicate(kind, term[len(kind):])
+            break
+    else:
+        column, _, expression = term.partition('.')
+        predicate = column_predicate(column, expression)
+    if negate:
+        return lambda row: not predicate(row)
+    return predicate
+
+
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'on_conflict', 'columns'}
+
+
+def parse_query(pairs):
+    # PostgREST query string pairs -> (filters [(column, expression)], predicate, order, limit, offset, select)
+    filters, predicates = [], []
+    order, limit, offset, select = [], None, 0, None
+    for key, value in pairs:
+        if key == 'select':
+            select = [c.strip() for c in value.split(',') if c.strip()]
+        elif key == 'order':
+            for part in value.split(','):
+                column, _, direction = part.partition('.')
+                order.append((column, direction.startswith('desc')))
+        elif key == 'limit':
+            limit = int(value)
+        elif key == 'offset':
+            offset = int(value)
+        elif key in ('or', 'and', 'not.or', 'not.and'):
+            predicates.append(logic_term(f"{key}{value}"))
+        elif key not in RESERVED_PARAMS:
+            filters.append((key, value))
+            predicates.append(column_predicate(key, value))
+    return filters, predicates, order, limit, offset, select
+
+
+def project(row, select):
+    if not select or select == ['*']:
+        return row
+    return {column: row.get(column) for column in select}
+
+
+def sort_rows(rows, order):
+    for column, desc in reversed(order):
+        rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+    return rows
+
+
+class Table:
+    # A small in-memory table of dicts, filtered by scanning
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, pairs, max_rows=DEFAULT_MAX_ROWS):
+        _, predicates, order, limit, offset, select = parse_query(pairs)
+        rows = [row for row in self.rows if all(p(row) for p in predicates)]
+        if order:
+            rows = sort_rows(rows, order)
+        limit = min(limit, max_rows) if limit is not None else max_rows
+        return [project(row, select) for row in rows[offset:offset + limit]]
+
+
+class TransactionTable:
+    # webhook_transactions at scale without storing rows: row i is derived
+    # from i, newest first at one row per `step` seconds, and only each row's
+    # wallet is kept (in a compact array, plus per-wallet row ids). Wallet equality and
+    # block_time/created_at ranges narrow the candidate rows before the
+    # generic filters run on the few rows materialized
+    TIME_COLUMNS = ('block_time', 'created_at')
+
+    def __init__(self, count, wallets, tokens, span_seconds, seed=7, anchor=None):
+        self.count = count
+        self.wallets = wallets
+        self.tokens = tokens
+        self.anchor = anchor or time.time()
+        self.step = span_seconds / max(count, 1)
+
+        rng = random.Random(seed)
+        n_wallets = len(wallets)
+        # A few wallets trade far more than the rest, as in production
+        self.wallet_of = array('I', (min(int(n_wallets * rng.random() ** 2), n_wallets - 1) for _ in range(count)))
+        self.wallet_index = {address: i for i, address in enumerate(wallets)}
+        self.by_wallet = [array('I') for _ in wallets]
+        for i, w in enumerate(self.wallet_of):
+            self.by_wallet[w].append(i)
+
+    def block_ts(self, i):
+        return self.anchor - (i + 1) * self.step
+
+    def row(self, i):
+        h = mix(i)
+        mint, symbol = self.tokens[h % len(self.tokens)]
+        wallet = self.wallets[self.wallet_of[i]]
+        price = 0.0001 * (1 + (h >> 8) % 100000)
+        amount = round(10 ** (1 + 5.2 * ((h >> 4) % 10000 / 10000) ** 3), 2)
+        block_time = isoformat(self.block_ts(i))
+        pnl = ((h >> 12) % 2001 - 1000) / 10
+        return {
+            'id': str(i + 1),
+            'transaction_signature': f'sim{i:010d}',
+            'block_time': block_time,
+            'created_at': block_time,
+            'from_address': wallet,
+            'to_address': self.wallets[(self.wallet_of[i] + 1) % len(self.wallets)],
+            'amount': amount,
+            'token_amount': round(amount / price, 4),
+            'token_mint': mint,
+            'token_symbol': symbol,
+            'token_name': symbol,
+            'token_logo': None,
+            'transaction_type': TX_TYPES[(h >> 20) % 3],
+            'fee': 0.000005,
+            'price_usd': price,
+            'current_token_price': price,
+            'amount_usd': amount,
+            'sol_amount': round(amount / 150, 6),
+            'token_pnl': round(amount * pnl / 100, 2),
+            'token_pnl_percentage': pnl,
+            'market_cap': round(price * 1e9, 2),
+            'source': 'simulator'
+        }
+
+    def _first_at_or_before(self, ts):
+        # Lowest i with block_ts(i) <= ts
+        return max(0, min(self.count, int((self.anchor - ts) / self.step) - 1))
+
+    def _candidates(self, filters):
+        # Returns (row ids in block time order, exact); exact means the
+        # filters were all indexed, so only the first and last ids can fail them
+        lo, hi = 0, self.count
+        ids = None
+        exact = True
+        for column, expression in filters:
+            op, _, value = expression.partition('.')
+            value = unquote(value)
+            if column == 'from_address' and op == 'eq':
+                w = self.wallet_index.get(value)
+                ids = self.by_wallet[w] if w is not None else array('I')
+            elif column == 'from_address' and op == 'in':
+                lists = [self.by_wallet[self.wallet_index[v]] for v in
+                         (unquote(v) for v in split_top_level(value[1:-1])) if v in self.wallet_index]
+                ids = sorted(i for ids_ in lists for i in ids_) if len(lists) > 1 else (lists[0] if lists else [])
+            elif column in self.TIME_COLUMNS and op in ('gt', 'gte', 'lt', 'lte'):
+                ts = parse_timestamp(value)
+                if ts is None:
+                    exact = False
+                    continue
+                # Bounds are widened by a row; the exact comparison runs afterwards
+                if op in ('gt', 'gte'):
+                    hi = min(hi, self._first_at_or_before(ts) + 1)
+                else:
+                    lo = max(lo, self._first_at_or_before(ts) - 1)
+            else:
+                exact = False
+        if ids is None:
+            return range(lo, hi), exact
+        return ids[bisect.bisect_left(ids, lo):bisect.bisect_left(ids, hi)], exact
+
+    def query(self, pairs, max_rows=DEFAULT_MAX_ROWS):
+        filters, predicates, order, limit, offset, select = parse_query(pairs)
+        limit = min(limit, max_rows) if limit is not None else max_rows
+        candidates, exact = self._candidates(filters)
+        exact = exact and len(predicates) == len(filters)
+
+        time_ordered = not order or order[0][0] in self.TIME_COLUMNS
+        if time_ordered:
+            # Row order is block time order; ties can't happen, so later order
+            # columns (the signature tiebreak) never matter
+            ascending = bool(order) and not order[0][1]
+            if exact:
+                # Drop the boundary rows the widened bounds let in, then slice
+                start, stop = 0, len(candidates)
+                while start < stop and not all(p(self.row(candidates[start])) for p in predicates):
+                    start += 1
+                while stop > start and not all(p(self.row(candidates[stop - 1])) for p in predicates):
+                    stop -= 1
+                if ascending:
+                    stop, start = stop - offset, max(start, stop - offset - limit)
+                    window = reversed(candidates[start:max(stop, start)])
+                else:
+                    window = candidates[start + offset:min(stop, start + offset + limit)]
+                return [project(self.row(i), select) for i in window]
+
+            rows, skipped = [], 0
+            for i in (reversed(candidates) if ascending else candidates):
+                row = self.row(i)
+                if all(p(row) for p in predicates):
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    rows.append(project(row, select))
+                    if len(rows) >= limit:
+                        break
+            return rows
+
+        rows = [row for row in (self.row(i) for i in candidates) if all(p(row) for p in predicates)]
+        rows = sort_rows(rows, order)
+        return [project(row, select) for row in rows[offset:offset + limit]]
+
+
+class SyntheticUpstreams:
+    def __init__(self, rows, kols, tokens, span_days=30, wallet_history=1000,
+                 named_wallets=(), named_tokens=(), seed=7):
+        wallets = [wallet for wallet, _ in named_wallets]
+        names = [name for _, name in named_wallets]
+        for n in range(len(wallets), kols):
+            wallets.append(synthetic_address(f'kol-{seed}-{n}'))
+            names.append(f'KOL {n + 1}')
+
+        token_list = list(named_tokens)
+        for n in range(len(token_list), tokens):
+            token_list.append((synthetic_address(f'mint-{seed}-{n}'), f'TKN{n + 1}'))
+
+        now = datetime.now(timezone.utc).isoformat()
+        self.profiles = [
+            {
+                'wallet_address': wallet,
+                'name': name,
+                'avatar_url': AVATAR_URL,
+                'twitter_handle': name.replace(' ', '').lower(),
+                'bio': '',
+                'total_pnl': (mix(n) % 200000) - 50000,
+                'total_trades': mix(n) % 5000,
+                'win_rate': mix(n) % 100,
+                'total_volume': mix(n) % 10000000,
+                'followers_count': mix(n) % 100000,
+                'is_verified': n % 3 == 0,
+                'rank': n + 1,
+                'created_at': now,
+                'updated_at': now
+            }
+            for n, (wallet, name) in enumerate(zip(wallets, names))
+        ]
+        self.tokens = token_list
+        self.wallet_history = wallet_history
+        self.tables = {
+            'kol_profiles': Table(self.profiles),
+            'monitored_wallets': Table([{'wallet_address': wallet} for wallet in wallets]),
+            'webhook_transactions': TransactionTable(rows, wallets, token_list, span_days * 86400, seed)
+        }
+
+    def supabase(self, table, pairs):
+        source = self.tables.get(table)
+        if source is None:
+            return 404, {"message": f"relation {table} does not exist"}
+        try:
+            return 200, source.query(pairs)
+        except ValueError as e:
+            return 400, {"message": str(e)}
+
+    def helius_transactions(self, address, params):
+        # A fixed-length history per wallet, newest first, one transaction a minute
+        limit = min(int(params.get('limit', 100)), 100)
+        prefix = f'{address[:8]}-'
+
+        def position(signature):
+            if signature and signature.startswith(prefix) and signature[len(prefix):].isdigit():
+                return int(signature[len(prefix):])
+            return None
+
+        start = position(params.get('before'))
+        start = 0 if start is None else start + 1
+        stop = position(params.get('until'))
+        stop = self.wallet_history if stop is None else min(stop, self.wallet_history)
+
+        now = int(time.time())
+        return [
+            {
+                'signature': f'{prefix}{n}',
+                'timestamp': now - n * 60,
+                'type': TX_TYPES[mix(n) % 3],
+                'source': 'SIMULATOR',
+                'feePayer': address,
+                'fee': 5000,
+                'description': ''
+            }
+            for n in range(start, min(start + limit, stop))
+        ]
+
+    def price(self, address):
+        return {
+            'value': 1.0 + (sum(map(ord, address)) % 1000) / 100,
+            'updateUnixTime': int(time.time())
+        }
+
+
+class FaultInjector:
+    # Latency and failures per upstream ('supabase', 'helius', 'birdeye').
+    # settings maps knob -> value, with 'knob_<upstream>' overriding the default
+    def __init__(self, settings):
+        self.settings = settings
+        self._key_windows = {}
+        self._lock = threading.Lock()
+
+    def value(self, knob, upstream):
+        return float(self.settings.get(f'{knob}_{upstream}', self.settings.get(knob, 0)) or 0)
+
+    def apply(self, upstream, api_key=None):
+        # Sleeps for the configured latency, then returns (status, headers, body)
+        # for an injected failure, or None to serve the request normally
+        latency = self.value('latency', upstream) + random.random() * self.value('latency_jitter', upstream)
+        if latency:
+            time.sleep(latency)
+
+        key_rps = self.value('key_rps', upstream)
+        if key_rps and api_key:
+            second = int(time.time())
+            with self._lock:
+                window, count = self._key_windows.get(api_key, (second, 0))
+                count = count + 1 if window == second else 1
+                self._key_windows[api_key] = (second, count)
+            if count > key_rps:
+                return 429, {'Retry-After': '1'}, {"message": "Rate limit exceeded for this API key"}
+
+        if random.random() < self.value('rate_limit_rate', upstream):
+            retry_after = str(int(self.value('retry_after', upstream) or 1))
+            return 429, {'Retry-After': retry_after}, {"message": "Injected rate limit"}
+        if random.random() < self.value('error_rate', upstream):
+            return random.choice((500, 502, 503)), {}, {"message": "Injected upstream error"}
+        return None
+
+
+def recording_key(method, path, query):
+    # API keys are dropped and timestamps masked, so a recording made at one
+    # time matches the same query issued later
+    pairs = sorted((k, ISO_TIMESTAMP.sub('<ts>', v)) for k, v in parse_qsl(query, keep_blank_values=True)
+                   if k != 'api-key')
+    return f"{method} {path}?{'&'.join(f'{k}={v}' for k, v in pairs)}"
+
+
+class Recording:
+    # Upstream responses as JSON lines: {"key", "status", "headers", "body"}
+    KEPT_HEADERS = ('Content-Type', 'Content-Range', 'Retry-After')
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry['key']] = entry
+        return len(self._entries)
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def add(self, key, status, headers, body):
+        entry = {
+            'key': key,
+            'status': status,
+            'headers': {k: v for k, v in headers.items() if k in self.KEPT_HEADERS},
+            'body': body.decode('utf-8'),
+            'digest': hashlib.blake2b(body, digest_size=8).hexdigest()
+        }
+        with self._lock:
+            self._entries[key] = entry
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
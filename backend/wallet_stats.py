@@ -0,0 +1,171 @@
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+WindowStats = namedtuple('WindowStats', ['windows', 'synced_at', 'checked_at'])
+
+# Invariant per window: the running totals cover exactly the stored events
+# with score >= cut:<window>. Adding an event counts it in every window whose
+# cut it is past; advancing a cut subtracts only the events it moves over, so
+# each event is touched once per window over its lifetime.
+
+ADD_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+local synced_at = ARGV[2]
+local checked_at = ARGV[3]
+local n = tonumber(ARGV[4])
+local cuts = {}
+local oldest = nil
+for i = 1, n do
+    local name = ARGV[4 + i]
+    local cut = tonumber(redis.call('HGET', KEYS[1], 'cut:' .. name) or '0')
+    cuts[name] = cut
+    if oldest == nil or cut < oldest then oldest = cut end
+end
+local added = 0
+for i = 5 + n, #ARGV, 4 do
+    local signature, ts, buy, amount = ARGV[i], tonumber(ARGV[i + 1]), ARGV[i + 2], ARGV[i + 3]
+    if ts >= oldest and redis.call('HSETNX', KEYS[3], signature, buy .. '|' .. amount) == 1 then
+        redis.call('ZADD', KEYS[2], ts, signature)
+        for name, cut in pairs(cuts) do
+            if ts >= cut then
+                redis.call('HINCRBY', KEYS[1], name .. ':transactions', 1)
+                redis.call('HINCRBY', KEYS[1], name .. (buy == '1' and ':buys' or ':sells'), 1)
+                redis.call('HINCRBYFLOAT', KEYS[1], name .. ':volume', amount)
+            end
+        end
+        added = added + 1
+    end
+end
+if synced_at ~= '' then
+    redis.call('HSET', KEYS[1], 'synced_at', synced_at, 'checked_at', checked_at)
+end
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ttl)
+end
+return added
+"""
+
+ADVANCE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {}
+end
+local now = tonumber(ARGV[1])
+local oldest = nil
+for i = 2, #ARGV, 2 do
+    local name = ARGV[i]
+    local cut = now - tonumber(ARGV[i + 1])
+    local previous = tonumber(redis.call('HGET', KEYS[1], 'cut:' .. name) or '0')
+    if cut > previous then
+        local expired = redis.call('ZRANGEBYSCORE', KEYS[2], previous, '(' .. cut)
+        for _, signature in ipairs(expired) do
+            local detail = redis.call('HGET', KEYS[3], signature)
+            if detail then
+                local buy, amount = string.match(detail, '^(%d)|(.*)$')
+                redis.call('HINCRBY', KEYS[1], name .. ':transactions', -1)
+                redis.call('HINCRBY', KEYS[1], name .. (buy == '1' and ':buys' or ':sells'), -1)
+                redis.call('HINCRBYFLOAT', KEYS[1], name .. ':volume', tostring(-tonumber(amount)))
+            end
+        end
+        redis.call('HSET', KEYS[1], 'cut:' .. name, cut)
+        previous = cut
+    end
+    if oldest == nil or previous < oldest then oldest = previous end
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. oldest)
+for _, signature in ipairs(expired) do
+    redis.call('HDEL', KEYS[3], signature)
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. oldest)
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def block_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def empty_window():
+    return {"transactions": 0, "buy_count": 0, "sell_count": 0, "volume": 0.0}
+
+
+def summarize(transactions, windows, buy_types, now=None):
+    # Plain Python totals over a list of rows, used when Redis is unavailable
+    now = time.time() if now is None else now
+    totals = {name: empty_window() for name in windows}
+    for tx in transactions:
+        ts = block_timestamp(tx['block_time'])
+        amount = float(tx.get('amount') or 0)
+        is_buy = tx.get('transaction_type') in buy_types
+        for name, seconds in windows.items():
+            if ts >= now - seconds:
+                window = totals[name]
+                window['transactions'] += 1
+                window['buy_count' if is_buy else 'sell_count'] += 1
+                window['volume'] += amount
+    return totals
+
+
+class WalletStats:
+    def __init__(self, redis_client, windows, buy_types, ttl=None, overlap=30):
+        # redis_client must decode responses; windows maps name -> seconds
+        self.redis = redis_client
+        self.windows = dict(windows)
+        self.buy_types = set(buy_types)
+        self.ttl = ttl or max(self.windows.values()) + 86400
+        self.overlap = overlap
+        self._add = redis_client.register_script(ADD_SCRIPT) if redis_client is not None else None
+        self._advance = redis_client.register_script(ADVANCE_SCRIPT) if redis_client is not None else None
+
+    @property
+    def available(self):
+        return self.redis is not None
+
+    def _keys(self, wallet):
+        # The hash tag keeps a wallet's keys in one slot for the scripts
+        prefix = f'wallet_stats:{{{wallet}}}'
+        return [f'{prefix}:totals', f'{prefix}:events', f'{prefix}:details']
+
+    def add(self, wallet, transactions, synced_at=None):
+        # transactions are webhook_transactions rows; synced_at marks a
+        # Supabase sync up to that created_at watermark
+        args = [self.ttl, synced_at or '', time.time(), len(self.windows), *self.windows]
+        for tx in transactions:
+            signature = tx.get('transaction_signature')
+            if not signature or not tx.get('block_time'):
+                continue
+            args.extend([
+                signature,
+                block_timestamp(tx['block_time']),
+                1 if tx.get('transaction_type') in self.buy_types else 0,
+                repr(float(tx.get('amount') or 0))
+            ])
+        return self._add(keys=self._keys(wallet), args=args)
+
+    def sync_from(self, synced_at):
+        # The created_at an incremental sync reads from. Rows can commit late
+        # with a created_at before the watermark, so the last overlap seconds
+        # are read again; rows already counted are skipped by signature
+        since = datetime.fromisoformat(synced_at.replace('Z', '+00:00')) - timedelta(seconds=self.overlap)
+        return since.isoformat()
+
+    def get(self, wallet, now=None):
+        # Returns None until the wallet has been synced from Supabase
+        now = time.time() if now is None else now
+        args = [now]
+        for name, seconds in self.windows.items():
+            args.extend([name, seconds])
+        values = self._advance(keys=self._keys(wallet), args=args)
+        totals = dict(zip(values[::2], values[1::2]))
+        if 'synced_at' not in totals:
+            return None
+
+        windows = {}
+        for name in self.windows:
+            windows[name] = {
+                "transactions": int(totals.get(f'{name}:transactions', 0)),
+                "buy_count": int(totals.get(f'{name}:buys', 0)),
+                "sell_count": int(totals.get(f'{name}:sells', 0)),
+                "volume": round(float(totals.get(f'{name}:volume', 0)), 6)
+            }
+        return WindowStats(windows, totals['synced_at'], float(totals['checked_at']))
@@ -0,0 +1,260 @@
+import time
+import atexit
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+from per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+SOL_MINT = 'So11111111111111111111111111111111111111112'
+LAMPORTS_PER_SOL = 1_000_000_000
+
+
+class QueueFull(Exception):
+    pass
+
+
+def involved_wallet(tx, monitored):
+    # Same precedence as the Supabase helius-webhook function
+    candidates = [tx.get('feePayer'), tx.get('from'), tx.get('to')]
+    for transfer in (tx.get('nativeTransfers') or []) + (tx.get('tokenTransfers') or []):
+        candidates.append(transfer.get('fromUserAccount'))
+        candidates.append(transfer.get('toUserAccount'))
+    for address in candidates:
+        if address and address in monitored:
+            return address
+    return None
+
+
+def determine_transaction_type(tx, wallet):
+    # Port of determineTransactionType() in supabase/functions/helius-webhook
+    tx_type = (tx.get('type') or 'UNKNOWN').upper()
+    sol_received = sol_sent = token_received = token_sent = False
+
+    for transfer in tx.get('tokenTransfers') or []:
+        is_sol = transfer.get('mint') == SOL_MINT
+        if transfer.get('toUserAccount') == wallet:
+            if is_sol:
+                sol_received = True
+            else:
+                token_received = True
+        if transfer.get('fromUserAccount') == wallet:
+            if is_sol:
+                sol_sent = True
+            else:
+                token_sent = True
+
+    account = next((a for a in tx.get('accountData') or [] if a.get('account') == wallet), None)
+    if account:
+        native_change = account.get('nativeBalanceChange') or 0
+        if native_change > 0:
+            sol_received = True
+        if native_change < 0:
+            sol_sent = True
+        for change in account.get('tokenBalanceChanges') or []:
+            if change.get('mint') == SOL_MINT:
+                continue
+            amount = float((change.get('rawTokenAmount') or {}).get('tokenAmount') or 0)
+            if amount > 0:
+                token_received = True
+            if amount < 0:
+                token_sent = True
+
+    if token_received and sol_sent:
+        return 'BUY'
+    if sol_received and token_sent:
+        return 'SELL'
+    if sol_received and token_received:
+        return 'SELL'
+    if token_received and not token_sent and not sol_received and not sol_sent:
+        return 'BUY'
+    if token_sent and not token_received and not sol_sent and not sol_received:
+        return 'SELL'
+    if token_received and token_sent:
+        return 'SWAP'
+    if tx_type == 'TOKEN_MINT':
+        return 'BUY'
+    if tx_type in ('TRANSFER', 'SOL_TRANSFER'):
+        return None
+    return tx_type
+
+
+def extract_transaction_data(tx, wallet):
+    # Port of extractTransactionData() in supabase/functions/helius-webhook,
+    # except that SOL flows are measured on the monitored wallet itself (the
+    # edge function used the token sender, which is the pool on a buy)
+    counterparty = token_mint = token_symbol = None
+    amount = 0
+    sol_amount = 0
+    native_balance_change = 0
+
+    token_transfer = next((t for t in tx.get('tokenTransfers') or [] if t.get('mint') != SOL_MINT), None)
+    if token_transfer:
+        sender = token_transfer.get('fromUserAccount')
+        counterparty = token_transfer.get('toUserAccount') if sender == wallet else sender
+        amount = token_transfer.get('tokenAmount') or 0
+        token_mint = token_transfer.get('mint')
+        token_symbol = token_transfer.get('tokenStandard')
+    else:
+        for account in tx.get('accountData') or []:
+            changes = account.get('tokenBalanceChanges') or []
+            if changes:
+                raw = changes[0].get('rawTokenAmount') or {}
+                token_mint = changes[0].get('mint')
+                amount = abs(float(raw.get('tokenAmount') or 0)) / 10 ** (raw.get('decimals') or 0)
+                break
+
+    for transfer in tx.get('nativeTransfers') or []:
+        sol_value = (transfer.get('amount') or 0) / LAMPORTS_PER_SOL
+        if transfer.get('fromUserAccount') == wallet:
+            sol_amount -= sol_value
+        if transfer.get('toUserAccount') == wallet:
+            sol_amount += sol_value
+
+    account = next((a for a in tx.get('accountData') or [] if a.get('account') == wallet), None)
+    if account and account.get('nativeBalanceChange'):
+        native_balance_change = account['nativeBalanceChange'] / LAMPORTS_PER_SOL
+        if abs(native_balance_change) > abs(sol_amount):
+            sol_amount = native_balance_change
+
+    return {
+        'counterparty': counterparty,
+        'amount': amount,
+        'token_mint': token_mint,
+        'token_symbol': token_symbol,
+        'sol_amount': sol_amount,
+        'native_balance_change': native_balance_change
+    }
+
+
+def normalize(tx, monitored):
+    # One Helius enhanced transaction -> one webhook_transactions row, or None
+    # when it doesn't touch a monitored wallet or isn't a trade. Like
+    # scripts/continuous-sync.js, from_address is the monitored wallet. A
+    # malformed transaction is logged and skipped: failing the request would
+    # only have Helius redeliver the whole batch, forever
+    try:
+        return _normalize(tx, monitored)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        logger.warning(f"Skipping malformed Helius transaction {tx.get('signature')}: {str(e)}")
+        return None
+
+
+def _normalize(tx, monitored):
+    wallet = involved_wallet(tx, monitored)
+    if wallet is None or not tx.get('signature'):
+        return None
+
+    transaction_type = determine_transaction_type(tx, wallet)
+    if transaction_type is None:
+        return None
+
+    data = extract_transaction_data(tx, wallet)
+    if not data['token_mint']:
+        return None
+
+    timestamp = tx.get('timestamp')
+    block_time = datetime.fromtimestamp(timestamp, timezone.utc) if timestamp else datetime.now(timezone.utc)
+
+    return {
+        'transaction_signature': tx['signature'],
+        'block_time': block_time.isoformat(),
+        'transaction_type': transaction_type,
+        'from_address': wallet,
+        'to_address': data['counterparty'],
+        'amount': data['amount'],
+        'token_amount': data['amount'],
+        'token_mint': data['token_mint'],
+        'token_symbol': data['token_symbol'] or data['token_mint'][:6].upper(),
+        'fee': (tx.get('fee') or 0) / LAMPORTS_PER_SOL,
+        'description': tx.get('description'),
+        'source': tx.get('source') or 'helius',
+        'sol_amount': data['sol_amount'],
+        'native_balance_change': data['native_balance_change']
+    }
+
+
+class BatchWriter:
+    def __init__(self, write_batch, max_queue=10000, batch_size=200, flush_interval=0.5, retries=3):
+        # write_batch(rows) is called from one background thread per worker
+        # with up to batch_size rows, at least every flush_interval seconds
+        self.write_batch = write_batch
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._started = PerProcess(self._start)
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        # One writer thread per worker
+        self._started.get()
+
+    def _start(self):
+        with self._lock:
+            self._queue = queue.Queue(maxsize=self.max_queue)
+        threading.Thread(target=self._run, name='webhook-writer', daemon=True).start()
+        atexit.register(self.drain)
+
+    def submit(self, rows):
+        # All or nothing, so a sender retrying after a 503 doesn't half-duplicate a batch
+        self.start()
+        with self._lock:
+            if self._queue.qsize() + len(rows) > self.max_queue:
+                raise QueueFull(f"Ingestion queue full ({self._queue.qsize()} rows pending)")
+            for row in rows:
+                self._queue.put_nowait(row)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def drain(self, timeout=10):
+        # Gives queued rows a chance to be written when the worker exits. Rows
+        # count as unfinished from put() until task_done() after their batch is
+        # written or dropped, so a batch just taken off the queue still counts
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            for attempt in range(self.retries):
+                try:
+                    self.write_batch(batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                    break
+                except Exception as e:
+                    logger.warning(f"Webhook batch write failed (attempt {attempt + 1}): {str(e)}")
+                    time.sleep(min(2 ** attempt * 0.5, 5))
+            else:
+                self.failed += len(batch)
+                logger.error(f"Dropped {len(batch)} webhook transactions after {self.retries} attempts")
+            for _ in batch:
+                self._queue.task_done()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches
+        }
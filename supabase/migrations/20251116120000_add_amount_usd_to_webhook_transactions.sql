@@ -0,0 +1,25 @@
+/*
+  # Add USD value column for server-side filtering
+
+  1. Changes
+    - Add `amount_usd` to `webhook_transactions` as a stored generated column
+      (`token_amount * price_usd`, falling back to `amount` when `token_amount` is null)
+    - Add index on (amount_usd DESC, block_time DESC) for large-transaction scans
+    - Add index on kol_profiles (updated_at) for incremental profile refreshes
+
+  2. Notes
+    - The Flask insider scan filters on `amount_usd=gt.100000` in PostgREST
+      instead of downloading recent rows and filtering them in Python
+    - The KOL profile index polls `updated_at >= last_seen`
+*/
+
+ALTER TABLE webhook_transactions
+  ADD COLUMN IF NOT EXISTS amount_usd numeric
+  GENERATED ALWAYS AS (COALESCE(token_amount, amount) * COALESCE(price_usd, 0)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_webhook_tx_amount_usd_time
+  ON webhook_transactions (amount_usd DESC, block_time DESC)
+  WHERE amount_usd > 100000;
+
+CREATE INDEX IF NOT EXISTS idx_kol_profiles_updated_at
+  ON kol_profiles (updated_at);